@@ -0,0 +1,51 @@
+"""Synthetic panels for the benchmarks"""
+import numpy as np
+import pandas as pd
+
+
+def make_panel(n_series, n_periods, freq="W-SUN", seed=0):
+    """Weekly panel with a yearly seasonality, in the layout of the ILINet panel
+
+    Returns a frame with REGION and ILITOTAL columns and a PeriodIndex named
+    ds_wsun, sorted by date.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.period_range("2010-01-03", periods=n_periods, freq=freq)
+    t = np.arange(n_periods)
+    level = rng.uniform(50, 500, size=(n_series, 1))
+    phase = rng.integers(52, size=(n_series, 1))
+    season = 1 + 0.5 * np.sin(2 * np.pi * (t - phase) / 52)
+    y = rng.poisson(level * season).astype(np.float64)
+
+    panel_df = pd.DataFrame(
+        {
+            "REGION": np.repeat([f"region_{i}" for i in range(n_series)], n_periods),
+            "ILITOTAL": y.ravel(),
+        },
+        index=pd.PeriodIndex(np.tile(dates, n_series), name="ds_wsun"),
+    )
+    return panel_df.sort_index(kind="stable")
+
+
+def make_raw_data(n_series, n_periods, seed=0):
+    """Raw ILINet-like frame with REGION, YEAR, WEEK and ILITOTAL columns
+
+    Every series has n_periods consecutive MMWR weeks from the first week of
+    2010, years are treated as 52 weeks long.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.tile(np.arange(n_periods), n_series)
+    return pd.DataFrame(
+        {
+            "REGION": np.repeat([f"region_{i}" for i in range(n_series)], n_periods),
+            "YEAR": 2010 + t // 52,
+            "WEEK": t % 52 + 1,
+            "ILITOTAL": rng.integers(0, 1000, size=n_series * n_periods),
+        }
+    )
+
+
+def drop_rows(panel_df, fraction, seed=0):
+    """Panel with a random fraction of its rows removed, leaving gaps"""
+    rng = np.random.default_rng(seed)
+    return panel_df[rng.random(len(panel_df)) >= fraction]
@@ -0,0 +1,25 @@
+"""Benchmarks for the data validation functions"""
+from dsf_utils.data_validation import panel_missing_dates
+from benchmarks._panels import drop_rows, make_panel
+
+
+class PanelMissingDates:
+    params = ([100, 10_000], [5 * 52, 10 * 52])
+    param_names = ["n_series", "n_periods"]
+    timeout = 300
+
+    def setup(self, n_series, n_periods):
+        panel_df = drop_rows(make_panel(n_series, n_periods), fraction=0.05)
+        self.panel_df = panel_df.reset_index()
+        # the W-SUN grid is of the Sundays ending the weeks
+        self.panel_df["ds_wsun"] = (
+            self.panel_df["ds_wsun"].dt.to_timestamp(how="end").dt.normalize()
+        )
+
+    def time_panel_missing_dates(self, n_series, n_periods):
+        panel_missing_dates(
+            self.panel_df, freq="W-SUN", date_col="ds_wsun", id_cols=["REGION"]
+        )
+
+    def peakmem_panel_missing_dates(self, n_series, n_periods):
+        self.time_panel_missing_dates(n_series, n_periods)
@@ -0,0 +1,39 @@
+"""Benchmarks for the backtest of the panel forecasters"""
+import numpy as np
+from sktime.performance_metrics.forecasting import MeanSquaredScaledError
+from dsf_utils.evaluation import evaluate_panel_forecaster_on_cutoffs
+from dsf_utils.models import DirectLGBMGlobalForecaster, PanelBenchmarkForecaster
+from dsf_utils.panel import PanelFrame
+from benchmarks._panels import make_panel
+
+METRIC = MeanSquaredScaledError(square_root=True)
+
+
+class PanelBacktest:
+    params = ([100, 1_000], [4, 12], [13])
+    param_names = ["n_series", "n_cutoffs", "horizon"]
+    timeout = 900
+
+    def setup(self, n_series, n_cutoffs, horizon):
+        n_periods = 5 * 52 + n_cutoffs + horizon
+        self.panel = PanelFrame(make_panel(n_series, n_periods))
+        # weekly cutoffs after a full training window of 5 years
+        dates = self.panel.periods.unique().sort_values()
+        self.cutoffs = list(dates[5 * 52 - 1 + np.arange(n_cutoffs)])
+        self.fh = np.arange(horizon) + 1
+
+    def _evaluate(self, forecaster):
+        evaluate_panel_forecaster_on_cutoffs(
+            self.panel, self.cutoffs, forecaster, METRIC, fh=self.fh
+        )
+
+    def time_benchmark_forecaster(self, n_series, n_cutoffs, horizon):
+        self._evaluate(PanelBenchmarkForecaster(strategy="last", sp=52))
+
+    def peakmem_benchmark_forecaster(self, n_series, n_cutoffs, horizon):
+        self.time_benchmark_forecaster(n_series, n_cutoffs, horizon)
+
+    def time_direct_lgbm(self, n_series, n_cutoffs, horizon):
+        self._evaluate(
+            DirectLGBMGlobalForecaster(lgbm_kwargs={"n_estimators": 20, "verbose": -1})
+        )
@@ -0,0 +1,45 @@
+"""Benchmarks for the lag, calendar and window features of the global forecasters"""
+from sklearn.preprocessing import LabelEncoder
+from dsf_utils.models._features import PanelFeatureEngine
+from benchmarks._panels import make_panel
+
+WINDOW_FEATURES = {
+    "rolling_mean": [4, 13, 52],
+    "rolling_std": [13, 52],
+    "expanding_mean": True,
+    "ewm": [0.1, 0.5],
+}
+
+
+class FeatureMatrix:
+    params = ([100, 1_000], [5 * 52, 10 * 52], [12, 52])
+    param_names = ["n_series", "n_periods", "lag_window_length"]
+    timeout = 300
+
+    def setup(self, n_series, n_periods, lag_window_length):
+        self.panel_df = make_panel(n_series, n_periods)
+
+    def _feature_engine(self, lag_window_length, calendar, window_features=None):
+        return PanelFeatureEngine(
+            ts_id_col="REGION",
+            target_col="ILITOTAL",
+            lag_window_length=lag_window_length,
+            calendar_features={"week": calendar, "year": calendar, "t": calendar},
+            cat_encoder=LabelEncoder(),
+            freq="W-SUN",
+            window_features=window_features,
+        )
+
+    def time_lag_features(self, n_series, n_periods, lag_window_length):
+        self._feature_engine(lag_window_length, False).fit_transform(self.panel_df)
+
+    def time_lag_and_calendar_features(self, n_series, n_periods, lag_window_length):
+        self._feature_engine(lag_window_length, True).fit_transform(self.panel_df)
+
+    def peakmem_lag_and_calendar_features(self, n_series, n_periods, lag_window_length):
+        self.time_lag_and_calendar_features(n_series, n_periods, lag_window_length)
+
+    def time_lag_and_window_features(self, n_series, n_periods, lag_window_length):
+        self._feature_engine(lag_window_length, False, WINDOW_FEATURES).fit_transform(
+            self.panel_df
+        )
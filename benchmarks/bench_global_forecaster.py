@@ -0,0 +1,132 @@
+"""Benchmarks for the global LightGBM forecasters"""
+from copy import deepcopy
+import numpy as np
+from dsf_utils.models import (
+    DirectLGBMGlobalForecaster,
+    RecursiveLGBMGlobalForecaster,
+)
+from benchmarks._panels import make_panel
+
+LGBM_KWARGS = {"n_estimators": 50, "verbose": -1}
+
+
+class DirectFit:
+    params = ([100, 1_000], [1, 4])
+    param_names = ["n_series", "n_jobs"]
+    timeout = 600
+
+    def setup(self, n_series, n_jobs):
+        self.panel_df = make_panel(n_series, 5 * 52)
+        self.fh = np.arange(52) + 1
+
+    def time_fit(self, n_series, n_jobs):
+        DirectLGBMGlobalForecaster(lgbm_kwargs=LGBM_KWARGS, n_jobs=n_jobs).fit(
+            self.panel_df, fh=self.fh
+        )
+
+    def peakmem_fit(self, n_series, n_jobs):
+        self.time_fit(n_series, n_jobs)
+
+
+class DirectPredict:
+    params = ([100, 1_000], [13, 52])
+    param_names = ["n_series", "horizon"]
+    timeout = 600
+
+    def setup(self, n_series, horizon):
+        self.fh = np.arange(horizon) + 1
+        self.forecaster = DirectLGBMGlobalForecaster(lgbm_kwargs=LGBM_KWARGS)
+        self.forecaster.fit(make_panel(n_series, 5 * 52), fh=self.fh)
+
+    def time_predict(self, n_series, horizon):
+        self.forecaster.predict(self.fh)
+
+    def peakmem_predict(self, n_series, horizon):
+        self.forecaster.predict(self.fh)
+
+
+class RecursiveFitPredict:
+    params = ([100, 1_000], [5 * 52, 10 * 52], [13, 52])
+    param_names = ["n_series", "n_periods", "horizon"]
+    timeout = 600
+
+    def setup(self, n_series, n_periods, horizon):
+        self.panel_df = make_panel(n_series, n_periods)
+        self.fh = np.arange(horizon) + 1
+        self.forecaster = RecursiveLGBMGlobalForecaster(lgbm_kwargs=LGBM_KWARGS)
+        self.forecaster.fit(self.panel_df)
+
+    def time_fit(self, n_series, n_periods, horizon):
+        RecursiveLGBMGlobalForecaster(lgbm_kwargs=LGBM_KWARGS).fit(self.panel_df)
+
+    def peakmem_fit(self, n_series, n_periods, horizon):
+        self.time_fit(n_series, n_periods, horizon)
+
+    def time_predict(self, n_series, n_periods, horizon):
+        self.forecaster.predict(self.fh)
+
+    def peakmem_predict(self, n_series, n_periods, horizon):
+        self.forecaster.predict(self.fh)
+
+
+class RecursiveWindowFeaturesPredict:
+    params = ([100, 1_000], [13, 52])
+    param_names = ["n_series", "horizon"]
+    timeout = 600
+
+    def setup(self, n_series, horizon):
+        self.fh = np.arange(horizon) + 1
+        self.forecaster = RecursiveLGBMGlobalForecaster(
+            lgbm_kwargs=LGBM_KWARGS,
+            window_features={
+                "rolling_mean": [4, 13],
+                "rolling_std": [13],
+                "ewm": [0.3],
+            },
+        )
+        self.forecaster.fit(make_panel(n_series, 5 * 52))
+
+    def time_predict(self, n_series, horizon):
+        self.forecaster.predict(self.fh)
+
+
+class WeeklyUpdate:
+    params = ([100, 1_000], [False, True])
+    param_names = ["n_series", "init_model"]
+    timeout = 600
+
+    def setup(self, n_series, init_model):
+        self.panel_df = make_panel(n_series, 5 * 52 + 1)
+        last_date = self.panel_df.index.max()
+        self.history_df = self.panel_df[self.panel_df.index < last_date]
+        self.new_df = self.panel_df[self.panel_df.index == last_date]
+        self.fh = np.arange(13) + 1
+        self.forecaster = DirectLGBMGlobalForecaster(lgbm_kwargs=LGBM_KWARGS)
+        self.forecaster.fit(self.history_df, fh=self.fh)
+
+    def time_refit(self, n_series, init_model):
+        DirectLGBMGlobalForecaster(lgbm_kwargs=LGBM_KWARGS).fit(
+            self.panel_df, fh=self.fh
+        )
+
+    def time_update(self, n_series, init_model):
+        # every repeat appends the same week, so the update works on a copy
+        forecaster = deepcopy(self.forecaster)
+        forecaster.update(self.new_df, init_model=init_model)
+
+
+class OutOfCoreFit:
+    params = ([1_000, 3_000], [None, 200])
+    param_names = ["n_series", "chunk_size"]
+    timeout = 900
+
+    def setup(self, n_series, chunk_size):
+        self.panel_df = make_panel(n_series, 10 * 52)
+
+    def time_fit(self, n_series, chunk_size):
+        RecursiveLGBMGlobalForecaster(
+            lgbm_kwargs=LGBM_KWARGS, lag_window_length=52, chunk_size=chunk_size
+        ).fit(self.panel_df)
+
+    def peakmem_fit(self, n_series, chunk_size):
+        self.time_fit(n_series, chunk_size)
@@ -0,0 +1,31 @@
+"""Benchmarks for the vectorized panel metrics"""
+import numpy as np
+from sktime.performance_metrics.forecasting import MeanSquaredScaledError
+from dsf_utils.metrics import mean_squared_scaled_error, naive_scale
+
+
+class PanelRMSSE:
+    params = [1_000, 100_000]
+    param_names = ["n_series"]
+
+    def setup(self, n_series):
+        rng = np.random.default_rng(0)
+        self.y_train = rng.gamma(2, 50, size=(n_series, 5 * 52))
+        self.y_test = rng.gamma(2, 50, size=(n_series, 13))
+        self.y_pred = self.y_test + rng.normal(0, 10, size=self.y_test.shape)
+        self.scale = naive_scale(self.y_train, squared=True)
+
+    def time_sktime(self, n_series):
+        MeanSquaredScaledError(square_root=True, multioutput="raw_values")(
+            y_true=self.y_test.T, y_pred=self.y_pred.T, y_train=self.y_train.T
+        )
+
+    def time_kernel(self, n_series):
+        mean_squared_scaled_error(
+            self.y_test, self.y_pred, self.y_train, square_root=True
+        )
+
+    def time_kernel_precomputed_scale(self, n_series):
+        mean_squared_scaled_error(
+            self.y_test, self.y_pred, square_root=True, scale=self.scale
+        )
@@ -0,0 +1,45 @@
+"""Benchmarks for the panel container and the panel benchmark forecasts"""
+import numpy as np
+from dsf_utils.models import PanelBenchmarkForecaster
+from dsf_utils.panel import PanelFrame
+from dsf_utils.preprocessing import single_region_ts
+from benchmarks._panels import make_panel
+
+
+class SingleSeriesAccess:
+    params = [100, 1000]
+    param_names = ["n_series"]
+
+    def setup(self, n_series):
+        self.panel_df = make_panel(n_series, 520)
+        self.panel = PanelFrame(self.panel_df)
+        self.regions = list(self.panel.ts_ids[:20])
+
+    def time_dataframe(self, n_series):
+        for region in self.regions:
+            single_region_ts(self.panel_df, region)
+
+    def time_panel_frame(self, n_series):
+        for region in self.regions:
+            single_region_ts(self.panel, region)
+
+    def time_build_panel_frame(self, n_series):
+        PanelFrame(self.panel_df)
+
+
+class BenchmarkForecasts:
+    params = ([1_000, 100_000], ["last", "mean"])
+    param_names = ["n_series", "strategy"]
+    timeout = 300
+
+    def setup(self, n_series, strategy):
+        self.panel = PanelFrame(make_panel(n_series, 2 * 52))
+        self.fh = np.arange(13) + 1
+        self.forecaster = PanelBenchmarkForecaster(strategy=strategy, sp=52)
+        self.forecaster.fit(self.panel)
+
+    def time_fit(self, n_series, strategy):
+        PanelBenchmarkForecaster(strategy=strategy, sp=52).fit(self.panel)
+
+    def time_predict(self, n_series, strategy):
+        self.forecaster.predict(self.fh)
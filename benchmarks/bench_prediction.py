@@ -0,0 +1,43 @@
+"""Benchmarks for the assembly of panel prediction frames"""
+import numpy as np
+import pandas as pd
+from dsf_utils.models._prediction import PredictionBuilder
+
+
+def _prediction_blocks(n_series, horizon, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.period_range("2020-01-05", periods=horizon, freq="W-SUN")
+    return [(f"series_{i}", dates, rng.normal(size=horizon)) for i in range(n_series)]
+
+
+class PredictionAssembly:
+    params = ([100, 1_000, 10_000], [13])
+    param_names = ["n_series", "horizon"]
+
+    def setup(self, n_series, horizon):
+        self.blocks = _prediction_blocks(n_series, horizon)
+
+    def time_prediction_builder(self, n_series, horizon):
+        pred_builder = PredictionBuilder(n_series * horizon, "REGION")
+        for ts_id, dates, y_pred in self.blocks:
+            pred_builder.add(ts_id, dates, y_pred)
+        pred_builder.to_frame()
+
+    def peakmem_prediction_builder(self, n_series, horizon):
+        self.time_prediction_builder(n_series, horizon)
+
+
+class GrowingConcatAssembly:
+    """Growing the frame in a loop, the pattern of the old DataFrame.append"""
+
+    params = ([100, 1_000], [13])
+    param_names = ["n_series", "horizon"]
+
+    def setup(self, n_series, horizon):
+        self.blocks = _prediction_blocks(n_series, horizon)
+
+    def time_growing_concat(self, n_series, horizon):
+        pred_df = pd.DataFrame()
+        for ts_id, dates, y_pred in self.blocks:
+            _pred_df = pd.DataFrame({"REGION": ts_id, "y_pred": y_pred}, index=dates)
+            pred_df = pd.concat([pred_df, _pred_df])
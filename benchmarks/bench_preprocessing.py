@@ -0,0 +1,88 @@
+"""Benchmarks for the preprocessing functions"""
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from dsf_utils.preprocessing import (
+    epiweek_end_dates,
+    epiweeks_from_df,
+    load_raw_data,
+    process_raw_data,
+)
+from benchmarks._panels import make_raw_data
+
+
+def _year_week_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "YEAR": rng.integers(1997, 2022, size=n_rows),
+            "WEEK": rng.integers(1, 53, size=n_rows),
+        }
+    )
+
+
+class EpiweekConversion:
+    params = [1_000, 100_000]
+    param_names = ["n_rows"]
+
+    def setup(self, n_rows):
+        self.df = _year_week_frame(n_rows)
+
+    def time_apply(self, n_rows):
+        # the row-wise apply over (year, week) Series rows that process_raw_data
+        # used, row[0] was a positional lookup before pandas 3
+        dates = self.df[["YEAR", "WEEK"]].apply(
+            lambda row: epiweeks_from_df((row.iloc[0], row.iloc[1])), axis=1
+        )
+        pd.to_datetime(dates)
+
+    def time_vectorized(self, n_rows):
+        epiweek_end_dates(self.df["YEAR"], self.df["WEEK"])
+
+
+class RawDataLoading:
+    params = [100_000, 1_000_000]
+    param_names = ["n_rows"]
+    timeout = 300
+
+    def setup(self, n_rows):
+        rng = np.random.default_rng(0)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "ILINet.csv")
+        raw_df = _year_week_frame(n_rows)
+        raw_df.insert(
+            0, "REGION", rng.choice([f"region_{i}" for i in range(50)], n_rows)
+        )
+        raw_df["% WEIGHTED ILI"] = "X"
+        raw_df["ILITOTAL"] = rng.integers(0, 1000, size=n_rows)
+        raw_df.to_csv(self.path, index=False)
+
+    def teardown(self, n_rows):
+        self.tmp_dir.cleanup()
+
+    def peakmem_read_csv_process_raw_data(self, n_rows):
+        process_raw_data(pd.read_csv(self.path, na_values="X"))
+
+    def peakmem_load_raw_data(self, n_rows):
+        load_raw_data(self.path)
+
+    def time_load_raw_data(self, n_rows):
+        load_raw_data(self.path)
+
+
+class ProcessRawData:
+    params = ([50, 1_000], [5 * 52, 10 * 52])
+    param_names = ["n_series", "n_periods"]
+    timeout = 300
+
+    def setup(self, n_series, n_periods):
+        self.raw_df = make_raw_data(n_series, n_periods)
+
+    def time_process_raw_data(self, n_series, n_periods):
+        process_raw_data(
+            self.raw_df, start_date="2010-01-01", end_date="2030-01-01", drop_regions=[]
+        )
+
+    def peakmem_process_raw_data(self, n_series, n_periods):
+        self.time_process_raw_data(n_series, n_periods)
@@ -0,0 +1,38 @@
+"""Benchmarks for the per-series sktime panel forecaster"""
+import numpy as np
+from sktime.forecasting.naive import NaiveForecaster
+from dsf_utils.models import SktimePanelForecaster
+from dsf_utils.panel import PanelFrame
+from benchmarks._panels import make_panel
+
+
+class SktimeNaiveFitPredict:
+    """One sktime model per series, the predict overhead grows with the series"""
+
+    params = ([100, 500], [13, 52])
+    param_names = ["n_series", "horizon"]
+    timeout = 600
+
+    def setup(self, n_series, horizon):
+        self.panel = PanelFrame(make_panel(n_series, 5 * 52))
+        self.fh = np.arange(horizon) + 1
+        self.forecaster = self._forecaster()
+        self.forecaster.fit(self.panel)
+
+    def _forecaster(self):
+        return SktimePanelForecaster(
+            forecaster=NaiveForecaster,
+            forecaster_kwargs={"strategy": "last", "sp": 52},
+        )
+
+    def time_fit(self, n_series, horizon):
+        self._forecaster().fit(self.panel)
+
+    def peakmem_fit(self, n_series, horizon):
+        self.time_fit(n_series, horizon)
+
+    def time_predict(self, n_series, horizon):
+        self.forecaster.predict(self.fh)
+
+    def peakmem_predict(self, n_series, horizon):
+        self.forecaster.predict(self.fh)
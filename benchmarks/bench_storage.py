@@ -0,0 +1,30 @@
+"""Benchmarks for the partitioned panel store"""
+import os
+import tempfile
+from dsf_utils.preprocessing import single_region_ts
+from dsf_utils.storage import PanelStore
+from benchmarks._panels import make_panel
+
+
+class SingleRegionRead:
+    params = [100, 1000]
+    param_names = ["n_series"]
+
+    def setup(self, n_series):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.panel_df = make_panel(n_series, 520)
+        self.store = PanelStore(os.path.join(self.tmp_dir.name, "store"))
+        self.store.write(self.panel_df)
+        self.region = self.panel_df["REGION"].iloc[0]
+
+    def teardown(self, n_series):
+        self.tmp_dir.cleanup()
+
+    def time_read_panel(self, n_series):
+        self.store.read_panel()
+
+    def time_single_region_store(self, n_series):
+        single_region_ts(self.store, self.region)
+
+    def peakmem_single_region_store(self, n_series):
+        single_region_ts(self.store, self.region)
@@ -0,0 +1,74 @@
+"""Helpers for running independent tasks in parallel"""
+import math
+from joblib import Parallel, delayed, effective_n_jobs
+
+
+def chunk_list(items: list, chunk_size: int) -> list:
+    """Split a list in consecutive chunks of at most chunk_size items"""
+    chunks = []
+    for start in range(0, len(items), chunk_size):
+        stop = start + chunk_size
+        chunks.append(items[start:stop])
+    return chunks
+
+
+def _run_chunk(func, chunk, kwargs):
+    return [func(*args, **kwargs) for args in chunk]
+
+
+def run_in_chunks(
+    func,
+    args_list: list,
+    n_jobs: int = None,
+    backend: str = "loky",
+    chunk_size: int = None,
+    **kwargs,
+) -> list:
+    """Run func over a list of arguments in parallel chunks
+
+    Consecutive arguments are batched in chunks so that many small tasks share
+    a single dispatch to the worker pool. Results are returned in the order of
+    args_list regardless of the order in which the chunks finish.
+
+    Parameters
+    ----------
+    func : callable
+        function to run, must be picklable for process based backends
+    args_list : list
+        list of tuples with the positional arguments of each call
+    n_jobs : int, optional
+        number of workers, None or 1 runs serially in the current process.
+        By default None
+    backend : str, optional
+        joblib backend, "loky" and "multiprocessing" use processes, "threading"
+        uses threads. By default "loky"
+    chunk_size : int, optional
+        number of calls per chunk, if None the calls are split in about four
+        chunks per worker. By default None
+    **kwargs
+        keyword arguments passed to every call of func
+
+    Returns
+    -------
+    list
+        the results of func for each item of args_list
+    """
+    args_list = list(args_list)
+    if n_jobs is None or effective_n_jobs(n_jobs) == 1 or len(args_list) <= 1:
+        return _run_chunk(func, args_list, kwargs)
+
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(len(args_list) / (4 * effective_n_jobs(n_jobs))))
+    chunks = chunk_list(args_list, chunk_size)
+    chunk_results = Parallel(n_jobs=n_jobs, backend=backend)(
+        delayed(_run_chunk)(func, chunk, kwargs) for chunk in chunks
+    )
+    return [result for chunk_result in chunk_results for result in chunk_result]
+
+
+def catch_errors(func, *args, **kwargs) -> tuple:
+    """Call func and return a (result, error) tuple instead of raising"""
+    try:
+        return func(*args, **kwargs), None
+    except Exception as error:
+        return None, error
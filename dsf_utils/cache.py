@@ -0,0 +1,264 @@
+"""On-disk cache of fitted forecasters and their predictions"""
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+def _forecaster_params(forecaster) -> dict:
+    """Constructor parameters of a forecaster"""
+    if hasattr(forecaster, "get_params"):
+        return forecaster.get_params(deep=False)
+    signature = inspect.signature(type(forecaster).__init__)
+    return {
+        name: getattr(forecaster, name, None)
+        for name in signature.parameters
+        if name != "self"
+    }
+
+
+def _qualname(obj) -> str:
+    return f"{obj.__module__}.{obj.__qualname__}"
+
+
+def _hash_param(hasher, value):
+    """Feed a forecaster parameter to hasher in a process-independent form
+
+    Nested estimators are hashed by class and constructor parameters,
+    recursively, and containers element by element. Functions are hashed by
+    name, code, defaults and captured values, so lambdas or closures over
+    other values get other keys. Values whose only representation is their
+    memory address can't be hashed stably and raise a ValueError.
+    """
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        hasher.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, np.generic):
+        _hash_param(hasher, value.item())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{type(value).__name__}[{len(value)}](".encode())
+        for item in value:
+            _hash_param(hasher, item)
+        hasher.update(b")")
+    elif isinstance(value, dict):
+        hasher.update(f"dict[{len(value)}](".encode())
+        for key in sorted(value, key=repr):
+            _hash_param(hasher, key)
+            _hash_param(hasher, value[key])
+        hasher.update(b")")
+    elif isinstance(value, (set, frozenset)):
+        _hash_param(hasher, sorted(value, key=repr))
+    elif isinstance(value, (np.ndarray, pd.Index, pd.Series, pd.DataFrame)):
+        hasher.update(f"{type(value).__name__}(".encode())
+        if isinstance(value, np.ndarray):
+            hasher.update(f"{value.dtype.str}{value.shape}".encode())
+            value = pd.Series(value.ravel())
+        _hash_data(hasher, value)
+        hasher.update(b")")
+    elif isinstance(
+        value,
+        (pd.Timestamp, pd.Timedelta, pd.Period, pd.DateOffset, np.datetime64),
+    ) or type(value).__module__ == "datetime":
+        hasher.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, type):
+        hasher.update(f"type:{_qualname(value)};".encode())
+    elif inspect.isbuiltin(value) or isinstance(value, np.ufunc):
+        hasher.update(f"function:{_qualname(value)};".encode())
+    elif inspect.isfunction(value):
+        hasher.update(f"function:{_qualname(value)};".encode())
+        # lambdas and closures share their qualified name, they differ by their
+        # code, defaults and captured values
+        _hash_code(hasher, value.__code__)
+        _hash_param(hasher, value.__defaults__)
+        _hash_param(hasher, value.__kwdefaults__)
+        captured = [_cell_contents(cell) for cell in value.__closure__ or ()]
+        # a recursive nested function captures itself
+        _hash_param(hasher, [c if c is not value else "<self>" for c in captured])
+    elif isinstance(value, functools.partial):
+        hasher.update(b"partial(")
+        _hash_param(hasher, [value.func, value.args, value.keywords])
+        hasher.update(b")")
+    else:
+        hasher.update(f"object:{_qualname(type(value))}(".encode())
+        _hash_param(hasher, _nested_params(value))
+        hasher.update(b")")
+
+
+def _hash_code(hasher, code):
+    hasher.update(code.co_code)
+    _hash_param(hasher, code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            _hash_code(hasher, const)
+        elif _is_constant(const) or isinstance(const, (tuple, frozenset)):
+            _hash_param(hasher, const)
+        else:
+            # Ellipsis and complex literals
+            hasher.update(f"{const!r};".encode())
+
+
+def _is_constant(value) -> bool:
+    return value is None or isinstance(value, (bool, int, float, str, bytes))
+
+
+def _cell_contents(cell):
+    try:
+        return cell.cell_contents
+    except ValueError:
+        # a free variable not assigned yet
+        return None
+
+
+def _nested_params(value) -> dict:
+    """Constructor parameters of a nested estimator or object"""
+    if hasattr(value, "get_params"):
+        return _forecaster_params(value)
+    signature = inspect.signature(type(value).__init__)
+    names = [
+        name
+        for name, param in signature.parameters.items()
+        if name != "self"
+        and param.kind not in (param.VAR_POSITIONAL, param.VAR_KEYWORD)
+    ]
+    if type(value).__init__ is object.__init__ or any(
+        not hasattr(value, name) for name in names
+    ):
+        raise ValueError(
+            f"Can't build a cache key from the parameter {value!r}: the "
+            f"constructor parameters of {type(value).__name__} are not attributes "
+            "of the object, so it has no stable representation"
+        )
+    return {name: getattr(value, name) for name in names}
+
+
+def _hash_data(hasher, data):
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        names = data.columns if isinstance(data, pd.DataFrame) else data.name
+        hasher.update(repr(names).encode())
+        hasher.update(repr(data.index.dtype).encode())
+        hasher.update(pd.util.hash_pandas_object(data, index=True).to_numpy())
+    else:
+        hasher.update(pickle.dumps(data))
+
+
+def _fh_token(fh) -> str:
+    if isinstance(fh, (list, tuple, np.ndarray)):
+        return repr(np.asarray(fh).tolist())
+    return repr(fh)
+
+
+class FitCache:
+    """Content-addressed on-disk cache of fitted forecasters
+
+    Entries are keyed by a hash of the class and constructor parameters of the
+    forecaster, the training data and the forecasting horizon, so a change in
+    any of them is a cache miss. When the size of the cache directory exceeds
+    max_size_bytes the least recently used entries are removed.
+
+    Parameters
+    ----------
+    cache_dir : str
+        directory of the cache, created if it doesn't exist
+    max_size_bytes : int, optional
+        size limit of the cache directory. By default 1GB
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = 2**30):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, forecaster, train_data, fh) -> str:
+        """Hash of a forecaster, its training data and forecasting horizon
+
+        The hash is the same in every process: nested estimators are hashed by
+        their constructor parameters, not their repr. A parameter without a
+        stable representation raises a ValueError.
+        """
+        hasher = hashlib.sha256()
+        forecaster_class = type(forecaster)
+        hasher.update(
+            f"{forecaster_class.__module__}.{forecaster_class.__qualname__}".encode()
+        )
+        _hash_param(hasher, _forecaster_params(forecaster))
+        _hash_data(hasher, train_data)
+        hasher.update(_fh_token(fh).encode())
+        return hasher.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """Cached (fitted forecaster, predictions) tuple or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            # the modification time is the last access time of the LRU policy
+            os.utime(path)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        return entry
+
+    def put(self, key, forecaster, y_pred):
+        """Store a fitted forecaster and its predictions"""
+        # write to a temporary file first so readers never see partial entries
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((forecaster, y_pred), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pkl"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def fit_predict(self, forecaster, train_data, fh) -> tuple:
+        """Fitted forecaster and predictions, from the cache if available
+
+        On a miss the forecaster is fitted with fit(train_data, fh=fh), its
+        predict(fh) is stored and both are returned.
+
+        Returns
+        -------
+        tuple
+            (fitted forecaster, predictions, cache hit flag)
+        """
+        key = self.key(forecaster, train_data, fh)
+        entry = self.get(key)
+        if entry is not None:
+            return entry[0], entry[1], True
+        forecaster.fit(train_data, fh=fh)
+        y_pred = forecaster.predict(fh)
+        self.put(key, forecaster, y_pred)
+        return forecaster, y_pred, False
+
+    def clear(self):
+        """Remove all the entries of the cache"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.cache_dir, name))
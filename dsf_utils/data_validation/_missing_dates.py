@@ -1,4 +1,7 @@
+import numpy as np
 import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import Tick
 from dsf_utils.data_validation._utils import ts_min_max_dates
 from typing import Union
 
@@ -50,6 +53,51 @@ def missing_dates(
     return set(missing)
 
 
+def _date_code(date, unit) -> int:
+    return pd.Timestamp(date).to_datetime64().astype(f"M8[{unit}]").astype(np.int64)
+
+
+def _grid_codes(dates, group_codes, group_min, group_max, offset):
+    """Integer position of every date on the frequency grid of its series
+
+    Returns the codes of the dates (-1 for dates that are not on the grid), the
+    first and last code of each series and a function mapping (group, code)
+    back to dates.
+    """
+    dates_ns = dates.asi8
+    n_groups = len(group_min)
+    if isinstance(offset, Tick):
+        # fixed frequencies, the grid of each series starts at its min date
+        step = pd.Timedelta(offset).to_timedelta64().astype(f"m8[{dates.unit}]")
+        step = step.astype(np.int64)
+        relative = dates_ns - group_min[group_codes]
+        codes = np.where(relative % step == 0, relative // step, -1)
+        first = np.zeros(n_groups, dtype=np.int64)
+        last = (group_max - group_min) // step
+
+        def to_dates(groups, missing_codes):
+            return pd.DatetimeIndex(
+                (group_min[groups] + missing_codes * step).astype(f"M8[{dates.unit}]")
+            )
+
+    else:
+        # anchored frequencies, every series is on the same panel-wide grid
+        grid = pd.date_range(
+            start=pd.Timestamp(group_min.min(), unit=dates.unit),
+            end=pd.Timestamp(group_max.max(), unit=dates.unit),
+            freq=offset,
+            unit=dates.unit,
+        )
+        codes = grid.get_indexer(dates)
+        first = np.searchsorted(grid.asi8, group_min, side="left")
+        last = np.searchsorted(grid.asi8, group_max, side="right") - 1
+
+        def to_dates(groups, missing_codes):
+            return grid[missing_codes]
+
+    return codes, first, np.maximum(last, first - 1), to_dates
+
+
 def panel_missing_dates(
     panel_df: pd.DataFrame,
     freq: str,
@@ -57,12 +105,17 @@ def panel_missing_dates(
     id_cols: list,
     start_date: Union[str, pd.Timestamp] = None,
     end_date: Union[str, pd.Timestamp] = None,
-) -> dict:
+    as_dict: bool = False,
+) -> Union[pd.DataFrame, dict]:
     """Missing dates for panel data
 
     Returns the missing dates between the min and max date for each of the time
     series in a panel dataframe.
 
+    The dates of every series are mapped to integer positions on the frequency
+    grid and the gaps of all the series are found in one pass over these
+    positions, without a loop over the series.
+
     Parameters
     ----------
     panel_df : pd.DataFrame
@@ -82,22 +135,67 @@ def panel_missing_dates(
     end_date : Union[str, pd.Timestamp]
         if not None, the function returns missing dates starting from end_date.
         By default None
+    as_dict : bool
+        if True, returns the missing dates as a dictionary. By default False
 
     Returns
     -------
-    dict
-        dictionary of the form:
+    Union[pd.DataFrame, dict]
+        long-format dataframe with the id_cols and a missing_date column, or if
+        as_dict is True a dictionary of the form:
             {[id_col1, id_col2, ... ]: {2020-01-01, 2020-02-07}}
     """
-    panel_df = panel_df.copy()
+    _id_cols = [id_cols] if isinstance(id_cols, str) else list(id_cols)
+    dates = pd.DatetimeIndex(
+        panel_df[date_col] if date_col is not None else panel_df.index
+    )
+    grouped = panel_df.groupby(_id_cols, sort=True, observed=True)
+    group_codes = grouped.ngroup().to_numpy()
+    group_keys = grouped.size().index
 
-    missing_dict = {}
-    for key, ts in panel_df.groupby(id_cols, as_index=False):
-        missing_set = missing_dates(
-            ts, freq=freq, date_col=date_col, start_date=start_date, end_date=end_date
-        )
+    group_dates = pd.DataFrame({"group": group_codes, "date": dates.asi8})
+    if group_dates.duplicated().any():
+        raise ValueError("Time series has duplicated dates")
+
+    date_range = group_dates.groupby("group")["date"].agg(["min", "max"])
+    group_min = date_range["min"].to_numpy(copy=True)
+    group_max = date_range["max"].to_numpy(copy=True)
+    if start_date is not None:
+        group_min[:] = _date_code(start_date, dates.unit)
+    if end_date is not None:
+        group_max[:] = _date_code(end_date, dates.unit)
 
-        if len(missing_set) > 0:
-            missing_dict[key] = missing_set
+    codes, first, last, to_dates = _grid_codes(
+        dates, group_codes, group_min, group_max, to_offset(freq)
+    )
+
+    # mark the observed codes on a flat grid holding the [first, last] codes of
+    # every series one after the other, the unmarked cells are the missing dates
+    grid_lengths = last - first + 1
+    grid_offsets = np.cumsum(grid_lengths) - grid_lengths
+    in_bounds = (codes >= first[group_codes]) & (codes <= last[group_codes])
+    observed_groups = group_codes[in_bounds]
+    observed = np.zeros(grid_lengths.sum(), dtype=bool)
+    observed[
+        grid_offsets[observed_groups] + codes[in_bounds] - first[observed_groups]
+    ] = True
+
+    missing_cells = np.flatnonzero(~observed)
+    missing_groups = np.searchsorted(grid_offsets, missing_cells, side="right") - 1
+    missing_codes = missing_cells - grid_offsets[missing_groups] + first[missing_groups]
+
+    missing_df = pd.DataFrame(
+        {
+            col: group_keys.get_level_values(i)[missing_groups]
+            for i, col in enumerate(_id_cols)
+        }
+    )
+    missing_df["missing_date"] = to_dates(missing_groups, missing_codes)
 
+    if not as_dict:
+        return missing_df
+
+    missing_dict = {}
+    for key, missing in missing_df.groupby(id_cols, sort=True, observed=True):
+        missing_dict[key] = set(missing["missing_date"])
     return missing_dict
@@ -1,7 +1,7 @@
 """Evaluation Functions"""
+import time
 import pandas as pd
 import numpy as np
-from sktime.forecasting.model_evaluation import evaluate
 from sktime.forecasting.model_selection import (
     CutoffSplitter,
     SlidingWindowSplitter,
@@ -10,7 +10,131 @@ from sktime.forecasting.model_selection import (
 )
 from typing import Union
 from IPython.display import display
+from contextlib import nullcontext
 from copy import deepcopy
+from dsf_utils.panel import as_panel_frame
+from dsf_utils._parallel import run_in_chunks
+from dsf_utils.cache import FitCache
+from dsf_utils.metrics import panel_metric
+from dsf_utils.profiling import Profiler, current_profiler, stage
+
+
+def _evaluate_cell(
+    forecaster, y_train, y_test, fh, metrics_dict, cache=None, profile=False
+) -> tuple:
+    """Fit a forecaster once and score the predictions with every metric
+
+    Returns the rows of the results and, if profile, the profiler records of
+    the fit, predict and score stages. The cell has its own profiler so the
+    records come back from parallel workers too.
+    """
+    _forecaster = deepcopy(forecaster)
+    profiler = Profiler(propagate=False) if profile else nullcontext()
+    cutoff = y_train.index[-1]
+    with profiler, stage("cutoff", cutoff=cutoff):
+        start = time.perf_counter()
+        if cache is not None:
+            # fit and predict times are those of the cache lookup on a hit
+            with stage("fit_predict"):
+                _forecaster, y_pred, _ = cache.fit_predict(_forecaster, y_train, fh)
+            fit_time = time.perf_counter() - start
+            pred_time = 0.0
+        else:
+            with stage("fit"):
+                _forecaster.fit(y_train, fh=fh)
+            fit_time = time.perf_counter() - start
+            start = time.perf_counter()
+            with stage("predict"):
+                y_pred = _forecaster.predict(fh)
+            pred_time = time.perf_counter() - start
+
+        rows = []
+        for metric_name, metric in metrics_dict.items():
+            with stage("score", Metric=metric_name):
+                score = metric(y_test, y_pred, y_train=y_train)
+            rows.append(
+                {
+                    "Score": score,
+                    "fit_time": fit_time,
+                    "pred_time": pred_time,
+                    "len_train_window": len(y_train),
+                    "cutoff": cutoff,
+                    "y_train": y_train,
+                    "y_test": y_test,
+                    "y_pred": y_pred,
+                    "Metric": metric_name,
+                }
+            )
+
+    return rows, profiler.records if profile else []
+
+
+def _evaluate_grid(
+    time_series: pd.Series,
+    cells: list,
+    metrics_dict: dict,
+    n_jobs: int = None,
+    backend: str = "loky",
+    cache: FitCache = None,
+    profile: bool = False,
+):
+    """Evaluate a list of (forecaster name, forecaster, cv) cells
+
+    Every split of a cell is fitted once and scored with all the metrics, the
+    splits are run in a pool of n_jobs workers. If a cache is given, fitted
+    forecasters and predictions are reused from it. If profile, the stages of
+    every split are profiled and returned in a second frame, they are also
+    passed to the active profiler if there is one.
+    """
+    outer_profiler = current_profiler()
+    names, args_list = [], []
+    for fcaster_name, forecaster, cv in cells:
+        for train, test in cv.split(time_series):
+            names.append(fcaster_name)
+            args_list.append(
+                (
+                    forecaster,
+                    time_series.iloc[train],
+                    time_series.iloc[test],
+                    cv.fh,
+                    metrics_dict,
+                )
+            )
+
+    cell_results = run_in_chunks(
+        _evaluate_cell,
+        args_list,
+        n_jobs=n_jobs,
+        backend=backend,
+        cache=cache,
+        profile=profile or outer_profiler is not None,
+    )
+    rows = [
+        {**row, "Forecaster": fcaster_name}
+        for fcaster_name, (cell_rows, _) in zip(names, cell_results)
+        for row in cell_rows
+    ]
+    profiler = Profiler(trace_memory=False)
+    for fcaster_name, (_, records) in zip(names, cell_results):
+        profiler.extend(records, Forecaster=fcaster_name)
+    if outer_profiler is not None:
+        outer_profiler.extend(profiler.records)
+    columns = [
+        "Score",
+        "fit_time",
+        "pred_time",
+        "len_train_window",
+        "cutoff",
+        "y_train",
+        "y_test",
+        "y_pred",
+        "Forecaster",
+        "Metric",
+    ]
+    results = pd.DataFrame(rows, columns=columns)
+    if profile:
+        return results, profiler.to_frame()
+    return results
 
 
 def evaluate_forecasters_on_cutoffs(
@@ -20,31 +144,29 @@ def evaluate_forecasters_on_cutoffs(
     metrics_dict: dict,
     fh: np.array = np.arange(3) + 1,
     window_length: int = 5 * 52,
-) -> pd.DataFrame:
-    _df_list = []
+    n_jobs: int = None,
+    backend: str = "loky",
+    cache: FitCache = None,
+    profile: bool = False,
+):
+    cells = []
     for cutoff in cutoffs:
-        _ts = time_series.copy()
+        cv = CutoffSplitter(
+            cutoffs=np.array([cutoff]),
+            fh=fh,
+            window_length=window_length,
+        )
         for fcaster_name, forecaster in forecasters_dict.items():
-            for metric_name, metric in metrics_dict.items():
-                _forecaster = deepcopy(forecaster)
-                cv = CutoffSplitter(
-                    cutoffs=np.array([cutoff]),
-                    fh=fh,
-                    window_length=window_length,
-                )
-                _df = evaluate(
-                    forecaster=_forecaster,
-                    y=_ts,
-                    cv=cv,
-                    strategy="refit",
-                    return_data=True,
-                    scoring=metric,
-                )
-                _df["Forecaster"] = fcaster_name
-                _df["Metric"] = metric_name
-                _df = _df.rename(columns={f"test_{metric.name}": "Score"})
-                _df_list.append(_df)
-    return pd.concat(_df_list)
+            cells.append((fcaster_name, forecaster, cv))
+    return _evaluate_grid(
+        time_series,
+        cells,
+        metrics_dict,
+        n_jobs=n_jobs,
+        backend=backend,
+        cache=cache,
+        profile=profile,
+    )
 
 
 def evaluate_forecasters(
@@ -57,26 +179,30 @@ def evaluate_forecasters(
     ],
     forecasters_dict: dict,
     metrics_dict: dict,
-) -> pd.DataFrame:
-    _df_list = []
-    _ts = time_series.copy()
-    for fcaster_name, forecaster in forecasters_dict.items():
-        for metric_name, metric in metrics_dict.items():
-            _forecaster = deepcopy(forecaster)
-            cv = deepcopy(cv)
-            _df = evaluate(
-                forecaster=_forecaster,
-                y=_ts,
-                cv=cv,
-                strategy="refit",
-                return_data=True,
-                scoring=metric,
-            )
-            _df["Forecaster"] = fcaster_name
-            _df["Metric"] = metric_name
-            _df = _df.rename(columns={f"test_{metric.name}": "Score"})
-            _df_list.append(_df)
-    return pd.concat(_df_list)
+    n_jobs: int = None,
+    backend: str = "loky",
+    cache: FitCache = None,
+    profile: bool = False,
+):
+    """Evaluate forecasters on the splits of a cv
+
+    Every split is fitted once per forecaster and scored with all the metrics.
+    With profile=True the wall time and peak memory of the fit, predict and
+    score stages of every split are returned in a second frame.
+    """
+    cells = [
+        (fcaster_name, forecaster, cv)
+        for fcaster_name, forecaster in forecasters_dict.items()
+    ]
+    return _evaluate_grid(
+        time_series,
+        cells,
+        metrics_dict,
+        n_jobs=n_jobs,
+        backend=backend,
+        cache=cache,
+        profile=profile,
+    )
 
 
 def display_results(df, axis=0):
@@ -93,6 +219,56 @@ def display_results(df, axis=0):
     display(results)
 
 
+def _panel_scores(metric, y_test, y_pred, y_train) -> np.ndarray:
+    """Score of every series from (series, date) arrays
+
+    Series with complete windows are scored in a single call of the metric
+    with one column per series, the rest are scored one by one on their
+    observed dates.
+    """
+    _metric = deepcopy(metric)
+    _metric.multioutput = "raw_values"
+    scores = np.full(len(y_test), np.nan)
+    complete = ~(
+        np.isnan(y_test).any(axis=1)
+        | np.isnan(y_pred).any(axis=1)
+        | np.isnan(y_train).any(axis=1)
+    )
+    if complete.any():
+        scores[complete] = _metric(
+            y_true=pd.DataFrame(y_test[complete].T),
+            y_pred=pd.DataFrame(y_pred[complete].T),
+            y_train=pd.DataFrame(y_train[complete].T),
+        )
+    for i in np.flatnonzero(~complete):
+        observed = ~np.isnan(y_test[i]) & ~np.isnan(y_pred[i])
+        train = y_train[i][~np.isnan(y_train[i])]
+        if observed.any() and len(train) > 0:
+            scores[i] = metric(
+                y_true=pd.Series(y_test[i][observed]),
+                y_pred=pd.Series(y_pred[i][observed]),
+                y_train=pd.Series(train),
+            )
+    return scores
+
+
+def _wide_predictions(pred_df, panel_index, ts_id_col, start, end) -> np.ndarray:
+    """Predictions between start and end as a (series, date) array"""
+    start_ordinal = pd.Period(start).ordinal
+    n_dates = pd.Period(end).ordinal - start_ordinal + 1
+    values = np.full((len(panel_index), n_dates), np.nan)
+    series_codes = panel_index.ts_ids.get_indexer(pred_df[ts_id_col])
+    dates = pred_df.index
+    if not isinstance(dates, pd.PeriodIndex):
+        dates = pd.PeriodIndex(dates, freq=panel_index.period_dtype.freq)
+    positions = dates.asi8 - start_ordinal
+    in_window = (series_codes >= 0) & (positions >= 0) & (positions < n_dates)
+    values[series_codes[in_window], positions[in_window]] = pred_df["y_pred"].to_numpy(
+        dtype=np.float64
+    )[in_window]
+    return values
+
+
 def evaluate_panel_forecaster_on_cutoffs(
     panel_df: pd.DataFrame,
     cutoffs: list,
@@ -103,43 +279,95 @@ def evaluate_panel_forecaster_on_cutoffs(
     freq="W-SUN",
     ts_id_col="REGION",
     target="ILITOTAL",
-) -> pd.DataFrame:
-    _panel_df = panel_df.copy()
-    _panel_df = _panel_df.sort_values(by=[ts_id_col]).sort_index()
-    ts_list = list(panel_df[ts_id_col].unique())
+    cache: FitCache = None,
+    profile: bool = False,
+):
+    """Evaluate a panel forecaster on every series and cutoff
 
-    results = pd.DataFrame()
-    for cutoff in cutoffs:
-        _forecaster = deepcopy(forecaster)
-        cutoff = pd.Period(cutoff, freq=freq) + 1
-        train_df = _panel_df[
-            (_panel_df.index <= cutoff) & (_panel_df.index > cutoff - window_length)
-        ].sort_index()
-        min_test_date = cutoff + int(np.min(fh))
-        max_test_date = cutoff + int(np.max(fh))
-        test_df = _panel_df[
-            (_panel_df.index >= min_test_date) & (_panel_df.index <= max_test_date)
-        ]
-        # if forecaster doesn't need fh in fit fh will be ignored.
-        _forecaster.fit(train_df, fh=fh)
-        pred_df = _forecaster.predict(fh=fh)
-
-        # loop over regions to get region level metrics and y_preds
-        for ts in ts_list:
-            _pred = pred_df[pred_df[ts_id_col] == ts]["y_pred"]
-            _test = test_df[test_df[ts_id_col] == ts][target]
-            _train = train_df[train_df[ts_id_col] == ts][target].sort_index()
-            score = metric(y_true=_test, y_pred=_pred, y_train=_train)
-            results = results.append(
-                {
-                    ts_id_col: ts,
-                    "cutoff": cutoff,
-                    "Metric": metric.name,
-                    "Score": score,
-                    "y_test": _test,
-                    "y_pred": _pred,
-                },
-                ignore_index=True,
+    The predictions of a series are matched to its actuals by date, and every
+    series is scored on the test dates where both are observed. Before, they
+    were matched by position, which gives other scores for series with
+    missing weeks (e.g. a missing last training week shifts the predictions
+    of the series by a week), and raised on a length mismatch.
+
+    With profile=True the wall time and peak memory of the stages of every
+    cutoff (fit, with the features and per horizon or per series fits of the
+    forecaster, predict and score) are returned in a second frame.
+
+    Returns
+    -------
+    pd.DataFrame
+        a row per series and cutoff with the ts_id_col, "cutoff", "Metric" and
+        "Score" columns. The metrics without a kernel in dsf_utils.metrics are
+        scored with the same date alignment. The "y_test" and "y_pred" columns
+        hold a Series per row indexed by all the test dates, cutoff + min(fh)
+        to cutoff + max(fh), with NaN for the dates without an actual or a
+        prediction, rather than the rows of the series only.
+    """
+    # the panel is sorted by (id, period) once and every window is served as a
+    # contiguous block of rows per series
+    panel_index = as_panel_frame(panel_df, ts_id_col, target, freq)
+    ts_ids = panel_index.ts_ids
+    # the common sktime metrics have a vectorized equivalent in dsf_utils.metrics
+    metric_kernel = panel_metric(metric)
+
+    results = []
+    profiler = Profiler() if profile else nullcontext()
+    with profiler:
+        for cutoff in cutoffs:
+            _forecaster = deepcopy(forecaster)
+            cutoff = pd.Period(cutoff, freq=freq) + 1
+            train_start = cutoff - window_length + 1
+            min_test_date = cutoff + int(np.min(fh))
+            max_test_date = cutoff + int(np.max(fh))
+            with stage("cutoff", cutoff=cutoff):
+                train_df = panel_index.window(train_start, cutoff)
+                # if forecaster doesn't need fh in fit fh will be ignored.
+                if cache is not None:
+                    with stage("fit_predict"):
+                        _forecaster, pred_df, _ = cache.fit_predict(
+                            _forecaster, train_df, fh
+                        )
+                else:
+                    with stage("fit"):
+                        _forecaster.fit(train_df, fh=fh)
+                    with stage("predict"):
+                        pred_df = _forecaster.predict(fh=fh)
+
+                # all the series are scored with one call of the metric
+                with stage("score", Metric=metric.name):
+                    y_train = panel_index.wide_values(target, train_start, cutoff)
+                    y_test = panel_index.wide_values(
+                        target, min_test_date, max_test_date
+                    )
+                    y_pred = _wide_predictions(
+                        pred_df, panel_index, ts_id_col, min_test_date, max_test_date
+                    )
+                    if metric_kernel is not None:
+                        scores = metric_kernel(y_test, y_pred, y_train)
+                    else:
+                        scores = _panel_scores(metric, y_test, y_pred, y_train)
+
+            test_dates = pd.period_range(min_test_date, max_test_date, freq=freq)
+            results.append(
+                pd.DataFrame(
+                    {
+                        ts_id_col: ts_ids,
+                        "cutoff": cutoff,
+                        "Metric": metric.name,
+                        "Score": scores,
+                        "y_test": [
+                            pd.Series(y, index=test_dates, name=target) for y in y_test
+                        ],
+                        "y_pred": [
+                            pd.Series(y, index=test_dates, name="y_pred")
+                            for y in y_pred
+                        ],
+                    }
+                )
             )
 
+    results = pd.concat(results, ignore_index=True)
+    if profile:
+        return results, profiler.to_frame()
     return results
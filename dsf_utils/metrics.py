@@ -0,0 +1,164 @@
+"""Forecasting metrics of many series at once
+
+The metrics take (series, date) arrays with one row per series, e.g. the
+series of a panel or the cutoffs of a series, and return one score per row.
+Missing values are ignored: a row is scored on the dates where both y_true and
+y_pred are observed and its naive scale on the observed training values. The
+formulas follow the sktime metrics with multioutput="raw_values".
+"""
+import numpy as np
+from sktime.performance_metrics.forecasting import (
+    MeanAbsoluteError,
+    MeanAbsolutePercentageError,
+    MeanAbsoluteScaledError,
+    MeanSquaredError,
+    MeanSquaredScaledError,
+)
+
+EPS = np.finfo(np.float64).eps
+
+
+def _as_2d(values) -> np.ndarray:
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+
+def _row_mean(errors, observed) -> np.ndarray:
+    """Mean of the observed errors of each row, NaN for rows without any"""
+    counts = observed.sum(axis=1)
+    sums = np.where(observed, errors, 0.0).sum(axis=1)
+    means = np.full(len(errors), np.nan)
+    np.divide(sums, counts, out=means, where=counts > 0)
+    return means
+
+
+def _errors(y_true, y_pred) -> tuple:
+    y_true, y_pred = _as_2d(y_true), _as_2d(y_pred)
+    observed = ~(np.isnan(y_true) | np.isnan(y_pred))
+    return y_true, y_pred, observed
+
+
+def _left_justify(values) -> tuple:
+    """Observed values of each row moved to the start, and their counts"""
+    missing = np.isnan(values)
+    order = np.argsort(missing, axis=1, kind="stable")
+    return np.take_along_axis(values, order, axis=1), (~missing).sum(axis=1)
+
+
+def naive_scale(y_train, sp: int = 1, squared: bool = False) -> np.ndarray:
+    """In-sample error of the seasonal naive forecast of each row
+
+    The denominator of the scaled errors, the mean absolute (or squared)
+    difference of the training values sp steps apart. Missing training values
+    are dropped first, as sktime would do on the observed values only. The
+    scale only depends on the training window, so it can be computed once and
+    passed to every scaled metric of the window.
+
+    Parameters
+    ----------
+    y_train : array-like
+        (series, date) training values
+    sp : int, optional
+        seasonal periodicity of the naive forecast. By default 1
+    squared : bool, optional
+        squared instead of absolute differences. By default False
+
+    Returns
+    -------
+    np.ndarray
+        scale of each row, NaN for rows with at most sp observed values
+    """
+    y_train, counts = _left_justify(_as_2d(y_train))
+    differences = y_train[:, sp:] - y_train[:, :-sp]
+    differences = differences**2 if squared else np.abs(differences)
+    observed = np.arange(sp, y_train.shape[1]) < counts[:, np.newaxis]
+    return _row_mean(differences, observed)
+
+
+def mean_absolute_error(y_true, y_pred) -> np.ndarray:
+    """MAE of each row"""
+    y_true, y_pred, observed = _errors(y_true, y_pred)
+    return _row_mean(np.abs(y_true - y_pred), observed)
+
+
+def mean_squared_error(y_true, y_pred, square_root: bool = False) -> np.ndarray:
+    """MSE, or RMSE with square_root, of each row"""
+    y_true, y_pred, observed = _errors(y_true, y_pred)
+    mse = _row_mean((y_true - y_pred) ** 2, observed)
+    return np.sqrt(mse) if square_root else mse
+
+
+def mean_absolute_percentage_error(
+    y_true, y_pred, symmetric: bool = False, relative_to="y_true", eps=None
+) -> np.ndarray:
+    """MAPE, or sMAPE with symmetric, of each row as a fraction"""
+    eps = EPS if eps is None else eps
+    y_true, y_pred, observed = _errors(y_true, y_pred)
+    if symmetric:
+        denominator = np.maximum(np.abs(y_true) + np.abs(y_pred), eps) / 2
+    elif relative_to == "y_pred":
+        denominator = np.maximum(np.abs(y_pred), eps)
+    else:
+        denominator = np.maximum(np.abs(y_true), eps)
+    errors = np.abs(y_true - y_pred) / denominator
+    return _row_mean(errors, observed)
+
+
+def mean_absolute_scaled_error(
+    y_true, y_pred, y_train=None, sp: int = 1, scale=None, eps=None
+) -> np.ndarray:
+    """MASE of each row
+
+    Either y_train or the precomputed naive_scale(y_train, sp) is required.
+    """
+    eps = EPS if eps is None else eps
+    if scale is None:
+        scale = naive_scale(y_train, sp=sp)
+    return mean_absolute_error(y_true, y_pred) / np.maximum(scale, eps)
+
+
+def mean_squared_scaled_error(
+    y_true, y_pred, y_train=None, sp: int = 1, square_root: bool = False, scale=None
+) -> np.ndarray:
+    """MSSE, or RMSSE with square_root, of each row
+
+    Either y_train or the precomputed naive_scale(y_train, sp, squared=True) is
+    required.
+    """
+    if scale is None:
+        scale = naive_scale(y_train, sp=sp, squared=True)
+    msse = mean_squared_error(y_true, y_pred) / np.maximum(scale, EPS)
+    return np.sqrt(msse) if square_root else msse
+
+
+def panel_metric(metric):
+    """Vectorized equivalent of a sktime metric, None if there isn't one
+
+    Returns
+    -------
+    callable or None
+        function of (y_true, y_pred, y_train) arrays returning a score per row
+    """
+    params = metric.get_params()
+    if type(metric) is MeanAbsoluteScaledError:
+        return lambda y_true, y_pred, y_train: mean_absolute_scaled_error(
+            y_true, y_pred, y_train, sp=params["sp"], eps=params.get("eps")
+        )
+    if type(metric) is MeanSquaredScaledError:
+        return lambda y_true, y_pred, y_train: mean_squared_scaled_error(
+            y_true, y_pred, y_train, sp=params["sp"], square_root=params["square_root"]
+        )
+    if type(metric) is MeanAbsoluteError:
+        return lambda y_true, y_pred, y_train: mean_absolute_error(y_true, y_pred)
+    if type(metric) is MeanSquaredError:
+        return lambda y_true, y_pred, y_train: mean_squared_error(
+            y_true, y_pred, square_root=params["square_root"]
+        )
+    if type(metric) is MeanAbsolutePercentageError:
+        return lambda y_true, y_pred, y_train: mean_absolute_percentage_error(
+            y_true,
+            y_pred,
+            symmetric=params["symmetric"],
+            relative_to=params.get("relative_to", "y_true"),
+            eps=params.get("eps"),
+        )
+    return None
@@ -5,6 +5,7 @@ __all__ = [
     "DirectLGBMGlobalForecaster",
     "RecursiveLGBMGlobalForecaster",
     "SimpleAverageCombination",
+    "PanelBenchmarkForecaster",
 ]
 
 from dsf_utils.models._constant_value_forecaster import ConstantValueForecaster
@@ -14,3 +15,4 @@ from dsf_utils.models._global_forecaster import (
     RecursiveLGBMGlobalForecaster,
 )
 from dsf_utils.models._panel_ensemble import SimpleAverageCombination
+from dsf_utils.models._panel_benchmarks import PanelBenchmarkForecaster
@@ -0,0 +1,150 @@
+"""Calendar features of the global forecasters, looked up by period ordinal"""
+import numpy as np
+import pandas as pd
+from dsf_utils.preprocessing import _mmwr_year_start
+
+
+def calendar_feature_names(calendar_features: dict) -> list:
+    """Names of the calendar features enabled in calendar_features
+
+    The "year", "week" (ISO week) and "t" flags are True by default, the
+    "mmwr_week" flag False, "fourier" is the number of yearly sin / cos pairs
+    (0 by default) and "holidays" the holiday dates (None by default).
+    """
+    names = [
+        name
+        for name, flag in zip(
+            ["Year", "Week", "t"],
+            [
+                calendar_features.get("year", True),
+                calendar_features.get("week", True),
+                calendar_features.get("t", True),
+            ],
+        )
+        if flag
+    ]
+    if calendar_features.get("mmwr_week", False):
+        names.append("MMWRWeek")
+    for k in range(1, calendar_features.get("fourier", 0) + 1):
+        names += [f"FourierSin{k}", f"FourierCos{k}"]
+    if calendar_features.get("holidays") is not None:
+        names.append("Holiday")
+    return names
+
+
+def holiday_dates(holidays) -> pd.DatetimeIndex:
+    """Dates of a list of dates or of a pandas holiday calendar"""
+    if hasattr(holidays, "holidays"):
+        # AbstractHolidayCalendar, by default the dates from 1970 to 2200
+        return pd.DatetimeIndex(holidays.holidays())
+    return pd.DatetimeIndex(pd.to_datetime(list(holidays)))
+
+
+def mmwr_weeks(periods: pd.PeriodIndex) -> np.ndarray:
+    """MMWR week of the last Saturday of every period
+
+    The weekly periods of the panels end on Sundays, the MMWR (Sunday to
+    Saturday) week of a period is the one ending on its Saturday.
+    """
+    end_dates = periods.end_time.normalize()
+    saturdays = end_dates.to_numpy().astype("datetime64[D]") - (
+        (end_dates.dayofweek.to_numpy() - 5) % 7
+    ).astype("timedelta64[D]")
+    years = saturdays.astype("datetime64[Y]").astype(np.int64) + 1970
+    # the MMWR year of the last days of December can be the next one and of the
+    # first days of January the previous one
+    years += saturdays >= _mmwr_year_start(years + 1)
+    years -= saturdays < _mmwr_year_start(years)
+    return (saturdays - _mmwr_year_start(years)).astype(np.int64) // 7 + 1
+
+
+class CalendarTable:
+    """Lookup table of the calendar features by period ordinal
+
+    The features of a range of consecutive periods are computed once with
+    vectorized operations on their PeriodIndex, and the features of any rows
+    are then read from the table by their period ordinal. The range grows
+    when rows outside of it are looked up, e.g. the dates of the horizon in
+    the recursive predict.
+
+    Parameters
+    ----------
+    calendar_features : dict
+        features to build, see calendar_feature_names
+    period_dtype : pd.PeriodDtype
+        dtype of the periods of the panel
+    t_origin : int
+        ordinal of the period where the "t" feature is 0
+    """
+
+    def __init__(self, calendar_features: dict, period_dtype, t_origin: int):
+        self.calendar_features = calendar_features
+        self.period_dtype = period_dtype
+        self.t_origin = t_origin
+        self.names = calendar_feature_names(calendar_features)
+        holidays = calendar_features.get("holidays")
+        self._holiday_ordinals = None
+        if holidays is not None:
+            self._holiday_ordinals = np.unique(
+                holiday_dates(holidays).to_period(period_dtype.freq).asi8
+            )
+        self._start = None
+        self._values = np.empty((0, len(self.names)))
+
+    def __len__(self):
+        return len(self._values)
+
+    def _build(self, start: int, stop: int) -> np.ndarray:
+        """Features of the periods with ordinals start to stop - 1"""
+        ordinals = np.arange(start, stop, dtype=np.int64)
+        periods = pd.PeriodIndex(
+            pd.arrays.PeriodArray(ordinals, dtype=self.period_dtype)
+        )
+        columns = {}
+        if "Year" in self.names:
+            columns["Year"] = periods.year.to_numpy()
+        if "Week" in self.names:
+            columns["Week"] = periods.week.to_numpy()
+        if "t" in self.names:
+            columns["t"] = ordinals - self.t_origin
+        if "MMWRWeek" in self.names:
+            columns["MMWRWeek"] = mmwr_weeks(periods)
+        n_fourier = self.calendar_features.get("fourier", 0)
+        if n_fourier > 0:
+            start_times = periods.start_time
+            year_fraction = (start_times.dayofyear.to_numpy() - 1) / np.where(
+                start_times.is_leap_year, 366, 365
+            )
+            for k in range(1, n_fourier + 1):
+                columns[f"FourierSin{k}"] = np.sin(2 * np.pi * k * year_fraction)
+                columns[f"FourierCos{k}"] = np.cos(2 * np.pi * k * year_fraction)
+        if self._holiday_ordinals is not None:
+            columns["Holiday"] = np.isin(ordinals, self._holiday_ordinals)
+
+        values = np.empty((len(ordinals), len(self.names)), dtype=np.float64)
+        for i, name in enumerate(self.names):
+            values[:, i] = columns[name]
+        return values
+
+    def extend(self, start: int, stop: int):
+        """Make the table cover the ordinals start to stop - 1"""
+        if self._start is None:
+            self._start = start
+            self._values = self._build(start, max(start, stop))
+            return
+        end = self._start + len(self._values)
+        if start < self._start:
+            self._values = np.concatenate(
+                [self._build(start, self._start), self._values]
+            )
+            self._start = start
+        if stop > end:
+            self._values = np.concatenate([self._values, self._build(end, stop)])
+
+    def lookup(self, ordinals: np.ndarray) -> np.ndarray:
+        """Features of the rows with the given period ordinals, (rows, names)"""
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        if len(ordinals) == 0:
+            return np.empty((0, len(self.names)))
+        self.extend(int(ordinals.min()), int(ordinals.max()) + 1)
+        return self._values[ordinals - self._start]
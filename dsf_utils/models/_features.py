@@ -0,0 +1,347 @@
+"""Columnar feature engineering for the global forecasters"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from dsf_utils.models._calendar import CalendarTable, calendar_feature_names
+from dsf_utils.models._window_features import (
+    WindowState,
+    window_feature_names,
+    window_feature_values,
+)
+
+
+def panel_period_index(panel_df: pd.DataFrame, freq: str) -> pd.PeriodIndex:
+    """Index of a panel dataframe as a PeriodIndex"""
+    if isinstance(panel_df.index, pd.PeriodIndex):
+        return panel_df.index
+    return pd.PeriodIndex(panel_df.index, freq=freq)
+
+
+def lag_feature_names(target_col: str, lag_window_length: int) -> list:
+    """Names of the target and lag columns, in the order of the lag window"""
+    return [target_col] + [
+        f"{target_col}_lag{lag}" for lag in range(1, lag_window_length)
+    ]
+
+
+def shifted_target(series_codes: np.ndarray, y: np.ndarray, h_step: int) -> tuple:
+    """Rows with a target h_step rows ahead in the same series, and the targets"""
+    ahead = np.arange(len(y)) + h_step
+    in_range = ahead < len(y)
+    rows = np.flatnonzero(in_range)
+    same_series = series_codes[ahead[in_range]] == series_codes[rows]
+    rows = rows[same_series]
+    return rows, y[rows + h_step]
+
+
+class PanelFeatureEngine:
+    """Lag, calendar, window and id features of a panel as a single NumPy matrix
+
+    The panel is sorted once by (id, date) and the lag window of every row is
+    read from a strided view of the sorted target, so the feature matrix is
+    built without a groupby shift and a copy of the frame for every lag.
+
+    The feature columns are, in order: the columns of the panel other than the
+    id (the target replaced by lag 0 of the window), the lags 1 to
+    lag_window_length - 1, the calendar features, the window statistics of the
+    target and the encoded id. Rows with missing values in the lag window are
+    dropped, missing window statistics (e.g. a rolling window longer than the
+    history of the series) are left to LightGBM.
+
+    The window statistics are computed over the sorted target in O(rows), and
+    their running state at the end of every series is kept in window_state, so
+    update_transform and the recursive predict add values without going over
+    the windows again.
+
+    Parameters
+    ----------
+    ts_id_col : str
+        name of the time series id column
+    target_col : str
+        name of the target column
+    lag_window_length : int
+        number of values in the lag window, including the current value
+    calendar_features : dict
+        calendar features, flags for "year", "week", "t" and "mmwr_week", the
+        number of "fourier" terms and the "holidays", see
+        calendar_feature_names
+    cat_encoder : sklearn encoder
+        encoder for the time series id, fitted in fit_transform
+    freq : str
+        pandas period frequency of the panel
+    window_features : dict, optional
+        rolling mean and std windows, EWM smoothing factors and expanding mean
+        flag, see window_feature_names. By default None, no window statistics
+    """
+
+    def __init__(
+        self,
+        ts_id_col,
+        target_col,
+        lag_window_length,
+        calendar_features,
+        cat_encoder,
+        freq,
+        window_features=None,
+    ):
+        self.ts_id_col = ts_id_col
+        self.target_col = target_col
+        self.lag_window_length = lag_window_length
+        self.calendar_features = calendar_features
+        self.cat_encoder = cat_encoder
+        self.freq = freq
+        self.window_features = window_features
+
+    def _sort_panel(self, panel_df):
+        periods = panel_period_index(panel_df, self.freq)
+        series_codes, ts_ids = pd.factorize(panel_df[self.ts_id_col], sort=True)
+        self.period_dtype = periods.dtype
+        ordinals = periods.asi8
+        order = np.lexsort((ordinals, series_codes))
+        return series_codes[order], ordinals[order], order, np.asarray(ts_ids)
+
+    def _lag_window_rows(self, series_codes):
+        """Rows of the sorted panel with a full lag window inside their series"""
+        window = self.lag_window_length
+        if len(series_codes) < window:
+            return np.array([], dtype=np.int64)
+        window_ends = np.arange(window - 1, len(series_codes))
+        window_starts = window_ends - window + 1
+        same_series = series_codes[window_ends] == series_codes[window_starts]
+        return window_ends[same_series]
+
+    def _lag_features(self, y_sorted, other_sorted, rows):
+        """Feature matrix of the rows with the lag and other columns filled"""
+        X = np.empty((len(rows), len(self.feature_names)), dtype=np.float64)
+        # lag window of each row, read from a strided view of the sorted target
+        windows = sliding_window_view(y_sorted, self.lag_window_length)[:, ::-1]
+        n_other = len(self._other_cols)
+        lag_cols = slice(n_other, n_other + self.lag_window_length - 1)
+        X[:, lag_cols] = windows[rows - self.lag_window_length + 1, 1:]
+        for i, col in enumerate(self._other_cols):
+            if col == self.target_col:
+                X[:, i] = y_sorted[rows]
+            else:
+                X[:, i] = other_sorted[col][rows]
+
+        n_lag_cols = lag_cols.stop
+        keep = ~np.isnan(X[:, :n_lag_cols]).any(axis=1)
+        return X[keep], rows[keep]
+
+    def _store_tails(self, series_codes, ordinals, y_sorted, n_series):
+        """Last lag_window_length - 1 targets and the last period of each series"""
+        tail_length = self.lag_window_length - 1
+        counts = np.bincount(series_codes, minlength=n_series)
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        self._tails = np.full((n_series, tail_length), np.nan)
+        for k in range(tail_length):
+            positions = ends - tail_length + k
+            valid = positions >= starts
+            self._tails[valid, k] = y_sorted[positions[valid]]
+        self._last_ordinals = np.full(n_series, np.iinfo(np.int64).min)
+        has_rows = counts > 0
+        self._last_ordinals[has_rows] = ordinals[ends[has_rows] - 1]
+
+    def fit_transform(self, panel_df: pd.DataFrame, fit_encoder=True) -> np.ndarray:
+        """Build the feature matrix of a panel
+
+        Besides the returned matrix, the id, series code, period ordinal and
+        target of every row are stored in the ts_ids, series_codes, ordinals
+        and y attributes, in the same (id, date) order as the matrix. The
+        dtype of the periods is stored in period_dtype.
+
+        Parameters
+        ----------
+        panel_df : pd.DataFrame
+            panel with the id and target columns and a period index
+        fit_encoder : bool, optional
+            whether to fit cat_encoder on the ids of the panel, else it must
+            be fitted already, e.g. on the ids of all the chunks of a panel.
+            By default True
+
+        Returns
+        -------
+        np.ndarray
+            feature matrix with a column per name in feature_names
+        """
+        series_codes, ordinals, order, ts_ids = self._sort_panel(panel_df)
+        y_sorted = panel_df[self.target_col].to_numpy(dtype=np.float64)[order]
+        rows = self._lag_window_rows(series_codes)
+
+        self._other_cols = [c for c in panel_df.columns if c != self.ts_id_col]
+        lag_names = lag_feature_names(self.target_col, self.lag_window_length)
+        self._calendar_cols = calendar_feature_names(self.calendar_features)
+        self.feature_names = (
+            self._other_cols
+            + lag_names[1:]
+            + self._calendar_cols
+            + window_feature_names(self.target_col, self.window_features)
+            + [f"{self.ts_id_col}_encoded"]
+        )
+        other_sorted = {
+            col: panel_df[col].to_numpy(dtype=np.float64)[order]
+            for col in self._other_cols
+            if col != self.target_col
+        }
+        X, rows = self._lag_features(y_sorted, other_sorted, rows)
+
+        self.series_index = pd.Index(ts_ids)
+        self.series_codes = series_codes[rows]
+        self.ordinals = ordinals[rows]
+        self.ts_ids = ts_ids[self.series_codes]
+        self.y = y_sorted[rows]
+        self.new_rows = np.zeros(len(rows), dtype=bool)
+        self._t_origin = self.ordinals.min() if len(rows) > 0 else 0
+        self.calendar = CalendarTable(
+            self.calendar_features, self.period_dtype, self._t_origin
+        )
+        self._store_tails(series_codes, ordinals, y_sorted, len(ts_ids))
+        self._fill_calendar_features(X, self.ordinals)
+        self.window_state = None
+        if self.window_features:
+            values = window_feature_values(
+                y_sorted, series_codes, self.window_features
+            )
+            X[:, self._window_cols] = values[rows]
+            self.window_state = WindowState.from_sorted(
+                y_sorted, series_codes, len(ts_ids), self.window_features, values
+            )
+        if fit_encoder:
+            X[:, -1] = self.cat_encoder.fit_transform(self.ts_ids)
+        else:
+            X[:, -1] = self.cat_encoder.transform(self.ts_ids)
+
+        return X
+
+    def _sort_new_rows(self, new_df):
+        series_codes = self.series_index.get_indexer(new_df[self.ts_id_col])
+        if (series_codes < 0).any():
+            unseen = pd.unique(new_df[self.ts_id_col][series_codes < 0])
+            raise ValueError(f"Series not seen in fit: {list(unseen)}")
+        ordinals = panel_period_index(new_df, self.freq).asi8
+        order = np.lexsort((ordinals, series_codes))
+        series_codes, ordinals = series_codes[order], ordinals[order]
+        duplicated = (np.diff(series_codes) == 0) & (np.diff(ordinals) == 0)
+        if (ordinals <= self._last_ordinals[series_codes]).any() or duplicated.any():
+            raise ValueError(
+                "New rows must be unique and after the last date of their series"
+            )
+        return series_codes, ordinals, order
+
+    def update_transform(self, X: np.ndarray, new_df: pd.DataFrame) -> np.ndarray:
+        """Append the feature rows of new observations to a feature matrix
+
+        Only the lag windows of the new rows are built, from the last targets
+        of each series kept since fit_transform. The stored row attributes are
+        extended in the same (id, date) order as the returned matrix and the
+        rows added by this call are flagged in new_rows.
+
+        Parameters
+        ----------
+        X : np.ndarray
+            feature matrix returned by the previous fit_transform or
+            update_transform call
+        new_df : pd.DataFrame
+            new rows of series seen in fit_transform, with the same columns as
+            the panel, dated after the last date of their series
+
+        Returns
+        -------
+        np.ndarray
+            feature matrix with the new rows
+        """
+        new_codes, new_ordinals, order = self._sort_new_rows(new_df)
+        new_y = new_df[self.target_col].to_numpy(dtype=np.float64)[order]
+        present = np.unique(new_codes)
+        tail_length = self.lag_window_length - 1
+
+        # the tails of the updated series are placed before their new rows, so
+        # every new row has a full lag window within its series
+        codes = np.concatenate([np.repeat(present, tail_length), new_codes])
+        merge_order = np.argsort(codes, kind="stable")
+        codes = codes[merge_order]
+        y_sorted = np.concatenate([self._tails[present].ravel(), new_y])[merge_order]
+        is_new = np.concatenate(
+            [
+                np.zeros(len(present) * tail_length, dtype=bool),
+                np.ones_like(new_y, dtype=bool),
+            ]
+        )[merge_order]
+        positions = np.concatenate(
+            [np.full(len(present) * tail_length, -1), np.arange(len(new_y))]
+        )[merge_order]
+        other_sorted = {}
+        for col in self._other_cols:
+            if col == self.target_col:
+                continue
+            values = new_df[col].to_numpy(dtype=np.float64)[order]
+            other_sorted[col] = np.where(is_new, values[positions], np.nan)
+
+        rows = self._lag_window_rows(codes)
+        rows = rows[is_new[rows]]
+        X_new, rows = self._lag_features(y_sorted, other_sorted, rows)
+        new_row_codes = codes[rows]
+        new_row_ordinals = new_ordinals[positions[rows]]
+        self._fill_calendar_features(X_new, new_row_ordinals)
+        if self.window_state is not None:
+            # the statistics of all the new rows are pushed, including the
+            # rows dropped for missing lags, as fit_transform computes them
+            values = self.window_state.push_rows(new_y, new_codes)
+            X_new[:, self._window_cols] = values[positions[rows]]
+        X_new[:, -1] = self.cat_encoder.transform(
+            np.asarray(self.series_index)[new_row_codes]
+        )
+
+        self._store_new_tails(present, codes, y_sorted, new_codes, new_ordinals)
+
+        # both blocks are sorted by (id, date) and the new rows of a series are
+        # after its old rows, so the stable sort is a linear merge of two runs
+        merged = np.argsort(
+            np.concatenate([self.series_codes, new_row_codes]), kind="stable"
+        )
+        self.series_codes = np.concatenate([self.series_codes, new_row_codes])[merged]
+        self.ordinals = np.concatenate([self.ordinals, new_row_ordinals])[merged]
+        self.y = np.concatenate([self.y, y_sorted[rows]])[merged]
+        self.ts_ids = np.asarray(self.series_index)[self.series_codes]
+        self.new_rows = np.concatenate(
+            [np.zeros(len(X), dtype=bool), np.ones(len(X_new), dtype=bool)]
+        )[merged]
+        return np.concatenate([X, X_new])[merged]
+
+    def _store_new_tails(self, present, codes, y_sorted, new_codes, new_ordinals):
+        tail_length = self.lag_window_length - 1
+        ends = np.searchsorted(codes, present, side="right")
+        for k in range(tail_length):
+            self._tails[present, k] = y_sorted[ends - tail_length + k]
+        last_new = np.searchsorted(new_codes, present, side="right") - 1
+        self._last_ordinals[present] = new_ordinals[last_new]
+
+    def _fill_calendar_features(self, X, ordinals):
+        # the rows are joined by period ordinal to the calendar lookup table
+        if len(self._calendar_cols) == 0 or len(X) == 0:
+            return
+        start_col = len(self._other_cols) + self.lag_window_length - 1
+        calendar_cols = slice(start_col, start_col + len(self._calendar_cols))
+        X[:, calendar_cols] = self.calendar.lookup(ordinals)
+
+    @property
+    def _window_cols(self) -> slice:
+        """Columns of the window statistics, before the encoded id"""
+        n_window = len(window_feature_names(self.target_col, self.window_features))
+        return slice(len(self.feature_names) - 1 - n_window, -1)
+
+    def shifted_target(self, h_step: int) -> tuple:
+        """Target h_step rows ahead within each series
+
+        Returns
+        -------
+        tuple
+            (rows, y_h), the rows of the feature matrix that have a target
+            h_step rows ahead in the same series and the respective targets
+        """
+        return shifted_target(self.series_codes, self.y, h_step)
+
+    def last_date_rows(self) -> np.ndarray:
+        """Rows of the feature matrix at the last date of the panel"""
+        return np.flatnonzero(self.ordinals == self.ordinals.max())
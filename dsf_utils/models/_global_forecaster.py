@@ -1,11 +1,28 @@
 """Transform any univariate sktime forecaster to a panel-data forecaster"""
+import tempfile
 import pandas as pd
 import numpy as np
+import lightgbm as lgb
 from lightgbm import LGBMRegressor
+from sklearn.base import clone
 from sklearn.preprocessing import LabelEncoder
-
-
-class DirectLGBMGlobalForecaster:
+from dsf_utils._parallel import run_in_chunks
+from dsf_utils.cache import _forecaster_params
+from dsf_utils.models import _serialization
+from dsf_utils.models._calendar import (
+    CalendarTable,
+    calendar_feature_names,
+    holiday_dates,
+)
+from dsf_utils.models._features import PanelFeatureEngine, lag_feature_names
+from dsf_utils.models._out_of_core import FeatureChunks, train_params
+from dsf_utils.models._prediction import PredictionBuilder
+from dsf_utils.models._window_features import window_feature_names
+from dsf_utils.panel import panel_dataframe, series_chunks
+from dsf_utils.profiling import current_profiler, stage, timed
+
+
+class _LGBMGlobalForecaster:
     def __init__(
         self,
         lgbm_kwargs=None,
@@ -16,6 +33,9 @@ class DirectLGBMGlobalForecaster:
         ts_id_col="REGION",
         target_col="ILITOTAL",
         log_transform=True,
+        chunk_size=None,
+        chunk_dir=None,
+        window_features=None,
     ):
         self.lgbm_kwargs = lgbm_kwargs
         self.freq = freq
@@ -26,116 +46,211 @@ class DirectLGBMGlobalForecaster:
         self.calendar_features = calendar_features
         self.lag_window_length = lag_window_length
         self.log_transform = log_transform
-
-    def _create_lagged_features(self, train_df):
-        _train_df = train_df.copy()
-        _train_df = _train_df.sort_index()
-        for lag in range(1, self.lag_window_length):
-            _str = f"{self.target_col}_lag{lag}"
-            _train_df[_str] = _train_df.groupby([self.ts_id_col])[
-                self.target_col
-            ].shift(lag)
-        _train_df = _train_df.dropna()
-        return _train_df
-
-    def _create_calendar_features(self, train_df, year=True, week=True, t=True):
-        _train_df = train_df.copy()
-        if year:
-            _train_df["Year"] = _train_df.index.year
-        if week:
-            _train_df["Week"] = _train_df.index.week
-        if t:
-            min_t = np.min(_train_df.index.astype(int))
-            _train_df["t"] = _train_df.index.astype(int) - min_t
-        return _train_df
-
-    def _multistep_targets(self, train_df, fh):
-        _train_df = train_df.copy()
-        # create a list that will store the target name for each horizon step
-        targets = []
-        for h_step in fh:
-            _str = f"{self.target_col}_h{h_step}"
-            targets.append(_str)
-            _train_df[_str] = _train_df.groupby([self.ts_id_col])[
-                self.target_col
-            ].shift(-h_step)
-
-        # drop original target column
-        # df = df.drop(columns=target)
-        # remove nas in dependent variables
-
-        return _train_df, targets
-
-    def _categorical_features_processing(self, train_df):
-        _train_df = train_df.copy()
-        _train_df[f"{self.ts_id_col}_encoded"] = self.cat_encoder.fit_transform(
-            train_df[self.ts_id_col]
+        # with chunk_size, fit builds the features of chunk_size series at a
+        # time in a temporary directory in chunk_dir and trains from disk
+        self.chunk_size = chunk_size
+        self.chunk_dir = chunk_dir
+        # rolling, expanding and EWM statistics of the target, e.g.
+        # {"rolling_mean": [4, 13], "rolling_std": [13], "ewm": [0.3]}
+        self.window_features = window_features
+
+    def _lgbm_regressor(self):
+        if self.lgbm_kwargs is None:
+            return LGBMRegressor(categorical_feature=-1)
+        return LGBMRegressor(categorical_feature=-1, **self.lgbm_kwargs)
+
+    def _new_feature_engine(self) -> PanelFeatureEngine:
+        return PanelFeatureEngine(
+            ts_id_col=self.ts_id_col,
+            target_col=self.target_col,
+            lag_window_length=self.lag_window_length,
+            calendar_features=self.calendar_features,
+            cat_encoder=self.cat_encoder_,
+            freq=self.freq,
+            window_features=self.window_features,
         )
-        return _train_df
-
-    def fit(self, ts_df: pd.DataFrame, fh):
-        train_df = ts_df.copy()
-        # create a model per timestep
-        self.is_fitted = False
-        # cat_feature_name = f"name:{self.ts_id_col}_encoded"
-        if self.lgbm_kwargs is not None:
-            self.models = [
-                LGBMRegressor(categorical_feature=-1, **self.lgbm_kwargs)
-                for _ in range(len(fh))
-            ]
-        else:
-            self.models = [
-                LGBMRegressor(categorical_feature=-1) for _ in range(len(fh))
-            ]
-        # feature engineering
-        train_df = self._create_lagged_features(train_df)
-        train_df = self._create_calendar_features(train_df, **self.calendar_features)
-        train_df, targets = self._multistep_targets(train_df, fh=fh)
-        train_df = self._categorical_features_processing(train_df)
-        train_df = train_df.set_index("REGION", drop=True, append=True)
-
-        # fit the models
-        for h_step in range(len(fh)):
-            y_name = targets[h_step]
-            _train_df = train_df.copy()
-            # drop rows where the target is null
-            _train_df = _train_df[_train_df[y_name].notna()]
-            X, y = _train_df.drop(columns=targets), _train_df[y_name]
-            if self.log_transform:
-                y = np.log(y + 1)
-            self.models[h_step].fit(X, y)
 
-        # create the inference dims
-        self._train_max_date = train_df.index.get_level_values(0).max()
-        self._pred_df = train_df[
-            train_df.index.get_level_values(0) == self._train_max_date
-        ].drop(columns=targets)
+    def _create_features(self, ts_df: pd.DataFrame) -> np.ndarray:
+        ts_df = panel_dataframe(ts_df, self.ts_id_col, self.target_col, self.freq)
+        # the encoder parameter is a default shared by all the forecasters, each
+        # fit encodes the ids with its own copy
+        self.cat_encoder_ = clone(self.cat_encoder)
+        self._feature_engine = self._new_feature_engine()
+        self._date_name = ts_df.index.name
+        with stage("features"):
+            return self._feature_engine.fit_transform(ts_df)
+
+    def _create_feature_chunks(self, ts_df, directory: str) -> FeatureChunks:
+        """Features of chunks of chunk_size series, written to directory
+
+        Only one chunk of features is in memory at a time, and only one chunk
+        of the panel if ts_df is a PanelStore. The id encoder is fitted on all
+        the ids first so the chunks share the encoding. The inference features
+        are set from the rows at the last date of all the chunks.
+        """
+        ts_ids, chunks = series_chunks(
+            ts_df, self.ts_id_col, self.target_col, self.freq, self.chunk_size
+        )
+        self.cat_encoder_ = clone(self.cat_encoder).fit(ts_ids)
+        feature_chunks = FeatureChunks(directory)
+        with stage("features"):
+            for chunk_df in chunks:
+                self._feature_engine = self._new_feature_engine()
+                self._date_name = chunk_df.index.name
+                X = self._feature_engine.fit_transform(chunk_df, fit_encoder=False)
+                feature_chunks.add(X, self._feature_engine)
+        self._set_inference_rows(*feature_chunks.last_date_rows())
+        return feature_chunks
+
+    def _train_booster(self, feature_chunks: FeatureChunks, h_step: int):
+        """Booster trained on the feature chunks, streamed from disk"""
+        params, num_boost_round = train_params(self._lgbm_regressor())
+        dataset = feature_chunks.dataset(h_step, params, self.log_transform)
+        booster = lgb.train(params, dataset, num_boost_round=num_boost_round)
+        # the binned dataset is not needed for predict
+        booster.free_dataset()
+        return booster
+
+    def _fit_model(self, model, X, y, init_model=None):
+        if self.log_transform:
+            y = np.log(y + 1)
+        model.fit(
+            X, y, feature_name=self._feature_engine.feature_names, init_model=init_model
+        )
 
-        self.is_fitted = True
+    def _update_features(self, new_rows):
+        if not self.is_fitted:
+            raise ValueError("The forecaster must be fitted before calling update")
+        if self._X is None:
+            raise ValueError(
+                "The forecaster has no training features in memory (loaded from "
+                "disk or fitted with chunk_size), fit it again without chunk_size "
+                "before calling update"
+            )
+        new_rows = panel_dataframe(new_rows, self.ts_id_col, self.target_col, self.freq)
+        with stage("features"):
+            self._X = self._feature_engine.update_transform(self._X, new_rows)
+        self._set_inference_features(self._X)
+
+    def _training_rows(self, h_step, new_only):
+        """Rows of the feature matrix and targets h_step ahead
+
+        With new_only, only the pairs with a target added by the last update.
+        """
+        rows, y = self._feature_engine.shifted_target(h_step)
+        if new_only:
+            is_new = self._feature_engine.new_rows[rows + h_step]
+            rows, y = rows[is_new], y[is_new]
+        return rows, y
+
+    def _set_inference_features(self, X):
+        # create the inference dims from the rows at the last training date
+        engine = self._feature_engine
+        rows = engine.last_date_rows()
+        window_state = None
+        if engine.window_state is not None:
+            window_state = engine.window_state.take(engine.series_codes[rows])
+        self._set_inference_rows(
+            X[rows], engine.ts_ids[rows], engine.ordinals[rows], window_state
+        )
 
-    def predict(self, fh):
-        pred_df = pd.DataFrame()
-        for h_step in range(len(fh)):
-            step_date = self._train_max_date + fh[h_step]
-            y_pred = self.models[h_step].predict(self._pred_df)
-            if self.log_transform:
-                y_pred = np.exp(y_pred) - 1
+    def _set_inference_rows(self, X_last, ts_ids, ordinals, window_state=None):
+        engine = self._feature_engine
+        # running window statistics of the series, for the recursive predict
+        self._window_state = window_state
+        dates = pd.PeriodIndex(
+            pd.arrays.PeriodArray(ordinals, dtype=engine.period_dtype)
+        )
+        self._train_max_date = dates[0]
+        self._calendar = None
+        self._pred_df = pd.DataFrame(
+            X_last,
+            columns=engine.feature_names,
+            index=pd.MultiIndex.from_arrays(
+                [dates, ts_ids], names=[self._date_name, self.ts_id_col]
+            ),
+        )
 
-            pred_df = pred_df.append(
-                pd.DataFrame(
-                    {
-                        self.ts_id_col: self._pred_df.index.get_level_values(1),
-                        "y_pred": y_pred,
-                        "_date": step_date,
-                    }
-                ),
-                ignore_index=True,
+    def _calendar_table(self) -> CalendarTable:
+        """Calendar lookup table of the dates after the last training date
+
+        Built once from the inference features, the origin of "t" is the one
+        of the features of the last training date.
+        """
+        if getattr(self, "_calendar", None) is None:
+            t_origin = self._train_max_date.ordinal
+            if "t" in self._pred_df.columns:
+                t_origin -= int(self._pred_df["t"].iloc[0])
+            self._calendar = CalendarTable(
+                self.calendar_features,
+                self._pred_df.index.get_level_values(0).dtype,
+                t_origin,
             )
-
-        return pred_df.set_index("_date", drop=True)
+        return self._calendar
+
+    def save(self, path: str):
+        """Save the fitted forecaster to the directory path
+
+        The LightGBM models are written as native LightGBM model files, the
+        inference features as typed NumPy blocks and the parameters in a JSON
+        metadata file, so loading the forecaster doesn't unpickle any Python
+        object. Only what predict needs is saved: the training features are
+        not and neither is the fitted cat_encoder, the encoded ids are in the
+        inference features.
+
+        Parameters
+        ----------
+        path : str
+            directory of the saved forecaster, created if it doesn't exist
+        """
+        if not self.is_fitted:
+            raise ValueError("The forecaster must be fitted before calling save")
+        params = _forecaster_params(self)
+        params.pop("cat_encoder")
+        holidays = self.calendar_features.get("holidays")
+        if holidays is not None:
+            params["calendar_features"] = {
+                **self.calendar_features,
+                "holidays": [str(date.date()) for date in holiday_dates(holidays)],
+            }
+        metadata = {
+            "class": type(self).__name__,
+            "params": params,
+            **_serialization.save_inference_features(self._pred_df, path),
+            **self._save_models(path),
+        }
+        if getattr(self, "_window_state", None) is not None:
+            _serialization.save_window_state(self._window_state, path)
+        _serialization.write_metadata(path, metadata)
+
+    @classmethod
+    def load(cls, path: str):
+        """Load a forecaster saved with save
+
+        The loaded forecaster can predict, update is only available after
+        fitting it again.
+        """
+        metadata = _serialization.read_metadata(path)
+        if metadata["class"] != cls.__name__:
+            raise ValueError(
+                f"{path} is a saved {metadata['class']}, not {cls.__name__}"
+            )
+        forecaster = cls(**metadata["params"])
+        forecaster._pred_df = _serialization.load_inference_features(path, metadata)
+        forecaster._train_max_date = forecaster._pred_df.index[0][0]
+        forecaster._date_name = forecaster._pred_df.index.names[0]
+        forecaster._X = None
+        forecaster._window_state = None
+        if forecaster.window_features:
+            forecaster._window_state = _serialization.load_window_state(
+                path, forecaster.window_features
+            )
+        forecaster._load_models(path, metadata)
+        forecaster.is_fitted = True
+        return forecaster
 
 
-class RecursiveLGBMGlobalForecaster:
+class DirectLGBMGlobalForecaster(_LGBMGlobalForecaster):
     def __init__(
         self,
         lgbm_kwargs=None,
@@ -146,146 +261,242 @@ class RecursiveLGBMGlobalForecaster:
         ts_id_col="REGION",
         target_col="ILITOTAL",
         log_transform=True,
+        n_jobs=None,
+        chunk_size=None,
+        chunk_dir=None,
+        window_features=None,
     ):
-        self.lgbm_kwargs = lgbm_kwargs
-        self.freq = freq
-        self.cat_encoder = cat_encoder
-        self.ts_id_col = ts_id_col
-        self.target_col = target_col
+        super().__init__(
+            lgbm_kwargs=lgbm_kwargs,
+            lag_window_length=lag_window_length,
+            calendar_features=calendar_features,
+            cat_encoder=cat_encoder,
+            freq=freq,
+            ts_id_col=ts_id_col,
+            target_col=target_col,
+            log_transform=log_transform,
+            chunk_size=chunk_size,
+            chunk_dir=chunk_dir,
+            window_features=window_features,
+        )
+        self.n_jobs = n_jobs
+
+    def _fit_horizon(self, model, X, h_step, init_model=None):
+        if isinstance(X, FeatureChunks):
+            return self._train_booster(X, h_step)
+        # only the rows of the horizon are taken from the shared feature matrix
+        rows, y = self._training_rows(h_step, new_only=init_model is not None)
+        if init_model is not None and len(rows) == 0:
+            return init_model
+        self._fit_model(model, X.take(rows, axis=0), y, init_model=init_model)
+        return model
+
+    def _fit_horizons(self, X, init_models):
+        # LightGBM releases the GIL so horizons can be fitted in threads
+        results = run_in_chunks(
+            timed,
+            [
+                (self._fit_horizon, self._lgbm_regressor(), X, h_step, init_model)
+                for h_step, init_model in zip(self._fit_fh, init_models)
+            ],
+            n_jobs=self.n_jobs,
+            backend="threading",
+            chunk_size=1,
+        )
+        profiler = current_profiler()
+        if profiler is not None:
+            for h_step, (_, wall_time) in zip(self._fit_fh, results):
+                profiler.record("fit_horizon", wall_time, h_step=h_step)
+        return [model for model, _ in results]
+
+    def fit(self, ts_df: pd.DataFrame, fh):
+        """Fit a model per step of fh
+
+        With chunk_size, the features are built chunk_size series at a time
+        and written to disk, and the model of every step is a LightGBM
+        booster trained from a dataset streamed from the files. Memory then
+        grows with the chunk size and the binned dataset of LightGBM, not
+        with the feature matrix of the whole panel. ts_df can be a PanelStore
+        to also read the panel one chunk at a time.
+        """
+        # create a model per timestep
         self.is_fitted = False
-        self.calendar_features = calendar_features
-        self.lag_window_length = lag_window_length
-        self.log_transform = log_transform
+        self._fit_fh = [int(h_step) for h_step in fh]
+        init_models = [None] * len(self._fit_fh)
+        if self.chunk_size is not None:
+            self._X = None
+            with tempfile.TemporaryDirectory(dir=self.chunk_dir) as directory:
+                feature_chunks = self._create_feature_chunks(ts_df, directory)
+                self.models = self._fit_horizons(feature_chunks, init_models)
+            self.is_fitted = True
+            return
+
+        # feature engineering, the feature matrix is shared by all the horizons
+        # and kept for update
+        self._X = self._create_features(ts_df)
+        self.models = self._fit_horizons(self._X, init_models)
+
+        self._set_inference_features(self._X)
 
-    def _create_lagged_features(self, train_df):
-        _train_df = train_df.copy()
-        _train_df = _train_df.sort_index()
-        for lag in range(1, self.lag_window_length):
-            _str = f"{self.target_col}_lag{lag}"
-            _train_df[_str] = _train_df.groupby([self.ts_id_col])[
-                self.target_col
-            ].shift(lag)
-        _train_df = _train_df.dropna()
-        return _train_df
-
-    def _create_calendar_features(self, train_df, year=True, week=True, t=True):
-        _train_df = train_df.copy()
-        if year:
-            _train_df["Year"] = _train_df.index.year
-        if week:
-            _train_df["Week"] = _train_df.index.week
-        if t:
-            min_t = np.min(_train_df.index.astype(int))
-            _train_df["t"] = _train_df.index.astype(int) - min_t
-        return _train_df
-
-    def _training_target(self, train_df):
-        _train_df = train_df.copy()
-        # create a list that will store the target name for each horizon step
-        _str = f"{self.target_col}_h{1}"
-        target = _str
-        _train_df[_str] = _train_df.groupby([self.ts_id_col])[self.target_col].shift(-1)
-
-        # drop original target column
-        # df = df.drop(columns=target)
-        # remove nas in dependent variables
-
-        return _train_df, target
-
-    def _categorical_features_processing(self, train_df):
-        _train_df = train_df.copy()
-        _train_df[f"{self.ts_id_col}_encoded"] = self.cat_encoder.fit_transform(
-            train_df[self.ts_id_col]
-        )
-        return _train_df
-
-    def _recursive_feature_update(self, pred_df, y_pred):
-        pred_df_columns = list(pred_df.columns)
-        _pred_df = pred_df.copy()
-        old_lags = [self.target_col] + [
-            f"{self.target_col}_lag{lag}"
-            for lag in range(1, self.lag_window_length - 1)
-        ]
-        new_lags = [
-            f"{self.target_col}_lag{lag}" for lag in range(1, self.lag_window_length)
-        ]
-        _pred_df = _pred_df.drop(columns=[old_lags[-1]])
-        _pred_df = _pred_df.rename(columns=dict(zip(old_lags, new_lags)))
-        _pred_df[self.target_col] = y_pred
+        self.is_fitted = True
 
-        return _pred_df[pred_df_columns]
+    def update(self, new_rows: pd.DataFrame, update_params=True, init_model=False):
+        """Update the forecaster with new observations
+
+        Only the feature rows of the new observations are built and appended to
+        the feature matrix of fit, and the inference features are moved to the
+        new last date.
+
+        Parameters
+        ----------
+        new_rows : pd.DataFrame
+            new observations of series seen in fit, in the layout of the panel
+            used in fit and after the last date of their series
+        update_params : bool, optional
+            whether to retrain the models. By default True
+        init_model : bool, optional
+            if True, boosting continues from the current models on the training
+            pairs with a new target only, else the models are retrained on the
+            whole feature matrix. By default False
+        """
+        self._update_features(new_rows)
+        if update_params:
+            init_models = self.models if init_model else [None] * len(self.models)
+            self.models = self._fit_horizons(self._X, init_models)
+
+    def _save_models(self, path: str) -> dict:
+        names = [f"h{h_step}" for h_step in self._fit_fh]
+        for name, model in zip(names, self.models):
+            _serialization.save_booster(model, path, name)
+        return {"fit_fh": self._fit_fh, "models": names}
+
+    def _load_models(self, path: str, metadata: dict):
+        # the model of a horizon is only read when it is first predicted
+        self._fit_fh = metadata["fit_fh"]
+        self.models = _serialization.LazyBoosters(path, metadata["models"])
 
-    def _recursive_calendar_features(
-        self, pred_df, date, h_step, year=True, week=True, t=True
-    ):
-        _pred_df = pred_df.copy()
-        if year:
-            _pred_df["Year"] = date.year
-        if week:
-            _pred_df["Week"] = date.week
-        if t:
-            _pred_df["t"] = _pred_df["t"] + h_step
+    def predict(self, fh):
+        ts_ids = self._pred_df.index.get_level_values(1)
+        pred_builder = PredictionBuilder(len(fh) * len(ts_ids), self.ts_id_col)
+        for h_step in range(len(fh)):
+            step_date = self._train_max_date + fh[h_step]
+            y_pred = self.models[h_step].predict(self._pred_df.to_numpy())
+            if self.log_transform:
+                y_pred = np.exp(y_pred) - 1
+
+            pred_builder.add(ts_ids, step_date, y_pred)
+
+        return pred_builder.to_frame()
 
-        return _pred_df
 
+class RecursiveLGBMGlobalForecaster(_LGBMGlobalForecaster):
     def fit(self, ts_df: pd.DataFrame, fh=None):
-        train_df = ts_df.copy()
-        # create a model per timestep
+        """Fit the one step ahead model
+
+        See DirectLGBMGlobalForecaster.fit for the training with chunk_size.
+        """
         self.is_fitted = False
-        if self.lgbm_kwargs is None:
-            self.model = LGBMRegressor(categorical_feature=-1)
-        else:
-            self.model = LGBMRegressor(categorical_feature=-1, **self.lgbm_kwargs)
-        # feature engineering
-        train_df = self._create_lagged_features(train_df)
-        train_df = self._create_calendar_features(train_df, **self.calendar_features)
-        train_df, target = self._training_target(train_df)
-        train_df = self._categorical_features_processing(train_df)
-        train_df = train_df.set_index("REGION", drop=True, append=True)
-
-        _train_df = train_df.copy()
-        # drop rows where the target is null
-        _train_df = _train_df[_train_df[target].notna()]
-        X, y = _train_df.drop(columns=target), _train_df[target]
-        if self.log_transform:
-            y = np.log(y + 1)
-        self.model.fit(X, y)
+        if self.chunk_size is not None:
+            self._X = None
+            with tempfile.TemporaryDirectory(dir=self.chunk_dir) as directory:
+                feature_chunks = self._create_feature_chunks(ts_df, directory)
+                with stage("fit_model"):
+                    self.model = self._train_booster(feature_chunks, 1)
+            self.is_fitted = True
+            return
 
-        # create the inference dims
-        self._train_max_date = train_df.index.get_level_values(0).max()
-        self._pred_df = train_df[
-            train_df.index.get_level_values(0) == self._train_max_date
-        ].drop(columns=[target])
+        self.model = self._lgbm_regressor()
+        # feature engineering, the feature matrix is kept for update
+        self._X = self._create_features(ts_df)
+
+        rows, y = self._feature_engine.shifted_target(1)
+        with stage("fit_model"):
+            self._fit_model(self.model, self._X[rows], y)
+
+        self._set_inference_features(self._X)
 
         self.is_fitted = True
 
+    def update(self, new_rows: pd.DataFrame, update_params=True, init_model=False):
+        """Update the forecaster with new observations
+
+        See DirectLGBMGlobalForecaster.update for the parameters.
+        """
+        self._update_features(new_rows)
+        if not update_params:
+            return
+        rows, y = self._training_rows(1, new_only=init_model)
+        if init_model and len(rows) == 0:
+            return
+        model = self._lgbm_regressor()
+        with stage("fit_model"):
+            self._fit_model(
+                model, self._X[rows], y, init_model=self.model if init_model else None
+            )
+        self.model = model
+
+    def _save_models(self, path: str) -> dict:
+        _serialization.save_booster(self.model, path, "model")
+        return {"models": ["model"]}
+
+    def _load_models(self, path: str, metadata: dict):
+        self.model = _serialization.load_booster(path, "model")
+
+    def _lag_positions(self) -> np.ndarray:
+        """Columns of the lag window in the feature matrix, newest value first"""
+        feature_names = list(self._pred_df.columns)
+        return np.array(
+            [
+                feature_names.index(name)
+                for name in lag_feature_names(self.target_col, self.lag_window_length)
+            ]
+        )
+
     def predict(self, fh):
-        pred_df = pd.DataFrame()
-        _rec_pred_df = self._pred_df.copy()
-        _pred_columns = list(self._pred_df.columns)
-        for h_step in range(len(fh)):
-            step_date = self._train_max_date + fh[h_step]
-            y_pred = self.model.predict(_rec_pred_df)
+        fh = np.asarray(fh)
+        ts_ids = self._pred_df.index.get_level_values(1)
+        pred_builder = PredictionBuilder(len(fh) * len(ts_ids), self.ts_id_col)
+        feature_names = list(self._pred_df.columns)
+        calendar_cols = [
+            feature_names.index(name)
+            for name in calendar_feature_names(self.calendar_features)
+        ]
+        # calendar features of every step, joined from the lookup table
+        step_ordinals = self._train_max_date.ordinal + np.arange(1, np.max(fh) + 1)
+        step_calendar = self._calendar_table().lookup(step_ordinals)
+
+        # the feature matrix is preallocated once and updated in place, the lag
+        # window is shifted by one column per step within X
+        X = self._pred_df.to_numpy(dtype=np.float64, copy=True)
+        lag_positions = self._lag_positions()
+        # the window statistics are updated with every prediction in O(1)
+        # per series instead of being recomputed over their windows
+        window_state = getattr(self, "_window_state", None)
+        if window_state is not None:
+            window_cols = [
+                feature_names.index(name)
+                for name in window_feature_names(
+                    self.target_col, window_state.window_features
+                )
+            ]
+            window_state = window_state.copy()
+
+        for step in range(1, int(np.max(fh)) + 1):
+            step_date = self._train_max_date + step
+            y_pred = self.model.predict(X)
 
             if self.log_transform:
                 y_pred = np.exp(y_pred) - 1
 
-            pred_df = pred_df.append(
-                pd.DataFrame(
-                    {
-                        self.ts_id_col: self._pred_df.index.get_level_values(1),
-                        "y_pred": y_pred,
-                        "_date": step_date,
-                    }
-                ),
-                ignore_index=True,
-            )
+            if step in fh:
+                pred_builder.add(ts_ids, step_date, y_pred)
 
-            # update pred_df
-            _rec_pred_df = self._recursive_feature_update(_rec_pred_df, y_pred)
-            _rec_pred_df = self._recursive_calendar_features(
-                _rec_pred_df, step_date, fh[h_step], **self.calendar_features
-            )
-            _rec_pred_df = _rec_pred_df[_pred_columns]
+            # roll the features forward to step_date
+            X[:, lag_positions[1:]] = X[:, lag_positions[:-1]]
+            X[:, lag_positions[0]] = y_pred
+            X[:, calendar_cols] = step_calendar[step - 1]
+            if window_state is not None:
+                window_state.push(y_pred)
+                X[:, window_cols] = window_state.features()
 
-        return pred_df.set_index("_date", drop=True)
+        return pred_builder.to_frame()
@@ -0,0 +1,170 @@
+"""Out-of-core training data of the global forecasters"""
+import os
+import numpy as np
+import lightgbm as lgb
+from dsf_utils.models._features import shifted_target
+from dsf_utils.models._window_features import WindowState
+
+
+def train_params(model) -> tuple:
+    """lightgbm.train parameters and boosting rounds of an LGBMRegressor
+
+    The sklearn parameters are aliases of the native ones, except
+    n_estimators, so the trained booster is the one LGBMRegressor.fit builds.
+    """
+    params = {
+        name: value
+        for name, value in model.get_params().items()
+        if value is not None and name not in ["class_weight", "importance_type"]
+    }
+    num_boost_round = params.pop("n_estimators")
+    params.setdefault("objective", "regression")
+    return params, num_boost_round
+
+
+class _ChunkSequence(lgb.Sequence):
+    """Rows of the feature matrix of a chunk, read from its memory-mapped file"""
+
+    def __init__(self, path, rows, t_col, t_shift, batch_size):
+        self.path = path
+        self.rows = rows
+        self.t_col = t_col
+        self.t_shift = t_shift
+        self.batch_size = batch_size
+        self._X = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, idx):
+        if self._X is None:
+            self._X = np.load(self.path, mmap_mode="r")
+        batch = self._X[self.rows[idx]]
+        if np.ndim(idx) == 0:
+            # a single row is a read-only view of the file
+            batch = batch.copy()
+        if self.t_col is not None and self.t_shift != 0:
+            batch[..., self.t_col] += self.t_shift
+        return batch
+
+
+class FeatureChunks:
+    """Feature matrices of chunks of series, written to .npy files on disk
+
+    The feature matrix, targets and series codes of every chunk are written
+    when the chunk is added, and read back as memory-mapped files when the
+    LightGBM dataset of a horizon is built, batch_size rows at a time. Only
+    the rows at the last date of every chunk, the inference features, are kept
+    in memory.
+
+    The "t" feature of a chunk counts the periods from the first date of the
+    chunk. It is shifted to count from the first date of all the chunks when
+    the rows are read, so the features are the same as the features of the
+    whole panel.
+
+    Parameters
+    ----------
+    directory : str
+        existing directory of the files
+    batch_size : int, optional
+        rows read at a time when building a dataset. By default 100_000
+    """
+
+    def __init__(self, directory: str, batch_size: int = 100_000):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.feature_names = None
+        self._files = []
+        self._t_origins = []
+        self._last_rows = []
+
+    def __len__(self):
+        return len(self._files)
+
+    def add(self, X: np.ndarray, feature_engine):
+        """Write the feature matrix of a chunk built by feature_engine"""
+        if len(X) == 0:
+            return
+        self.feature_names = feature_engine.feature_names
+        self.period_dtype = feature_engine.period_dtype
+        files = {
+            name: os.path.join(self.directory, f"chunk{len(self)}_{name}.npy")
+            for name in ["X", "y", "series_codes"]
+        }
+        np.save(files["X"], X)
+        np.save(files["y"], feature_engine.y)
+        np.save(files["series_codes"], feature_engine.series_codes)
+        self._files.append(files)
+        self._t_origins.append(feature_engine._t_origin)
+        rows = feature_engine.last_date_rows()
+        window_state = None
+        if feature_engine.window_state is not None:
+            window_state = feature_engine.window_state.take(
+                feature_engine.series_codes[rows]
+            )
+        self._last_rows.append(
+            (
+                X[rows],
+                feature_engine.ts_ids[rows],
+                feature_engine.ordinals[rows],
+                window_state,
+            )
+        )
+
+    @property
+    def _t_col(self):
+        if "t" in self.feature_names:
+            return self.feature_names.index("t")
+        return None
+
+    def _t_shift(self, i: int) -> int:
+        return int(self._t_origins[i] - min(self._t_origins))
+
+    def last_date_rows(self) -> tuple:
+        """(X, ts_ids, ordinals, window_state) of the rows at the last date
+
+        window_state is the running window statistics of the series of the
+        rows, None without window features.
+        """
+        if len(self) == 0:
+            raise ValueError("No series has enough observations for a lag window")
+        last_ordinal = max(ordinals.max() for _, _, ordinals, _ in self._last_rows)
+        blocks, window_states = [], []
+        for i, (X, ts_ids, ordinals, window_state) in enumerate(self._last_rows):
+            if ordinals[0] != last_ordinal:
+                continue
+            X = X.copy()
+            if self._t_col is not None:
+                X[:, self._t_col] += self._t_shift(i)
+            blocks.append((X, ts_ids, ordinals))
+            window_states.append(window_state)
+        arrays = tuple(np.concatenate(arrays) for arrays in zip(*blocks))
+        if window_states[0] is None:
+            return arrays + (None,)
+        return arrays + (WindowState.concat(window_states),)
+
+    def dataset(self, h_step: int, params: dict, log_transform: bool) -> lgb.Dataset:
+        """LightGBM dataset of the rows with a target h_step rows ahead"""
+        sequences, labels = [], []
+        for i, files in enumerate(self._files):
+            series_codes = np.load(files["series_codes"], mmap_mode="r")
+            y = np.load(files["y"], mmap_mode="r")
+            rows, y_h = shifted_target(series_codes, y, h_step)
+            if len(rows) == 0:
+                continue
+            sequences.append(
+                _ChunkSequence(
+                    files["X"], rows, self._t_col, self._t_shift(i), self.batch_size
+                )
+            )
+            labels.append(y_h)
+        label = np.concatenate(labels)
+        if log_transform:
+            label = np.log(label + 1)
+        return lgb.Dataset(
+            sequences,
+            label=label,
+            feature_name=self.feature_names,
+            params=params,
+            free_raw_data=True,
+        )
@@ -0,0 +1,125 @@
+"""Naive benchmark forecasts for all the series of a panel at once"""
+import numpy as np
+import pandas as pd
+from dsf_utils.panel import as_panel_frame
+from dsf_utils.models._prediction import PredictionBuilder, _dates_from_codes
+
+
+class PanelBenchmarkForecaster:
+    """Constant, naive, seasonal naive and mean forecasts of a panel
+
+    Panel-native equivalent of wrapping ConstantValueForecaster or sktime's
+    NaiveForecaster in SktimePanelForecaster. The last values of every series
+    are kept in a (series x time) matrix, right-aligned on the last date of
+    each series, and the forecasts of all the series are computed with NumPy
+    operations on the matrix instead of a model per series. As in
+    SktimePanelForecaster, every series is forecasted from its own last date.
+
+    Parameters
+    ----------
+    strategy : str, optional
+        "constant", "last" (naive, seasonal naive with sp > 1) or "mean". By
+        default "last"
+    constant : float, optional
+        forecast of the "constant" strategy. By default 0
+    sp : int, optional
+        seasonal periodicity of the "last" and "mean" strategies. By default 1
+    window_length : int, optional
+        number of last values used by the "mean" strategy, by default all the
+        history
+    freq : str, optional
+        pandas period frequency of the panel. By default "W-SUN"
+    ts_id_col : str, optional
+        name of the time series id column. By default "REGION"
+    target_col : str, optional
+        name of the target column. By default "ILITOTAL"
+    """
+
+    def __init__(
+        self,
+        strategy="last",
+        constant=0,
+        sp=1,
+        window_length=None,
+        freq="W-SUN",
+        ts_id_col="REGION",
+        target_col="ILITOTAL",
+    ):
+        if strategy not in ["constant", "last", "mean"]:
+            raise ValueError(
+                f"strategy must be 'constant', 'last' or 'mean', not {strategy}"
+            )
+        self.strategy = strategy
+        self.constant = constant
+        self.sp = sp
+        self.window_length = window_length
+        self.freq = freq
+        self.ts_id_col = ts_id_col
+        self.target_col = target_col
+        self.is_fitted = False
+
+    def _window_width(self, panel) -> int:
+        if self.strategy == "constant":
+            return 1
+        if self.strategy == "last":
+            return self.sp
+        if self.window_length is not None:
+            return self.window_length
+        # the whole history of the longest series
+        first_ordinals = panel.ordinals[panel.offsets[:-1]]
+        return int((self._last_ordinals - first_ordinals).max()) + 1
+
+    def fit(self, ts_df: pd.DataFrame, fh=None):
+        self.is_fitted = False
+        panel = as_panel_frame(ts_df, self.ts_id_col, self.target_col, self.freq)
+        self._ts_ids = np.asarray(panel.ts_ids)
+        self._period_dtype = panel.period_dtype
+        self._last_ordinals = panel.ordinals[panel.offsets[1:] - 1]
+
+        # lag of every row from the last date of its series, the last width
+        # values are kept with lag 0 in the last column and NaN for gaps
+        width = self._window_width(panel)
+        lags = self._last_ordinals[panel.series_codes] - panel.ordinals
+        rows = np.flatnonzero(lags < width)
+        self._window = np.full((len(self._ts_ids), width), np.nan)
+        self._window[panel.series_codes[rows], width - 1 - lags[rows]] = (
+            panel.column_values(self.target_col)[rows]
+        )
+
+        self.is_fitted = True
+
+    def _seasonal_values(self, fh) -> np.ndarray:
+        """Forecasts of the last and mean strategies, (series, fh) array"""
+        width = self._window.shape[1]
+        lags = width - 1 - np.arange(width)
+        # step h is forecasted from the lags in the same season, lag % sp
+        # equal to -h % sp
+        seasons = (-fh) % self.sp
+        if self.strategy == "last":
+            return self._window[:, width - 1 - seasons]
+
+        season_means = np.full((len(self._window), self.sp), np.nan)
+        for season in np.unique(seasons):
+            values = self._window[:, lags % self.sp == season]
+            observed = ~np.isnan(values)
+            counts = observed.sum(axis=1)
+            sums = np.where(observed, values, 0).sum(axis=1)
+            season_means[counts > 0, season] = sums[counts > 0] / counts[counts > 0]
+        return season_means[:, seasons]
+
+    def predict(self, fh):
+        fh = np.asarray(fh, dtype=np.int64)
+        n_series = len(self._ts_ids)
+        if self.strategy == "constant":
+            y_pred = np.full((n_series, len(fh)), float(self.constant))
+        else:
+            y_pred = self._seasonal_values(fh)
+
+        date_codes = (self._last_ordinals[:, np.newaxis] + fh).ravel()
+        pred_builder = PredictionBuilder(y_pred.size, self.ts_id_col, index_name=None)
+        pred_builder.add(
+            np.repeat(self._ts_ids, len(fh)),
+            _dates_from_codes(date_codes, self._period_dtype),
+            y_pred.ravel(),
+        )
+        return pred_builder.to_frame()
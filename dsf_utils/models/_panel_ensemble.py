@@ -1,31 +1,80 @@
 """Combine Panel Forecasters"""
+from copy import deepcopy
+from dsf_utils._parallel import run_in_chunks
+from dsf_utils.models._prediction import PredictionAccumulator
+
+
+def _fit_member(forecaster, train_df, fh):
+    forecaster.fit(train_df, fh)
+    return forecaster
 
 
 class SimpleAverageCombination:
-    def __init__(self, forecaster_list, ts_id_col):
+    """Combination of the predictions of panel forecasters
+
+    Copies of the members are fitted in parallel, in forecasters_, and their
+    predictions are combined per time series id and date, one member at a time.
+    forecaster_list is left unfitted, as passed.
+
+    Parameters
+    ----------
+    forecaster_list : list
+        panel forecasters to combine
+    ts_id_col : str
+        name of the time series id column
+    method : str, optional
+        "mean" or "median" of the member predictions. By default "mean"
+    weights : list, optional
+        weight of each member for the "mean" method, by default equal weights
+    n_jobs : int, optional
+        number of members fitted in parallel. By default None, sequential
+    backend : str, optional
+        joblib backend of the parallel fit. By default "loky", a process pool
+    """
+
+    def __init__(
+        self,
+        forecaster_list,
+        ts_id_col,
+        method="mean",
+        weights=None,
+        n_jobs=None,
+        backend="loky",
+    ):
+        if weights is not None and len(weights) != len(forecaster_list):
+            raise ValueError("weights must have one value per forecaster")
+        if weights is not None and method != "mean":
+            raise ValueError("weights are only supported by the mean method")
         self.forecaster_list = forecaster_list
         self.ts_id_col = ts_id_col
+        self.method = method
+        self.weights = weights
+        self.n_jobs = n_jobs
+        self.backend = backend
         self.is_fitted = False
 
     def fit(self, train_df, fh):
         self.is_fitted = False
-        for forecaster in self.forecaster_list:
-            _train_df = train_df.copy()
-            forecaster.fit(_train_df, fh)
+        # the parameters stay as passed, with a process pool the fitted members
+        # would be copies anyway
+        self.forecasters_ = run_in_chunks(
+            _fit_member,
+            [
+                (deepcopy(forecaster), train_df, fh)
+                for forecaster in self.forecaster_list
+            ],
+            n_jobs=self.n_jobs,
+            backend=self.backend,
+            chunk_size=1,
+        )
         self.is_fitted = True
 
     def predict(self, fh):
-        count = 0
-        for forecaster in self.forecaster_list:
-            _pred_df = (
-                forecaster.predict(fh).sort_index().sort_values(by=[self.ts_id_col])
-            )
-            if count == 0:
-                pred_df = _pred_df.copy()
-            else:
-                pred_df["y_pred"] = pred_df["y_pred"] + _pred_df["y_pred"]
-            count += 1
-
-        pred_df["y_pred"] = pred_df["y_pred"] / count
-
-        return pred_df
+        weights = self.weights
+        if weights is None:
+            weights = [1.0] * len(self.forecasters_)
+        accumulator = PredictionAccumulator(self.ts_id_col, method=self.method)
+        for forecaster, weight in zip(self.forecasters_, weights):
+            accumulator.add(forecaster.predict(fh), weight=weight)
+
+        return accumulator.to_frame()
@@ -0,0 +1,178 @@
+"""Assemble long-format prediction frames for the panel forecasters"""
+import numpy as np
+import pandas as pd
+
+
+def _date_codes(dates):
+    """int64 codes and dtype of a date, or an index of dates"""
+    if isinstance(dates, pd.Period):
+        return np.int64(dates.ordinal), pd.PeriodDtype(dates.freq)
+    if isinstance(dates, pd.Timestamp):
+        return np.int64(dates.value), np.dtype("datetime64[ns]")
+    dates = pd.Index(dates)
+    if isinstance(dates, pd.PeriodIndex):
+        return dates.asi8, dates.dtype
+    if isinstance(dates, pd.DatetimeIndex):
+        return dates.as_unit("ns").asi8, np.dtype("datetime64[ns]")
+    return dates.to_numpy(dtype=np.int64), dates.dtype
+
+
+def _dates_from_codes(codes, dtype) -> pd.Index:
+    if isinstance(dtype, pd.PeriodDtype):
+        return pd.PeriodIndex(pd.arrays.PeriodArray(codes, dtype=dtype))
+    if dtype == np.dtype("datetime64[ns]"):
+        return pd.DatetimeIndex(codes.view("datetime64[ns]"))
+    return pd.Index(codes, dtype=dtype)
+
+
+class PredictionBuilder:
+    """Long-format prediction frame built from preallocated arrays
+
+    Blocks of predictions are written in preallocated id, date and y_pred
+    arrays and the frame is created once in to_frame, instead of appending a
+    DataFrame for each series or horizon step.
+
+    Parameters
+    ----------
+    n_rows : int
+        total number of predictions
+    ts_id_col : str
+        name of the time series id column
+    index_name : str, optional
+        name of the date index of the frame. By default "_date"
+    """
+
+    def __init__(self, n_rows: int, ts_id_col: str, index_name: str = "_date"):
+        self.ts_id_col = ts_id_col
+        self.index_name = index_name
+        self._ids = np.empty(n_rows, dtype=object)
+        self._date_codes = np.empty(n_rows, dtype=np.int64)
+        self._y_pred = np.empty(n_rows, dtype=np.float64)
+        self._date_dtype = None
+        self._n_rows = 0
+
+    def add(self, ids, dates, y_pred):
+        """Write a block of predictions
+
+        Parameters
+        ----------
+        ids : scalar or array-like
+            time series id(s) of the block
+        dates : pd.Period, pd.Timestamp or array-like of dates
+            date(s) of the block, a scalar date is used for every row
+        y_pred : array-like
+            predictions of the block
+        """
+        y_pred = np.asarray(y_pred, dtype=np.float64)
+        start, stop = self._n_rows, self._n_rows + len(y_pred)
+        if stop > len(self._y_pred):
+            raise ValueError("More predictions than the preallocated rows")
+        codes, dtype = _date_codes(dates)
+        if self._date_dtype is None:
+            self._date_dtype = dtype
+        elif dtype != self._date_dtype:
+            raise ValueError("All the prediction dates must have the same type")
+
+        self._ids[start:stop] = ids
+        self._date_codes[start:stop] = codes
+        self._y_pred[start:stop] = y_pred
+        self._n_rows = stop
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long-format frame with the id and y_pred columns, indexed by date"""
+        n_rows = self._n_rows
+        if self._date_dtype is None:
+            index = pd.Index([], name=self.index_name)
+        else:
+            index = _dates_from_codes(self._date_codes[:n_rows], self._date_dtype)
+            index.name = self.index_name
+        return pd.DataFrame(
+            {
+                self.ts_id_col: self._ids[:n_rows],
+                "y_pred": self._y_pred[:n_rows],
+            },
+            index=index,
+        )
+
+
+class PredictionAccumulator:
+    """Combination of long-format prediction frames aligned on (id, date)
+
+    Predictions are matched by time series id and date, not by position, so
+    the frames can come in any order and with different sets of series. For the
+    (weighted) mean only running sums are kept, for the median one value per
+    (id, date) and frame.
+
+    Parameters
+    ----------
+    ts_id_col : str
+        name of the time series id column
+    method : str, optional
+        "mean" or "median". By default "mean"
+    """
+
+    def __init__(self, ts_id_col: str, method: str = "mean"):
+        if method not in ["mean", "median"]:
+            raise ValueError(f"method must be 'mean' or 'median', not {method}")
+        self.ts_id_col = ts_id_col
+        self.method = method
+        self._keys = None
+        self._date_dtype = None
+        self._index_name = None
+        self._sums = np.array([])
+        self._weights = np.array([])
+        self._values = []
+
+    def _positions(self, pred_df):
+        codes, dtype = _date_codes(pred_df.index)
+        keys = pd.MultiIndex.from_arrays([pred_df[self.ts_id_col].to_numpy(), codes])
+        if self._keys is None:
+            self._date_dtype = dtype
+            self._index_name = pred_df.index.name
+            self._keys = keys.unique()
+        elif dtype != self._date_dtype:
+            raise ValueError("All the prediction dates must have the same type")
+        positions = self._keys.get_indexer(keys)
+        if (positions < 0).any():
+            # keys predicted by this frame only are appended
+            new_keys = keys[positions < 0].unique()
+            self._keys = self._keys.append(new_keys)
+            positions = self._keys.get_indexer(keys)
+        return positions
+
+    def _grow(self, values, fill_value):
+        n_new = len(self._keys) - len(values)
+        return np.concatenate([values, np.full(n_new, fill_value)])
+
+    def add(self, pred_df: pd.DataFrame, weight: float = 1.0):
+        """Add a prediction frame with the id and y_pred columns"""
+        positions = self._positions(pred_df)
+        y_pred = pred_df["y_pred"].to_numpy(dtype=np.float64)
+        if self.method == "mean":
+            self._sums = self._grow(self._sums, 0.0)
+            self._weights = self._grow(self._weights, 0.0)
+            np.add.at(self._sums, positions, weight * y_pred)
+            np.add.at(self._weights, positions, weight)
+        else:
+            values = np.full(len(self._keys), np.nan)
+            values[positions] = y_pred
+            self._values.append(values)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Combined predictions, sorted by id and date"""
+        if self._keys is None:
+            return pd.DataFrame(columns=[self.ts_id_col, "y_pred"])
+        if self.method == "mean":
+            y_pred = self._sums / self._weights
+        else:
+            values = np.vstack([self._grow(v, np.nan) for v in self._values])
+            y_pred = np.nanmedian(values, axis=0)
+
+        ids = self._keys.get_level_values(0).to_numpy()
+        codes = self._keys.get_level_values(1).to_numpy(dtype=np.int64)
+        order = np.lexsort((codes, pd.factorize(ids, sort=True)[0]))
+        index = _dates_from_codes(codes[order], self._date_dtype)
+        index.name = self._index_name
+        return pd.DataFrame(
+            {self.ts_id_col: ids[order], "y_pred": y_pred[order]}, index=index
+        )
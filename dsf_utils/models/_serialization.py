@@ -0,0 +1,137 @@
+"""Compact on-disk format of the fitted global forecasters"""
+import json
+import os
+from collections.abc import Sequence
+import numpy as np
+import pandas as pd
+from lightgbm import Booster
+from dsf_utils.models._window_features import WindowState
+
+METADATA_FILE = "metadata.json"
+FEATURES_FILE = "pred_features.npy"
+IDS_FILE = "pred_ids.npy"
+WINDOW_STATE_FILE = "window_state.npz"
+MODELS_DIR = "models"
+
+
+def _booster(model) -> Booster:
+    """Booster of a fitted LGBMRegressor, or the model if it is a Booster"""
+    return getattr(model, "booster_", model)
+
+
+def model_file(path: str, name: str) -> str:
+    return os.path.join(path, MODELS_DIR, f"{name}.txt")
+
+
+def save_booster(model, path: str, name: str):
+    """Write a model as a native LightGBM text model file"""
+    os.makedirs(os.path.join(path, MODELS_DIR), exist_ok=True)
+    _booster(model).save_model(model_file(path, name))
+
+
+def load_booster(path: str, name: str) -> Booster:
+    return Booster(model_file=model_file(path, name))
+
+
+class LazyBoosters(Sequence):
+    """Boosters of a saved forecaster, each read from its file on first use
+
+    Used in place of the list of fitted models of a direct forecaster, so a
+    forecaster loaded to predict a few horizons only reads their models.
+    """
+
+    def __init__(self, path: str, names: list):
+        self.path = path
+        self.names = list(names)
+        self._boosters = [None] * len(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if self._boosters[i] is None:
+            self._boosters[i] = load_booster(self.path, self.names[i])
+        return self._boosters[i]
+
+    @property
+    def n_loaded(self) -> int:
+        """Number of boosters read so far"""
+        return sum(booster is not None for booster in self._boosters)
+
+
+def save_inference_features(pred_df: pd.DataFrame, path: str) -> dict:
+    """Write the inference features as typed NumPy blocks
+
+    The feature matrix is written as a float64 block and the ids as a block of
+    their own dtype, strings as fixed-width unicode. Returns the metadata
+    needed to rebuild the frame.
+    """
+    os.makedirs(path, exist_ok=True)
+    np.save(
+        os.path.join(path, FEATURES_FILE),
+        pred_df.to_numpy(dtype=np.float64),
+        allow_pickle=False,
+    )
+    ts_ids = np.asarray(pred_df.index.get_level_values(1))
+    if ts_ids.dtype == object:
+        ts_ids = ts_ids.astype(str)
+    np.save(os.path.join(path, IDS_FILE), ts_ids, allow_pickle=False)
+    train_max_date = pred_df.index.get_level_values(0)[0]
+    return {
+        "feature_names": list(pred_df.columns),
+        "index_names": list(pred_df.index.names),
+        "train_max_date": int(train_max_date.ordinal),
+        "freq": train_max_date.freqstr,
+    }
+
+
+def load_inference_features(path: str, metadata: dict) -> pd.DataFrame:
+    """Inference features written by save_inference_features"""
+    X = np.load(os.path.join(path, FEATURES_FILE), allow_pickle=False)
+    ts_ids = np.load(os.path.join(path, IDS_FILE), allow_pickle=False)
+    if ts_ids.dtype.kind == "U":
+        ts_ids = ts_ids.astype(object)
+    ordinals = np.full(len(ts_ids), metadata["train_max_date"], dtype=np.int64)
+    dates = pd.PeriodIndex(
+        pd.arrays.PeriodArray(ordinals, dtype=pd.PeriodDtype(metadata["freq"]))
+    )
+    return pd.DataFrame(
+        X,
+        columns=metadata["feature_names"],
+        index=pd.MultiIndex.from_arrays([dates, ts_ids], names=metadata["index_names"]),
+    )
+
+
+def save_window_state(window_state, path: str):
+    """Write the running window statistics of the series as NumPy blocks"""
+    np.savez(
+        os.path.join(path, WINDOW_STATE_FILE),
+        history=window_state.lags(),
+        expanding_sum=window_state.expanding_sum,
+        expanding_count=window_state.expanding_count,
+        ewm=window_state.ewm,
+    )
+
+
+def load_window_state(path: str, window_features: dict) -> WindowState:
+    """Window statistics written by save_window_state"""
+    with np.load(os.path.join(path, WINDOW_STATE_FILE), allow_pickle=False) as f:
+        return WindowState(
+            window_features,
+            f["history"],
+            f["expanding_sum"],
+            f["expanding_count"],
+            f["ewm"],
+        )
+
+
+def write_metadata(path: str, metadata: dict):
+    with open(os.path.join(path, METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+
+def read_metadata(path: str) -> dict:
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        return json.load(f)
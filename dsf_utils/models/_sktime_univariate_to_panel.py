@@ -1,5 +1,37 @@
 """Transform any univariate sktime forecaster to a panel-data forecaster"""
+import time
+import warnings
 import pandas as pd
+from dsf_utils._parallel import run_in_chunks, catch_errors
+from dsf_utils.models._prediction import PredictionBuilder
+from dsf_utils.panel import as_panel_frame
+from dsf_utils.profiling import current_profiler, timed
+
+
+def _fit_single_ts(forecaster, forecaster_kwargs, ts, fh=None):
+    _forecaster = forecaster(**forecaster_kwargs)
+    if _forecaster.get_tag("requires-fh-in-fit"):
+        _forecaster.fit(y=ts, fh=fh)
+    else:
+        _forecaster.fit(y=ts)
+    return _forecaster
+
+
+def _update_single_ts(model, forecaster, forecaster_kwargs, ts, fh, update_params):
+    """Update a fitted model with new points, or fit a new one if model is None
+
+    Returns the model and the time of the update or fit in seconds.
+    """
+    start = time.perf_counter()
+    if model is None:
+        model = _fit_single_ts(forecaster, forecaster_kwargs, ts, fh)
+    else:
+        model.update(y=ts, update_params=update_params)
+    return model, time.perf_counter() - start
+
+
+def _predict_single_ts(forecaster, fh):
+    return forecaster.predict(fh)
 
 
 class SktimePanelForecaster:
@@ -10,38 +42,140 @@ class SktimePanelForecaster:
         freq="W-SUN",
         ts_id_col="REGION",
         target_col="ILITOTAL",
+        n_jobs=None,
+        backend="loky",
+        chunk_size=None,
     ):
         self.forecaster = forecaster
         self.forecaster_kwargs = forecaster_kwargs
         self.freq = freq
         self.ts_id_col = ts_id_col
         self.target_col = target_col
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.chunk_size = chunk_size
         self.is_fitted = False
         self.models_dict = {}
+        self.fit_errors_dict = {}
+        self.fit_times_dict = {}
+        self.update_errors_dict = {}
+        self.update_times_dict = {}
+        self.predict_errors_dict = {}
+
+    def _run_in_chunks(self, func, args_list):
+        results = run_in_chunks(
+            catch_errors,
+            [(func, *args) for args in args_list],
+            n_jobs=self.n_jobs,
+            backend=self.backend,
+            chunk_size=self.chunk_size,
+        )
+        return results
+
+    def _warn_errors(self, errors_dict, step):
+        if len(errors_dict) > 0:
+            warnings.warn(
+                f"{step} failed for {len(errors_dict)} series, "
+                f"see {step}_errors_dict for details"
+            )
 
-    def _process_single_ts(self, ts_df: pd.DataFrame) -> pd.Series:
-        ts = ts_df[self.target_col].sort_index()
-        return ts
+    def _record_times(self, stage, times_dict):
+        # the series are timed in the workers, only the wall time is recorded
+        profiler = current_profiler()
+        if profiler is not None:
+            for ts_name, wall_time in times_dict.items():
+                profiler.record(stage, wall_time, **{self.ts_id_col: ts_name})
 
     def fit(self, ts_df: pd.DataFrame, fh=None):
-        ts_df = ts_df.copy()
+        # every series is a sorted slice of the panel, no groupby is needed
+        panel = as_panel_frame(ts_df, self.ts_id_col, self.target_col, self.freq)
         self.is_fitted = False
-        for ts_name, ts in ts_df.groupby([self.ts_id_col]):
-            ts = self._process_single_ts(ts)
-            _forecaster = self.forecaster(**self.forecaster_kwargs)
-            if _forecaster._tags["requires-fh-in-fit"]:
-                _forecaster.fit(y=ts, fh=fh)
+        self.models_dict = {}
+        self.fit_errors_dict = {}
+        self.fit_times_dict = {}
+        self._fh = fh
+        ts_names = list(panel.ts_ids)
+        args_list = [
+            (
+                _fit_single_ts,
+                self.forecaster,
+                self.forecaster_kwargs,
+                panel.series(ts_name, self.target_col),
+                fh,
+            )
+            for ts_name in ts_names
+        ]
+
+        results = self._run_in_chunks(timed, args_list)
+        for ts_name, (result, error) in zip(ts_names, results):
+            if error is None:
+                self.models_dict[ts_name], self.fit_times_dict[ts_name] = result
             else:
-                _forecaster.fit(y=ts)
-            self.models_dict[ts_name] = _forecaster
+                self.fit_errors_dict[ts_name] = error
+        self._warn_errors(self.fit_errors_dict, "fit")
+        self._record_times("fit_series", self.fit_times_dict)
 
         self.is_fitted = True
 
+    def update(self, new_panel_df: pd.DataFrame, update_params=False):
+        """Update the per-series models with new observations
+
+        The new points of each series are passed to the update of its sktime
+        model, series without a model (not seen in fit or failed in fit) are
+        fitted on their new points. The series are processed in parallel like
+        in fit and the time of each update is stored in update_times_dict.
+
+        Parameters
+        ----------
+        new_panel_df : pd.DataFrame
+            new observations in the layout of the panel used in fit
+        update_params : bool, optional
+            whether the models re-estimate their parameters, passed to the
+            sktime update. By default False
+        """
+        if not self.is_fitted:
+            raise ValueError("The forecaster must be fitted before calling update")
+        panel = as_panel_frame(new_panel_df, self.ts_id_col, self.target_col, self.freq)
+        self.update_errors_dict = {}
+        self.update_times_dict = {}
+        ts_names = list(panel.ts_ids)
+        args_list = [
+            (
+                self.models_dict.get(ts_name),
+                self.forecaster,
+                self.forecaster_kwargs,
+                panel.series(ts_name, self.target_col),
+                self._fh,
+                update_params,
+            )
+            for ts_name in ts_names
+        ]
+
+        results = self._run_in_chunks(_update_single_ts, args_list)
+        for ts_name, (result, error) in zip(ts_names, results):
+            if error is None:
+                self.models_dict[ts_name], self.update_times_dict[ts_name] = result
+                self.fit_errors_dict.pop(ts_name, None)
+            else:
+                self.update_errors_dict[ts_name] = error
+        self._warn_errors(self.update_errors_dict, "update")
+        self._record_times("update_series", self.update_times_dict)
+
     def predict(self, fh):
-        pred_df = pd.DataFrame()
-        for ts_name, forecaster in self.models_dict.items():
-            y_pred = forecaster.predict(fh).to_frame(name="y_pred")
-            y_pred[self.ts_id_col] = ts_name
-            pred_df = pred_df.append(y_pred, ignore_index=False)
+        self.predict_errors_dict = {}
+        ts_names = list(self.models_dict.keys())
+        results = self._run_in_chunks(
+            _predict_single_ts,
+            [(self.models_dict[ts_name], fh) for ts_name in ts_names],
+        )
+
+        n_rows = sum(len(y_pred) for y_pred, error in results if error is None)
+        pred_builder = PredictionBuilder(n_rows, self.ts_id_col, index_name=None)
+        for ts_name, (y_pred, error) in zip(ts_names, results):
+            if error is not None:
+                self.predict_errors_dict[ts_name] = error
+                continue
+            pred_builder.add(ts_name, y_pred.index, y_pred.to_numpy())
+        self._warn_errors(self.predict_errors_dict, "predict")
 
-        return pred_df
+        return pred_builder.to_frame()
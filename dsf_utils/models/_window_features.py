@@ -0,0 +1,333 @@
+"""Rolling, expanding and EWM statistics of the target of the global forecasters
+
+The statistics of a row are computed over the target values of its series up
+to and including the row, like lag 0 of the lag window. Windows are counted in
+rows, as the lags are, and missing values are skipped: a rolling statistic is
+NaN unless its whole window is observed, the expanding mean averages the
+observed values and a missing value leaves the EWM unchanged.
+"""
+import numpy as np
+
+
+def window_feature_names(target_col: str, window_features: dict) -> list:
+    """Names of the statistics enabled in window_features
+
+    window_features holds the "rolling_mean" and "rolling_std" window lengths,
+    the "ewm" smoothing factors alpha and the "expanding_mean" flag, e.g.
+    {"rolling_mean": [4, 13], "rolling_std": [13], "ewm": [0.3]}.
+    """
+    if not window_features:
+        return []
+    names = [
+        f"{target_col}_rolling_mean{w}" for w in window_features.get("rolling_mean", [])
+    ]
+    names += [
+        f"{target_col}_rolling_std{w}" for w in window_features.get("rolling_std", [])
+    ]
+    if window_features.get("expanding_mean", False):
+        names.append(f"{target_col}_expanding_mean")
+    names += [f"{target_col}_ewm{alpha:g}" for alpha in window_features.get("ewm", [])]
+    return names
+
+
+def _check_window_features(window_features: dict):
+    if any(w < 1 for w in window_features.get("rolling_mean", [])):
+        raise ValueError("rolling_mean windows must be positive integers")
+    if any(w < 2 for w in window_features.get("rolling_std", [])):
+        raise ValueError("rolling_std windows must be at least 2")
+    if any(not 0 < alpha <= 1 for alpha in window_features.get("ewm", [])):
+        raise ValueError("ewm smoothing factors must be in (0, 1]")
+
+
+def _series_starts(series_codes: np.ndarray) -> np.ndarray:
+    """Row of the first row of the series of every row of a sorted panel"""
+    rows = np.arange(len(series_codes))
+    is_start = np.ones(len(series_codes), dtype=bool)
+    is_start[1:] = series_codes[1:] != series_codes[:-1]
+    return np.maximum.accumulate(np.where(is_start, rows, 0))
+
+
+def _series_centers(y: np.ndarray, series_codes: np.ndarray, n_series: int):
+    """Mean of the observed values of every series, 0 if there are none"""
+    observed = ~np.isnan(y)
+    sums = np.bincount(series_codes[observed], y[observed], minlength=n_series)
+    counts = np.bincount(series_codes[observed], minlength=n_series)
+    centers = np.zeros(n_series)
+    np.divide(sums, counts, out=centers, where=counts > 0)
+    return centers
+
+
+def _rolling_stat(sums, sums_sq, counts, w, stat) -> np.ndarray:
+    """Rolling mean or std of windows of w values from their (centered) sums"""
+    full = counts == w
+    if stat == "mean":
+        return np.where(full, sums / w, np.nan)
+    var = np.maximum(sums_sq - sums**2 / w, 0) / (w - 1)
+    return np.where(full, np.sqrt(var), np.nan)
+
+
+def _ewm(y: np.ndarray, positions: np.ndarray, alphas: np.ndarray) -> np.ndarray:
+    """EWM of every row of a sorted panel, (rows, alphas)
+
+    The recursion runs over the positions within the series, every iteration
+    advancing all the series that have a row at that position.
+    """
+    ewm = np.full((len(y), len(alphas)), np.nan)
+    if len(y) == 0:
+        return ewm
+    by_position = np.argsort(positions, kind="stable")
+    bounds = np.cumsum(np.bincount(positions))
+    starts = bounds - np.bincount(positions)
+    for start, stop in zip(starts, bounds):
+        rows = by_position[slice(start, stop)]
+        values = y[rows][:, np.newaxis]
+        if start == 0:
+            ewm[rows] = values
+            continue
+        ewm[rows] = _ewm_step(ewm[rows - 1], values, alphas)
+    return ewm
+
+
+def _ewm_step(previous, values, alphas):
+    updated = alphas * values + (1 - alphas) * previous
+    updated = np.where(np.isnan(previous), values, updated)
+    return np.where(np.isnan(values), previous, updated)
+
+
+def window_feature_values(
+    y: np.ndarray, series_codes: np.ndarray, window_features: dict
+) -> np.ndarray:
+    """Statistics of every row of a panel sorted by (id, date), (rows, names)
+
+    The rolling sums are differences of cumulative sums and the expanding
+    sums cumulative sums from the start of the series, so every statistic is
+    computed in O(rows) whatever the window. The values are centered on the
+    mean of their series first to limit the cancellation in the differences.
+    """
+    _check_window_features(window_features)
+    n_series = int(series_codes.max()) + 1 if len(series_codes) > 0 else 0
+    observed = ~np.isnan(y)
+    centers = _series_centers(y, series_codes, n_series)[series_codes]
+    y_centered = np.where(observed, y - centers, 0.0)
+    cum_sums = np.concatenate([[0.0], np.cumsum(y_centered)])
+    cum_sums_sq = np.concatenate([[0.0], np.cumsum(y_centered**2)])
+    cum_counts = np.concatenate([[0], np.cumsum(observed)])
+    rows = np.arange(len(y))
+    series_starts = _series_starts(series_codes)
+
+    columns = []
+    for stat in ["mean", "std"]:
+        for w in window_features.get(f"rolling_{stat}", []):
+            window_starts = np.maximum(rows + 1 - w, series_starts)
+            sums = cum_sums[rows + 1] - cum_sums[window_starts]
+            sums_sq = cum_sums_sq[rows + 1] - cum_sums_sq[window_starts]
+            counts = cum_counts[rows + 1] - cum_counts[window_starts]
+            values = _rolling_stat(sums, sums_sq, counts, w, stat)
+            columns.append(values + centers if stat == "mean" else values)
+    if window_features.get("expanding_mean", False):
+        sums = cum_sums[rows + 1] - cum_sums[series_starts]
+        counts = cum_counts[rows + 1] - cum_counts[series_starts]
+        means = np.full(len(y), np.nan)
+        np.divide(sums, counts, out=means, where=counts > 0)
+        columns.append(means + centers)
+    alphas = np.asarray(window_features.get("ewm", []), dtype=np.float64)
+    if len(alphas) > 0:
+        columns += list(_ewm(y, rows - series_starts, alphas).T)
+
+    if len(columns) == 0:
+        return np.empty((len(y), 0))
+    return np.column_stack(columns)
+
+
+class WindowState:
+    """Running statistics of the last values of every series
+
+    Holds, per series, the last values in a ring buffer as long as the longest
+    rolling window, the running (centered) sums of every rolling window, the
+    expanding sum and count and the EWMs. push adds one value per series and
+    updates every statistic in O(1): the value leaving each rolling window is
+    read from the ring buffer and subtracted from its sums.
+
+    Parameters
+    ----------
+    window_features : dict
+        statistics to keep, see window_feature_names
+    history : np.ndarray
+        (series, longest window) last values of every series, newest first
+    expanding_sum, expanding_count : np.ndarray
+        sum and count of the observed values of every series
+    ewm : np.ndarray
+        (series, alphas) EWMs of every series
+    """
+
+    def __init__(self, window_features, history, expanding_sum, expanding_count, ewm):
+        self.window_features = window_features
+        self.alphas = np.asarray(window_features.get("ewm", []), dtype=np.float64)
+        self.windows = sorted(
+            set(window_features.get("rolling_mean", []))
+            | set(window_features.get("rolling_std", []))
+        )
+        self.history = np.array(history, dtype=np.float64)
+        self.expanding_sum = np.array(expanding_sum, dtype=np.float64)
+        self.expanding_count = np.array(expanding_count, dtype=np.int64)
+        self.ewm = np.array(ewm, dtype=np.float64)
+        n_series, history_length = self.history.shape
+        # column of the newest value of every series in the ring buffer
+        self._head = np.zeros(n_series, dtype=np.int64)
+        self.n_features = len(window_feature_names("", window_features))
+        # the rolling sums are of the values centered on the mean of the history
+        history_counts = (~np.isnan(self.history)).sum(axis=1)
+        self._center = np.zeros(n_series)
+        np.divide(
+            np.nansum(self.history, axis=1),
+            history_counts,
+            out=self._center,
+            where=history_counts > 0,
+        )
+        self._sums, self._sums_sq, self._counts = {}, {}, {}
+        for w in self.windows:
+            window = self.history[:, slice(0, w)] - self._center[:, np.newaxis]
+            self._sums[w] = np.nansum(window, axis=1)
+            self._sums_sq[w] = np.nansum(window**2, axis=1)
+            self._counts[w] = (~np.isnan(window)).sum(axis=1)
+
+    def __len__(self):
+        return len(self.history)
+
+    @classmethod
+    def from_sorted(
+        cls, y, series_codes, n_series, window_features, values=None
+    ) -> "WindowState":
+        """State at the last row of every series of a panel sorted by (id, date)
+
+        values are the window_feature_values of the rows, if already computed.
+        """
+        windows = window_features.get("rolling_mean", []) + window_features.get(
+            "rolling_std", []
+        )
+        history_length = max(windows, default=0)
+        counts = np.bincount(series_codes, minlength=n_series)
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        history = np.full((n_series, history_length), np.nan)
+        for lag in range(history_length):
+            positions = ends - 1 - lag
+            valid = positions >= starts
+            history[valid, lag] = y[positions[valid]]
+
+        observed = ~np.isnan(y)
+        expanding_sum = np.bincount(
+            series_codes[observed], y[observed], minlength=n_series
+        )
+        expanding_count = np.bincount(series_codes[observed], minlength=n_series)
+
+        n_alphas = len(window_features.get("ewm", []))
+        ewm = np.full((n_series, n_alphas), np.nan)
+        if n_alphas > 0:
+            if values is None:
+                values = window_feature_values(y, series_codes, window_features)
+            has_rows = counts > 0
+            ewm_cols = slice(values.shape[1] - n_alphas, values.shape[1])
+            ewm[has_rows] = values[ends[has_rows] - 1, ewm_cols]
+        return cls(window_features, history, expanding_sum, expanding_count, ewm)
+
+    def lags(self) -> np.ndarray:
+        """(series, longest window) last values, newest first"""
+        history_length = self.history.shape[1]
+        columns = (self._head[:, np.newaxis] + np.arange(history_length)) % max(
+            history_length, 1
+        )
+        return np.take_along_axis(self.history, columns, axis=1)
+
+    def take(self, series) -> "WindowState":
+        """State of a subset of the series"""
+        return WindowState(
+            self.window_features,
+            self.lags()[series],
+            self.expanding_sum[series],
+            self.expanding_count[series],
+            self.ewm[series],
+        )
+
+    @classmethod
+    def concat(cls, states: list) -> "WindowState":
+        return cls(
+            states[0].window_features,
+            np.concatenate([state.lags() for state in states]),
+            np.concatenate([state.expanding_sum for state in states]),
+            np.concatenate([state.expanding_count for state in states]),
+            np.concatenate([state.ewm for state in states]),
+        )
+
+    def copy(self) -> "WindowState":
+        return self.take(np.arange(len(self)))
+
+    def push(self, values: np.ndarray, series=None):
+        """Add a value to every series, or to the given series only"""
+        if series is None:
+            series = np.arange(len(self))
+        values = np.asarray(values, dtype=np.float64)
+        observed = ~np.isnan(values)
+        centered = np.where(observed, values - self._center[series], 0.0)
+        history_length = self.history.shape[1]
+        for w in self.windows:
+            leaving = self.history[
+                series, (self._head[series] + w - 1) % history_length
+            ]
+            leaving_observed = ~np.isnan(leaving)
+            leaving = np.where(leaving_observed, leaving - self._center[series], 0.0)
+            self._sums[w][series] += centered - leaving
+            self._sums_sq[w][series] += centered**2 - leaving**2
+            self._counts[w][series] += observed.astype(np.int64) - leaving_observed
+        if history_length > 0:
+            self._head[series] = (self._head[series] - 1) % history_length
+            self.history[series, self._head[series]] = values
+        self.expanding_sum[series] += np.where(observed, values, 0.0)
+        self.expanding_count[series] += observed
+        if len(self.alphas) > 0:
+            self.ewm[series] = _ewm_step(
+                self.ewm[series], values[:, np.newaxis], self.alphas
+            )
+
+    def features(self, series=None) -> np.ndarray:
+        """Statistics of every series, or of the given series, (series, names)"""
+        if series is None:
+            series = np.arange(len(self))
+        columns = []
+        for stat in ["mean", "std"]:
+            for w in self.window_features.get(f"rolling_{stat}", []):
+                values = _rolling_stat(
+                    self._sums[w][series],
+                    self._sums_sq[w][series],
+                    self._counts[w][series],
+                    w,
+                    stat,
+                )
+                columns.append(
+                    values + self._center[series] if stat == "mean" else values
+                )
+        if self.window_features.get("expanding_mean", False):
+            counts = self.expanding_count[series]
+            means = np.full(len(series), np.nan)
+            np.divide(self.expanding_sum[series], counts, out=means, where=counts > 0)
+            columns.append(means)
+        columns += list(self.ewm[series].T)
+        if len(columns) == 0:
+            return np.empty((len(series), 0))
+        return np.column_stack(columns)
+
+    def push_rows(self, values: np.ndarray, series_codes: np.ndarray) -> np.ndarray:
+        """Add rows sorted by (series, date) and return their statistics
+
+        The rows are added one position within their series at a time, so
+        every row's statistics include the earlier new rows of its series.
+        """
+        features = np.empty((len(values), self.n_features))
+        if len(values) == 0:
+            return features
+        positions = np.arange(len(values)) - _series_starts(series_codes)
+        for position in range(int(positions.max()) + 1):
+            rows = np.flatnonzero(positions == position)
+            self.push(values[rows], series_codes[rows])
+            features[rows] = self.features(series_codes[rows])
+        return features
@@ -0,0 +1,234 @@
+"""Panel container indexed once by (id, period)"""
+import numpy as np
+import pandas as pd
+from dsf_utils.storage import PanelStore
+
+
+def segment_rows(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Concatenated positions of the [start, stop) segments"""
+    lengths = stops - starts
+    total = lengths.sum()
+    if total == 0:
+        return np.array([], dtype=np.int64)
+    segment_offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - segment_offsets, lengths) + np.arange(total)
+
+
+class PanelFrame:
+    """Panel sorted by (id, period) with the row offsets of each series
+
+    Every series is a contiguous block of rows of the sorted frame, so a
+    series is a slice of the sorted columns, found with a hash lookup of its id
+    and the offsets, and the rows of a date window are found with a binary
+    search per series instead of a boolean filter over the whole panel.
+
+    A PanelFrame can be used in place of the panel dataframe in
+    single_region_ts, the plotting functions, the panel evaluation and the
+    panel forecasters.
+
+    Parameters
+    ----------
+    panel_df : pd.DataFrame
+        panel with a period (or datetime) index and a time series id column
+    ts_id_col : str, optional
+        name of the time series id column. By default "REGION"
+    freq : str, optional
+        pandas period frequency, used if the index is not a PeriodIndex. By
+        default "W-SUN"
+    """
+
+    def __init__(
+        self, panel_df: pd.DataFrame, ts_id_col: str = "REGION", freq: str = "W-SUN"
+    ):
+        periods = panel_df.index
+        if not isinstance(periods, pd.PeriodIndex):
+            periods = pd.PeriodIndex(periods, freq=freq)
+        series_codes, ts_ids = pd.factorize(panel_df[ts_id_col], sort=True)
+        order = np.lexsort((periods.asi8, series_codes))
+
+        self.ts_id_col = ts_id_col
+        self.freq = periods.freqstr
+        self.frame = panel_df.iloc[order]
+        self.periods = periods[order]
+        self.period_dtype = periods.dtype
+        self.ordinals = self.periods.asi8
+        self.series_codes = series_codes[order]
+        self.ts_ids = pd.Index(np.asarray(ts_ids))
+        self._columns = {}
+        counts = np.bincount(self.series_codes, minlength=len(ts_ids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        # (id, period) key of every row, increasing along the sorted frame
+        self._ordinal_span = self.ordinals.max() - self.ordinals.min() + 2
+        self._min_ordinal = self.ordinals.min()
+        self._keys = self.series_codes * self._ordinal_span + (
+            self.ordinals - self._min_ordinal
+        )
+
+    def __len__(self):
+        return len(self.ts_ids)
+
+    def __contains__(self, ts_id):
+        return ts_id in self.ts_ids
+
+    def __iter__(self):
+        return iter(self.ts_ids)
+
+    @property
+    def columns(self) -> pd.Index:
+        return self.frame.columns
+
+    def column_values(self, column: str) -> np.ndarray:
+        """Values of a column in the (id, period) order, converted once"""
+        if column not in self._columns:
+            self._columns[column] = self.frame[column].to_numpy()
+        return self._columns[column]
+
+    def series_bounds(self, ts_id) -> tuple:
+        """(start, stop) rows of a series in the sorted frame"""
+        try:
+            code = self.ts_ids.get_loc(ts_id)
+        except KeyError:
+            raise KeyError(f"{ts_id} is not a series of the panel") from None
+        return self.offsets[code], self.offsets[code + 1]
+
+    def series(self, ts_id, column: str) -> pd.Series:
+        """Column of a single series indexed by period, sorted by date
+
+        The values are a view of the sorted column, the series must not be
+        modified in place.
+        """
+        start, stop = self.series_bounds(ts_id)
+        rows = slice(start, stop)
+        return pd.Series(
+            self.column_values(column)[rows],
+            index=self.periods[rows],
+            name=column,
+            copy=False,
+        )
+
+    def series_frame(self, ts_id) -> pd.DataFrame:
+        """Rows of a single series, sorted by date"""
+        start, stop = self.series_bounds(ts_id)
+        return self.frame.iloc[slice(start, stop)]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Panel dataframe sorted by (id, period)"""
+        return self.frame
+
+    def _ordinal(self, date) -> int:
+        return pd.Period(date, freq=self.period_dtype.freq).ordinal
+
+    def window_bounds(self, start=None, end=None) -> tuple:
+        """Row bounds of the dates between start and end (inclusive) per series
+
+        Returns
+        -------
+        tuple
+            (starts, stops) arrays with a [start, stop) range of rows of the
+            sorted frame for each series
+        """
+        series_keys = np.arange(len(self.ts_ids)) * self._ordinal_span
+        if start is None:
+            starts = self.offsets[:-1]
+        else:
+            start = np.clip(self._ordinal(start) - self._min_ordinal, 0, None)
+            start = min(start, self._ordinal_span - 1)
+            starts = np.searchsorted(self._keys, series_keys + start, side="left")
+        if end is None:
+            stops = self.offsets[1:]
+        else:
+            end = np.clip(self._ordinal(end) - self._min_ordinal, -1, None)
+            end = min(end, self._ordinal_span - 2)
+            stops = np.searchsorted(self._keys, series_keys + end, side="right")
+        return starts, np.maximum(starts, stops)
+
+    def window_rows(self, start=None, end=None) -> np.ndarray:
+        """Positions in the sorted frame of the rows between start and end"""
+        return segment_rows(*self.window_bounds(start, end))
+
+    def window(self, start=None, end=None) -> pd.DataFrame:
+        """Rows of the panel between start and end (inclusive), sorted by id"""
+        return self.frame.iloc[self.window_rows(start, end)]
+
+    def wide_values(self, column: str, start, end) -> np.ndarray:
+        """Values of a column between start and end as a (series, date) array
+
+        Dates missing from a series are NaN.
+        """
+        rows = self.window_rows(start, end)
+        n_dates = self._ordinal(end) - self._ordinal(start) + 1
+        values = np.full((len(self.ts_ids), n_dates), np.nan)
+        values[self.series_codes[rows], self.ordinals[rows] - self._ordinal(start)] = (
+            self.column_values(column)[rows]
+        )
+        return values
+
+
+def _check_ts_id_col(data, ts_id_col):
+    if data.ts_id_col != ts_id_col:
+        raise ValueError(
+            f"The panel has {data.ts_id_col} as time series id, not {ts_id_col}"
+        )
+
+
+def panel_dataframe(data, ts_id_col, target_col, freq) -> pd.DataFrame:
+    """Panel dataframe from a dataframe, a PanelFrame or a PanelStore"""
+    if isinstance(data, PanelFrame):
+        _check_ts_id_col(data, ts_id_col)
+        return data.to_frame()
+    if isinstance(data, PanelStore):
+        _check_ts_id_col(data, ts_id_col)
+        return data.read_panel(target_col=target_col, freq=freq)
+    return data
+
+
+def as_panel_frame(data, ts_id_col, target_col, freq) -> PanelFrame:
+    """PanelFrame from a dataframe or a PanelStore, a PanelFrame is reused"""
+    if isinstance(data, PanelFrame):
+        _check_ts_id_col(data, ts_id_col)
+        return data
+    return PanelFrame(
+        panel_dataframe(data, ts_id_col, target_col, freq),
+        ts_id_col=ts_id_col,
+        freq=freq,
+    )
+
+
+def series_chunks(data, ts_id_col, target_col, freq, chunk_size: int) -> tuple:
+    """Sorted ids of a panel and an iterator over panels of chunk_size series
+
+    The chunks hold consecutive series in the sorted order of the ids. From a
+    PanelStore every chunk is read on its own, so only one chunk of the panel
+    is in memory at a time.
+
+    Returns
+    -------
+    tuple
+        (ts_ids, chunks), an array of the sorted ids and an iterator over the
+        panel dataframes of the chunks
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be a positive integer, not {chunk_size}")
+    if isinstance(data, PanelStore):
+        _check_ts_id_col(data, ts_id_col)
+        ts_ids = data.regions()
+
+        def chunks():
+            for start in range(0, len(ts_ids), chunk_size):
+                yield data.read_panel(
+                    target_col=target_col,
+                    regions=list(ts_ids[slice(start, start + chunk_size)]),
+                    freq=freq,
+                )
+
+        return ts_ids, chunks()
+
+    panel = as_panel_frame(data, ts_id_col, target_col, freq)
+    ts_ids = np.asarray(panel.ts_ids)
+
+    def chunks():
+        for start in range(0, len(ts_ids), chunk_size):
+            stop = min(start + chunk_size, len(ts_ids))
+            yield panel.frame.iloc[slice(panel.offsets[start], panel.offsets[stop])]
+
+    return ts_ids, chunks()
@@ -3,6 +3,7 @@ from sktime.utils.plotting import plot_series
 import pandas as pd
 from matplotlib import pyplot as plt
 from ipywidgets import widgets
+from dsf_utils.panel import PanelFrame
 from dsf_utils.preprocessing import single_region_ts
 
 
@@ -20,11 +21,21 @@ def plot_cv_results(time_series: pd.Series, df: pd.DataFrame):
         plt.show()
 
 
+def _regions(panel_df) -> list:
+    if isinstance(panel_df, PanelFrame):
+        return list(panel_df.ts_ids)
+    return list(panel_df["REGION"].unique())
+
+
 def plot_panel_cv_results(panel_df, eval_df, region, start_date="2018-01-01"):
     start_date = pd.Period(start_date, freq="W-SUN")
-    ts = panel_df[(panel_df["REGION"] == region) & (panel_df.index >= start_date)][
-        "ILITOTAL"
-    ]
+    if isinstance(panel_df, PanelFrame):
+        ts = panel_df.series(region, "ILITOTAL")
+        ts = ts[ts.index >= start_date]
+    else:
+        ts = panel_df[(panel_df["REGION"] == region) & (panel_df.index >= start_date)][
+            "ILITOTAL"
+        ]
     _eval_df = eval_df[eval_df["REGION"] == region]
     plot_list = [_eval_df["y_pred"].iloc[i].sort_index() for i in range(len(_eval_df))]
     plot_series(
@@ -38,7 +49,7 @@ def plot_panel_cv_results(panel_df, eval_df, region, start_date="2018-01-01"):
 
 
 def plot_interactive_panel_cv_results(panel_df, eval_df, start_date="2018-01-01"):
-    regions = list(panel_df["REGION"].unique())
+    regions = _regions(panel_df)
     _ = widgets.interact(
         plot_panel_cv_results,
         panel_df=widgets.fixed(panel_df),
@@ -49,10 +60,13 @@ def plot_interactive_panel_cv_results(panel_df, eval_df, start_date="2018-01-01"
 
 
 def plot_region_from_panel(panel_df, pred_df, region, start_date="2018-01-01"):
-    _panel_df = panel_df.copy()
     start_date = pd.Period(start_date, freq="W-SUN")
-    _panel_df = _panel_df[panel_df.index >= start_date]
-    actuals = single_region_ts(_panel_df, region)
+    if isinstance(panel_df, PanelFrame):
+        actuals = single_region_ts(panel_df, region)
+        actuals = actuals[actuals.index >= start_date]
+    else:
+        _panel_df = panel_df[panel_df.index >= start_date]
+        actuals = single_region_ts(_panel_df, region)
     pred = single_region_ts(pred_df, region, y_name="y_pred")
     plot_series(actuals, pred, labels=["actual", "pred"])
     plt.title(f"{region}")
@@ -60,7 +74,7 @@ def plot_region_from_panel(panel_df, pred_df, region, start_date="2018-01-01"):
 
 
 def plot_interactive_panel_series(panel_df, pred_df, start_date="2018-01-01"):
-    regions = list(panel_df["REGION"].unique())
+    regions = _regions(panel_df)
     _ = widgets.interact(
         plot_region_from_panel,
         panel_df=widgets.fixed(panel_df),
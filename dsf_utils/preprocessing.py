@@ -1,6 +1,29 @@
 """Data Preprocessing Functions"""
+import numpy as np
 import pandas as pd
 import epiweeks as epi
+from pandas.api.types import union_categoricals
+from dsf_utils.panel import PanelFrame
+from dsf_utils.storage import PanelStore
+
+# columns of the ILINet extracts that are not surveillance metrics
+_ILINET_ID_COLS = ["REGION TYPE", "REGION", "YEAR", "WEEK"]
+_ILINET_DTYPES = {"REGION TYPE": str, "REGION": str}
+
+
+def _filter_raw_data(raw_df, start_date, end_date, drop_regions):
+    start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    # a MMWR week of year Y ends between the 4th of January of Y and the 3rd of
+    # January of Y + 1, so rows outside these years are dropped before conversion
+    df = raw_df[
+        (~raw_df["REGION"].isin(drop_regions))
+        & (raw_df["YEAR"] >= start_date.year - 1)
+        & (raw_df["YEAR"] <= end_date.year)
+    ].copy()
+
+    df["ds_wsun"] = epiweek_end_dates(df["YEAR"], df["WEEK"])
+    df = df[(df["ds_wsun"] >= start_date) & (df["ds_wsun"] <= end_date)]
+    return df
 
 
 def process_raw_data(
@@ -9,18 +32,116 @@ def process_raw_data(
     end_date="01-01-2020",
     drop_regions=["Florida", "Commonwealth of the Northern Mariana Islands"],
 ):
-    df = raw_df.copy()
-
-    df["ds_wsun"] = df[["YEAR", "WEEK"]].apply(epiweeks_from_df, axis=1)
-    df["ds_wsun"] = pd.to_datetime(df["ds_wsun"])
-    df = df[
-        (~df["REGION"].isin(drop_regions))
-        & (df["ds_wsun"] >= start_date)
-        & (df["ds_wsun"] <= end_date)
-    ]
+    return _filter_raw_data(raw_df, start_date, end_date, drop_regions)
+
+
+def _compact_dtypes(df):
+    """int16 YEAR/WEEK, categorical REGION and float32 metrics"""
+    df["YEAR"] = df["YEAR"].astype(np.int16)
+    df["WEEK"] = df["WEEK"].astype(np.int16)
+    for col in df.columns:
+        if col in ["REGION TYPE", "REGION"]:
+            df[col] = df[col].astype("category")
+        elif col not in _ILINET_ID_COLS + ["ds_wsun"]:
+            # sentinel values that are not in na_values are coerced to NaN too
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(np.float32)
     return df
 
 
+def iter_raw_data(
+    path,
+    start_date="01-01-2014",
+    end_date="01-01-2020",
+    drop_regions=["Florida", "Commonwealth of the Northern Mariana Islands"],
+    chunksize=100_000,
+    na_values=["X"],
+):
+    """Read an ILINet-style CSV in chunks and yield the processed chunks
+
+    The region and date filters of process_raw_data are applied to every chunk
+    before the epiweek conversion and the chunks are converted to compact dtypes,
+    so only one raw chunk is held in memory at a time.
+
+    Parameters
+    ----------
+    path : str
+        path of the CSV file
+    start_date : str, optional
+        first week end-date to keep. By default "01-01-2014"
+    end_date : str, optional
+        last week end-date to keep. By default "01-01-2020"
+    drop_regions : list, optional
+        regions to drop. By default ["Florida", "Commonwealth of the Northern
+        Mariana Islands"]
+    chunksize : int, optional
+        number of CSV rows per chunk. By default 100_000
+    na_values : list, optional
+        values read as NaN. By default ["X"]
+
+    Yields
+    ------
+    pd.DataFrame
+        processed chunk with the columns of process_raw_data, REGION as a
+        category, YEAR and WEEK as int16 and the metrics as float32
+    """
+    reader = pd.read_csv(
+        path,
+        chunksize=chunksize,
+        na_values=na_values,
+        dtype=_ILINET_DTYPES,
+    )
+    for chunk in reader:
+        chunk = _filter_raw_data(chunk, start_date, end_date, drop_regions)
+        if len(chunk) > 0:
+            yield _compact_dtypes(chunk)
+
+
+def load_raw_data(
+    path,
+    start_date="01-01-2014",
+    end_date="01-01-2020",
+    drop_regions=["Florida", "Commonwealth of the Northern Mariana Islands"],
+    chunksize=100_000,
+    na_values=["X"],
+):
+    """Streaming equivalent of reading a CSV and calling process_raw_data
+
+    See iter_raw_data for the parameters, the chunks are concatenated with the
+    categories of REGION unified across chunks.
+
+    Returns
+    -------
+    pd.DataFrame
+        processed panel, without rows but with the columns and dtypes of the
+        chunks if no row is in the date range
+    """
+    chunks = list(
+        iter_raw_data(
+            path,
+            start_date=start_date,
+            end_date=end_date,
+            drop_regions=drop_regions,
+            chunksize=chunksize,
+            na_values=na_values,
+        )
+    )
+    if len(chunks) == 0:
+        # only the header is read, processed like the chunks
+        header = pd.read_csv(path, nrows=0, dtype=_ILINET_DTYPES)
+        return _compact_dtypes(
+            _filter_raw_data(header, start_date, end_date, drop_regions)
+        )
+
+    for col in ["REGION TYPE", "REGION"]:
+        if col in chunks[0].columns:
+            categories = union_categoricals(
+                [chunk[col] for chunk in chunks], sort_categories=True
+            ).categories
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks)
+
+
 def epiweeks_from_df(year_week_row):
     """
     Takes an array of the form (year, week) and returns the MMWR week end-date (Sunday)
@@ -28,7 +149,54 @@ def epiweeks_from_df(year_week_row):
     return epi.Week(year_week_row[0], year_week_row[1]).enddate()
 
 
+def _mmwr_year_start(years: np.ndarray) -> np.ndarray:
+    """Start date (Sunday) of MMWR week 1 for each year
+
+    Week 1 is the first Sunday-to-Saturday week with at least four days in the
+    calendar year, i.e. the week that contains the 4th of January.
+    """
+    jan_4th = (years - 1970).astype("datetime64[Y]").astype("datetime64[D]") + 3
+    # 1970-01-01 was a Thursday, so (days + 4) % 7 is the number of days since Sunday
+    days_since_sunday = (jan_4th.astype(np.int64) + 4) % 7
+    return jan_4th - days_since_sunday.astype("timedelta64[D]")
+
+
+def epiweek_end_dates(years, weeks) -> np.ndarray:
+    """Vectorized MMWR week end-date (Saturday) for arrays of years and weeks
+
+    Column-wise equivalent of ``epiweeks_from_df``, returns the same dates as
+    ``epiweeks.Week(year, week).enddate()`` without creating a Week per row.
+
+    Parameters
+    ----------
+    years : array-like
+        MMWR years
+    weeks : array-like
+        MMWR weeks, must be within the number of weeks of the respective year
+
+    Returns
+    -------
+    np.ndarray
+        datetime64[ns] array of week end-dates
+    """
+    years = np.asarray(years, dtype=np.int64)
+    weeks = np.asarray(weeks, dtype=np.int64)
+    year_start = _mmwr_year_start(years)
+    total_weeks = (_mmwr_year_start(years + 1) - year_start).astype(np.int64) // 7
+    if ((weeks < 1) | (weeks > total_weeks)).any():
+        raise ValueError("Week must be within the number of weeks of the year")
+
+    end_dates = year_start + (7 * (weeks - 1) + 6).astype("timedelta64[D]")
+    return end_dates.astype("datetime64[ns]")
+
+
 def single_region_ts(df, region, y_name="ILITOTAL"):
+    if isinstance(df, PanelFrame):
+        return df.series(region, y_name)
+    if isinstance(df, PanelStore):
+        # only the partition of the region is read from the store
+        series = df.read_panel(target_col=y_name, regions=[region])[y_name]
+        return series.sort_index()
     df = df.copy()
     df = df[df["REGION"] == region]
     if "ds_wsun" in list(df.columns):
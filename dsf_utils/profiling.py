@@ -0,0 +1,154 @@
+"""Wall time and peak memory of the stages of a backtest"""
+import contextvars
+import time
+import tracemalloc
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+_active_profiler = contextvars.ContextVar("active_profiler", default=None)
+# stages open in the current process, every stage keeps the peak of the memory
+# traced since it started, across nested stages and profilers
+_open_stages = []
+
+
+def _checkpoint_memory():
+    """Fold the traced peak into the open stages and reset it"""
+    if not tracemalloc.is_tracing():
+        return
+    _, peak = tracemalloc.get_traced_memory()
+    for open_stage in _open_stages:
+        open_stage["peak"] = max(open_stage["peak"], peak)
+    tracemalloc.reset_peak()
+
+
+class Profiler:
+    """Recorder of the wall time and peak memory of backtest stages
+
+    Used as a context manager, the profiler is active in the enclosed code and
+    the stages of the evaluation functions and the panel forecasters, e.g.
+    features, fit, predict and score, are recorded with labels such as the
+    cutoff, the forecaster, the horizon step or the series. Stages are nested,
+    the labels of the enclosing stages are added to the records of the inner
+    ones. The records of a profiler nested in another are also passed to the
+    outer one.
+
+    Peak memory is the peak of the memory allocated by Python during the stage
+    above the memory allocated when it started, traced with tracemalloc. The
+    per horizon and per series fits, which can run in parallel workers, only
+    have a wall time.
+
+    Parameters
+    ----------
+    trace_memory : bool, optional
+        whether to trace the peak memory, tracemalloc slows down allocations.
+        By default True
+    callback : callable, optional
+        function called with every record (a dict) when it is recorded. By
+        default None
+    propagate : bool, optional
+        whether to pass the records to the enclosing profiler on exit. By
+        default True
+    """
+
+    def __init__(self, trace_memory: bool = True, callback=None, propagate=True):
+        self.trace_memory = trace_memory
+        self.callback = callback
+        self.propagate = propagate
+        self.records = []
+        self._labels = {}
+        self._parent = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        self._parent = _active_profiler.get()
+        self._token = _active_profiler.set(self)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, *exc_info):
+        _active_profiler.reset(self._token)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        if self.propagate and self._parent is not None:
+            self._parent.extend(self.records)
+        return False
+
+    def record(self, stage: str, wall_time: float, peak_memory=np.nan, **labels):
+        """Add a record with the labels of the enclosing stages"""
+        record = {
+            **self._labels,
+            **labels,
+            "stage": stage,
+            "wall_time": wall_time,
+            "peak_memory": peak_memory,
+        }
+        self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def extend(self, records: list, **labels):
+        """Add records made elsewhere, e.g. by a profiler of a worker"""
+        for record in records:
+            record = {**self._labels, **labels, **record}
+            self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    @contextmanager
+    def stage(self, name: str, **labels):
+        """Record the wall time and peak memory of the enclosed code"""
+        outer_labels = self._labels
+        self._labels = {**outer_labels, **labels}
+        _checkpoint_memory()
+        current = tracemalloc.get_traced_memory()[0]
+        open_stage = {"peak": current}
+        _open_stages.append(open_stage)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            wall_time = time.perf_counter() - start
+            _checkpoint_memory()
+            del _open_stages[
+                next(i for i, s in enumerate(_open_stages) if s is open_stage)
+            ]
+            peak_memory = (
+                open_stage["peak"] - current if tracemalloc.is_tracing() else np.nan
+            )
+            self._labels = outer_labels
+            self.record(name, wall_time, peak_memory, **labels)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Records as a frame with the stage, wall_time, peak_memory and labels"""
+        frame = pd.DataFrame(self.records)
+        if len(frame) == 0:
+            return pd.DataFrame(columns=["stage", "wall_time", "peak_memory"])
+        first_cols = ["stage", "wall_time", "peak_memory"]
+        return frame[first_cols + [c for c in frame.columns if c not in first_cols]]
+
+
+def current_profiler():
+    """Active profiler of the current context, None if there isn't one"""
+    return _active_profiler.get()
+
+
+@contextmanager
+def stage(name: str, **labels):
+    """Stage of the active profiler, does nothing if no profiler is active"""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield None
+    else:
+        with profiler.stage(name, **labels):
+            yield profiler
+
+
+def timed(func, *args, **kwargs) -> tuple:
+    """Call func and return a (result, wall time in seconds) tuple"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
@@ -0,0 +1,339 @@
+"""Long-lived batch inference server for fitted panel forecasters"""
+import asyncio
+import collections
+import json
+import pickle
+import socket
+import time
+import numpy as np
+import pandas as pd
+from dsf_utils.models import DirectLGBMGlobalForecaster
+
+
+def _prediction_steps(pred_df: pd.DataFrame, ts_id_col: str, fh) -> np.ndarray:
+    """Step of fh of every row of a prediction frame
+
+    The rows of every series are the steps of fh in date order, every series
+    being forecasted from its own last date.
+    """
+    index = pred_df.index
+    dates = pd.Series(index.asi8 if hasattr(index, "asi8") else index.to_numpy())
+    ranks = dates.groupby(pred_df[ts_id_col].to_numpy(), observed=True).rank(
+        method="first"
+    )
+    return np.asarray(fh)[ranks.to_numpy(dtype=np.int64) - 1]
+
+
+def _check_fh(fh) -> np.ndarray:
+    fh = np.asarray(fh).ravel()
+    if fh.size == 0 or not np.issubdtype(fh.dtype, np.integer) or np.any(fh < 1):
+        raise ValueError(f"fh must be a list of positive integers, not {fh}")
+    return np.unique(fh)
+
+
+def _set_exception(batch: list, exception: Exception):
+    for _, _, future in batch:
+        if not future.done():
+            future.set_exception(exception)
+
+
+class PredictionServer:
+    """Batch inference server keeping fitted panel forecasters in memory
+
+    The forecasters (DirectLGBMGlobalForecaster, RecursiveLGBMGlobalForecaster,
+    SktimePanelForecaster or any forecaster returning a [ts_id_col, y_pred]
+    frame from predict(fh)) are loaded once. Requests for a model that arrive
+    within max_delay seconds of each other are micro-batched: the model
+    predicts the union of their horizons for all its series in one vectorized
+    call, run in a thread so the server keeps accepting requests, and every
+    request gets back only its own series and steps. A direct forecaster
+    always predicts the horizon it was fitted on, its models are per step.
+
+    The server listens on TCP or on a Unix socket. The protocol is one JSON
+    object per line, e.g. {"id": 1, "model": "lgbm", "fh": [1, 2, 3],
+    "series": ["Alabama"]}, answered by one line {"id": 1, "predictions":
+    [{"REGION": "Alabama", "date": "2020-01-05/2020-01-11", "y_pred": 12.3},
+    ...]} or {"id": 1, "error": "..."}. Without "series" all the series are
+    returned. A {"stats": true} request returns the latency percentiles and
+    batch sizes of the models.
+
+    Parameters
+    ----------
+    forecasters : dict
+        fitted forecasters by model name
+    max_delay : float, optional
+        seconds the first request of a batch waits for other requests. By
+        default 0.005
+    max_batch_size : int, optional
+        maximum number of requests in a batch. By default 256
+    latency_window : int, optional
+        number of latest requests kept for the latency percentiles. By default
+        10_000
+    """
+
+    def __init__(
+        self,
+        forecasters: dict,
+        max_delay: float = 0.005,
+        max_batch_size: int = 256,
+        latency_window: int = 10_000,
+    ):
+        for name, forecaster in forecasters.items():
+            if not getattr(forecaster, "is_fitted", True):
+                raise ValueError(f"forecaster {name} must be fitted before serving")
+        self.forecasters = dict(forecasters)
+        self.max_delay = max_delay
+        self.max_batch_size = max_batch_size
+        self.latency_window = latency_window
+        self._latencies = {
+            name: collections.deque(maxlen=latency_window) for name in forecasters
+        }
+        self._batch_sizes = {
+            name: collections.deque(maxlen=latency_window) for name in forecasters
+        }
+        self._queues = {}
+        self._batch_tasks = []
+
+    @classmethod
+    def from_pickles(cls, paths: dict, **kwargs):
+        """Server of the forecasters pickled at paths, a dict by model name"""
+        forecasters = {}
+        for name, path in paths.items():
+            with open(path, "rb") as f:
+                forecasters[name] = pickle.load(f)
+        return cls(forecasters, **kwargs)
+
+    def _start_batching(self):
+        if len(self._batch_tasks) > 0:
+            return
+        for name in self.forecasters:
+            self._queues[name] = asyncio.Queue()
+            self._batch_tasks.append(asyncio.create_task(self._batch_loop(name)))
+
+    async def predict(self, model: str, fh, series=None) -> pd.DataFrame:
+        """Predictions of the requested series and steps, batched with others
+
+        Parameters
+        ----------
+        model : str
+            name of the forecaster
+        fh : list
+            forecasting horizon, positive integer steps
+        series : list, optional
+            time series ids to return, by default all
+
+        Returns
+        -------
+        pd.DataFrame
+            predictions in the layout returned by the forecaster
+        """
+        start = time.perf_counter()
+        if model not in self.forecasters:
+            raise ValueError(f"unknown model {model}")
+        fh = _check_fh(fh)
+        fitted_fh = self._fitted_fh(model)
+        if fitted_fh is not None and not np.isin(fh, fitted_fh).all():
+            raise ValueError(f"model {model} was fitted on fh {fitted_fh.tolist()}")
+        self._start_batching()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queues[model].put((fh, series, future))
+        pred_df = await future
+        self._latencies[model].append(time.perf_counter() - start)
+        return pred_df
+
+    def _fitted_fh(self, model):
+        forecaster = self.forecasters[model]
+        if isinstance(forecaster, DirectLGBMGlobalForecaster):
+            return np.asarray(forecaster._fit_fh)
+        return None
+
+    async def _batch_loop(self, model: str):
+        loop = asyncio.get_running_loop()
+        queue = self._queues[model]
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._batch_sizes[model].append(len(batch))
+            try:
+                await self._predict_batch(model, batch)
+            except Exception as e:
+                # a failed batch fails its requests, not the queue of the model
+                _set_exception(batch, e)
+
+    async def _predict_batch(self, model: str, batch: list):
+        forecaster = self.forecasters[model]
+        fh = self._fitted_fh(model)
+        if fh is None:
+            fh = np.unique(np.concatenate([request_fh for request_fh, _, _ in batch]))
+        try:
+            pred_df = await asyncio.get_running_loop().run_in_executor(
+                None, forecaster.predict, fh
+            )
+            ts_id_col = forecaster.ts_id_col
+            steps = _prediction_steps(pred_df, ts_id_col, fh)
+            ts_ids = pred_df[ts_id_col].to_numpy()
+            results = []
+            for request_fh, series, _ in batch:
+                rows = np.isin(steps, request_fh)
+                if series is not None:
+                    rows &= np.isin(ts_ids, list(series))
+                results.append(pred_df[rows])
+        except Exception as e:
+            _set_exception(batch, e)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def latency_percentiles(self, model=None, percentiles=(50, 90, 99)) -> dict:
+        """Percentiles of the request latencies in milliseconds
+
+        The latency of a request runs from its arrival to its predictions,
+        including the wait for the batch, over the latest latency_window
+        requests of the model, or of all the models if model is None.
+        """
+        if model is None:
+            latencies = [t for model_t in self._latencies.values() for t in model_t]
+        else:
+            latencies = list(self._latencies[model])
+        if len(latencies) == 0:
+            return {f"p{p}": np.nan for p in percentiles}
+        values = np.percentile(np.asarray(latencies) * 1000, percentiles)
+        return {f"p{p}": float(value) for p, value in zip(percentiles, values)}
+
+    def stats(self) -> dict:
+        """Requests, latency percentiles and mean batch size of every model"""
+        stats = {}
+        for model in self.forecasters:
+            batch_sizes = self._batch_sizes[model]
+            stats[model] = {
+                "requests": len(self._latencies[model]),
+                "latency_ms": self.latency_percentiles(model),
+                "mean_batch_size": (
+                    float(np.mean(batch_sizes)) if len(batch_sizes) > 0 else np.nan
+                ),
+            }
+        return stats
+
+    async def _handle_request(self, request: dict) -> dict:
+        reply = {"id": request.get("id")}
+        try:
+            if request.get("stats"):
+                reply["stats"] = self.stats()
+                return reply
+            model = request["model"]
+            pred_df = await self.predict(model, request["fh"], request.get("series"))
+            ts_id_col = self.forecasters[model].ts_id_col
+            reply["predictions"] = [
+                {
+                    ts_id_col: _json_value(ts_id),
+                    "date": str(date),
+                    "y_pred": _json_float(y_pred),
+                }
+                for ts_id, date, y_pred in zip(
+                    pred_df[ts_id_col], pred_df.index, pred_df["y_pred"]
+                )
+            ]
+        except Exception as e:
+            reply["error"] = f"{type(e).__name__}: {e}"
+        return reply
+
+    async def _handle_connection(self, reader, writer):
+        async def reply(line):
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                response = {"id": None, "error": f"JSONDecodeError: {e}"}
+            else:
+                response = await self._handle_request(request)
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+        # the requests of a connection are answered concurrently, matched by id
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(reply(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        """Start listening on host:port, or on the Unix socket at path
+
+        Returns the asyncio server, e.g. to call serve_forever or close on it.
+        """
+        self._start_batching()
+        if path is not None:
+            return await asyncio.start_unix_server(self._handle_connection, path=path)
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    def run(self, host="127.0.0.1", port=8765, path=None):
+        """Serve until interrupted"""
+
+        async def serve():
+            server = await self.start(host=host, port=port, path=path)
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(serve())
+
+
+def _json_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _json_float(value):
+    return None if np.isnan(value) else float(value)
+
+
+def request_predictions(
+    model: str, fh, series=None, host="127.0.0.1", port=8765, path=None
+) -> pd.DataFrame:
+    """Predictions from a running PredictionServer
+
+    Parameters
+    ----------
+    model : str
+        name of the forecaster on the server
+    fh : list
+        forecasting horizon, positive integer steps
+    series : list, optional
+        time series ids to return, by default all
+    host, port : str, int, optional
+        address of a TCP server. By default 127.0.0.1:8765
+    path : str, optional
+        path of a Unix socket server, used instead of host and port
+
+    Returns
+    -------
+    pd.DataFrame
+        the id column, the date as a string and y_pred
+    """
+    request = {"id": 0, "model": model, "fh": [int(h) for h in np.ravel(fh)]}
+    if series is not None:
+        request["series"] = list(series)
+    if path is not None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+    else:
+        sock = socket.create_connection((host, port))
+    with sock, sock.makefile("rwb") as f:
+        f.write((json.dumps(request) + "\n").encode())
+        f.flush()
+        reply = json.loads(f.readline())
+    if "error" in reply:
+        raise ValueError(reply["error"])
+    return pd.DataFrame(reply["predictions"])
@@ -0,0 +1,170 @@
+"""Partitioned Parquet storage of processed panels"""
+import numpy as np
+import pandas as pd
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.fs
+    except ImportError as e:
+        raise ImportError(
+            "PanelStore requires pyarrow, install it with `pip install pyarrow`"
+        ) from e
+    return pyarrow
+
+
+class PanelStore:
+    """Processed panel stored as a partitioned Parquet dataset on local disk
+
+    The panel is written once, e.g. after process_raw_data, in a hive-style
+    directory per value of the partition column(s). Reads are memory-mapped
+    and only the requested columns are loaded. Filters on the regions and the
+    dates are pushed down to the dataset, so a region filter on a dataset
+    partitioned by region only opens the files of that region and a date filter
+    skips row groups using the Parquet statistics.
+
+    Parameters
+    ----------
+    path : str
+        root directory of the dataset
+    partition_by : str or list, optional
+        column(s) to partition by, e.g. "REGION" or "YEAR". By default "REGION"
+    date_col : str, optional
+        name of the date column of the processed data. By default "ds_wsun"
+    ts_id_col : str, optional
+        name of the time series id column. By default "REGION"
+    """
+
+    def __init__(
+        self,
+        path: str,
+        partition_by="REGION",
+        date_col="ds_wsun",
+        ts_id_col="REGION",
+    ):
+        self.path = path
+        self.partition_by = (
+            [partition_by] if isinstance(partition_by, str) else list(partition_by)
+        )
+        self.date_col = date_col
+        self.ts_id_col = ts_id_col
+
+    def write(self, df: pd.DataFrame):
+        """Write a processed dataframe, replacing the partitions it contains
+
+        The dates are either in the date_col column, as returned by
+        process_raw_data, or in a DatetimeIndex / PeriodIndex as in the panels
+        used by the forecasters. Periods are stored as their start timestamp.
+        """
+        pa = _import_pyarrow()
+        if self.date_col not in df.columns:
+            dates = df.index
+            if isinstance(dates, pd.PeriodIndex):
+                dates = dates.to_timestamp()
+            df = df.assign(**{self.date_col: pd.DatetimeIndex(dates)})
+        df = df.reset_index(drop=True)
+        for col in self.partition_by:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                # partition values are read back as plain values
+                df[col] = df[col].astype(df[col].cat.categories.dtype)
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pa.dataset.write_dataset(
+            table,
+            self.path,
+            format="parquet",
+            partitioning=self.partition_by,
+            partitioning_flavor="hive",
+            existing_data_behavior="delete_matching",
+        )
+
+    def _dataset(self):
+        pa = _import_pyarrow()
+        return pa.dataset.dataset(
+            self.path,
+            format="parquet",
+            partitioning="hive",
+            filesystem=pa.fs.LocalFileSystem(use_mmap=True),
+        )
+
+    def _filter(self, regions, start_date, end_date):
+        pa = _import_pyarrow()
+        field = pa.dataset.field
+        expressions = []
+        if regions is not None:
+            if isinstance(regions, str):
+                regions = [regions]
+            expressions.append(field(self.ts_id_col).isin(list(regions)))
+        if start_date is not None:
+            start_date = pa.scalar(pd.Timestamp(start_date), pa.timestamp("ns"))
+            expressions.append(field(self.date_col) >= start_date)
+        if end_date is not None:
+            end_date = pa.scalar(pd.Timestamp(end_date), pa.timestamp("ns"))
+            expressions.append(field(self.date_col) <= end_date)
+        if len(expressions) == 0:
+            return None
+        expression = expressions[0]
+        for other in expressions[1:]:
+            expression = expression & other
+        return expression
+
+    def read(
+        self, columns=None, regions=None, start_date=None, end_date=None
+    ) -> pd.DataFrame:
+        """Read the processed data back
+
+        Parameters
+        ----------
+        columns : list, optional
+            columns to load, by default all
+        regions : str or list, optional
+            time series ids to load, by default all
+        start_date : str, optional
+            first date to load (inclusive), by default no limit
+        end_date : str, optional
+            last date to load (inclusive), by default no limit
+
+        Returns
+        -------
+        pd.DataFrame
+            processed data with the dates in the date_col column
+        """
+        dataset = self._dataset()
+        table = dataset.to_table(
+            columns=columns, filter=self._filter(regions, start_date, end_date)
+        )
+        df = table.to_pandas()
+        if self.date_col in df.columns:
+            df[self.date_col] = df[self.date_col].astype("datetime64[ns]")
+        return df
+
+    def read_panel(
+        self,
+        target_col="ILITOTAL",
+        regions=None,
+        start_date=None,
+        end_date=None,
+        freq="W-SUN",
+    ) -> pd.DataFrame:
+        """Panel with the id and target columns and a period index
+
+        Same layout as the panels used by the forecasters and the panel
+        evaluation, only the id, date and target columns are loaded.
+        """
+        df = self.read(
+            columns=[self.ts_id_col, self.date_col, target_col],
+            regions=regions,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        index = pd.PeriodIndex(df[self.date_col], freq=freq, name=self.date_col)
+        df = df.drop(columns=self.date_col)
+        df.index = index
+        return df
+
+    def regions(self) -> np.ndarray:
+        """Sorted unique time series ids of the dataset"""
+        ids = self.read(columns=[self.ts_id_col])[self.ts_id_col]
+        return np.sort(ids.unique())
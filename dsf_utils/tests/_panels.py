@@ -0,0 +1,23 @@
+"""Panels of the tests"""
+import numpy as np
+import pandas as pd
+
+
+def make_panel(n_series=8, n_periods=80, seed=0, missing=0):
+    """Weekly panel of series starting on different weeks and ending on the same
+
+    missing targets are set to NaN in every series.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(n_series):
+        n = n_periods - 3 * i
+        index = pd.period_range(end="2016-07-10", periods=n, freq="W-SUN")
+        y = rng.gamma(5, 20, size=n) + 30 * np.sin(np.arange(n) / 52 * 2 * np.pi) + 50
+        y[rng.choice(n, size=missing, replace=False)] = np.nan
+        frames.append(
+            pd.DataFrame({"REGION": f"region_{i}", "ILITOTAL": y}, index=index)
+        )
+    panel_df = pd.concat(frames)
+    panel_df.index.name = "ds_wsun"
+    return panel_df
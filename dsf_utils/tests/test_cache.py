@@ -0,0 +1,180 @@
+import functools
+import os
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder
+import dsf_utils
+from dsf_utils.cache import FitCache
+from dsf_utils.tests._panels import make_panel
+
+
+class _MeanForecaster:
+    """Mean of the last window values, counting its fits"""
+
+    n_fits = 0
+
+    def __init__(self, window=3, transform=None, params=None):
+        self.window = window
+        self.transform = transform
+        self.params = params
+
+    def fit(self, y, fh=None):
+        type(self).n_fits += 1
+        if self.transform is not None:
+            y = self.transform(y)
+        self.mean_ = y.tail(self.window).mean()
+        return self
+
+    def predict(self, fh):
+        return pd.Series(self.mean_, index=np.asarray(fh))
+
+
+def _scale(factor):
+    return lambda y: y * factor
+
+
+def _key(cache_dir):
+    """Key of a forecaster with nested parameters, built the same in any process"""
+    forecaster = _MeanForecaster(
+        transform=np.log1p,
+        params={
+            "encoder": LabelEncoder(),
+            "regions": {"region_0", "region_1", "region_2"},
+            "scale": _scale(2.0),
+            "weights": np.arange(4.0),
+            "start": pd.Period("2016-01-03", freq="W-SUN"),
+        },
+    )
+    y = make_panel(n_series=1)["ILITOTAL"]
+    return FitCache(cache_dir).key(forecaster, y, [1, 2, 3])
+
+
+SUBPROCESS_KEY = """
+import sys
+from dsf_utils.tests.test_cache import _key
+print(_key(sys.argv[1]))
+"""
+
+
+def test_key_is_stable_across_processes(tmp_path):
+    root = Path(dsf_utils.__file__).parents[1]
+    keys = set()
+    for seed in ["1", "2"]:
+        result = subprocess.run(
+            [sys.executable, "-c", SUBPROCESS_KEY, str(tmp_path)],
+            cwd=root,
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        keys.add(result.stdout.strip())
+    assert keys == {_key(str(tmp_path))}
+
+
+@pytest.mark.parametrize(
+    "other",
+    [
+        {"forecaster": _MeanForecaster(window=4)},
+        {"forecaster": _MeanForecaster(params={"encoder": LabelEncoder()})},
+        {"y": make_panel(n_series=1, seed=1)["ILITOTAL"]},
+        {"fh": [1, 2, 4]},
+    ],
+    ids=["params", "nested params", "data", "fh"],
+)
+def test_key_changes_with_params_data_and_fh(tmp_path, other):
+    cache = FitCache(str(tmp_path))
+    args = {
+        "forecaster": _MeanForecaster(),
+        "y": make_panel(n_series=1)["ILITOTAL"],
+        "fh": [1, 2, 3],
+    }
+    assert cache.key(*args.values()) == cache.key(*args.values())
+    assert cache.key(*args.values()) != cache.key(*{**args, **other}.values())
+
+
+@pytest.mark.parametrize(
+    "transform, other_transform",
+    [
+        (_scale(2.0), _scale(3.0)),
+        (lambda y: y + 1, lambda y: y - 1),
+        (lambda y, c=1: y + c, lambda y, c=2: y + c),
+        (functools.partial(np.add, 1), functools.partial(np.add, 2)),
+    ],
+    ids=["closures", "lambdas", "defaults", "partials"],
+)
+def test_key_changes_with_the_captured_values_of_callables(
+    tmp_path, transform, other_transform
+):
+    cache = FitCache(str(tmp_path))
+    y = make_panel(n_series=1)["ILITOTAL"]
+    key = cache.key(_MeanForecaster(transform=transform), y, [1])
+    assert key != cache.key(_MeanForecaster(transform=other_transform), y, [1])
+    assert key == cache.key(_MeanForecaster(transform=transform), y, [1])
+
+
+@pytest.mark.parametrize(
+    "params", [object(), {"scale": _scale(object())}], ids=["object", "closure"]
+)
+def test_key_rejects_parameters_without_a_stable_representation(tmp_path, params):
+    cache = FitCache(str(tmp_path))
+    with pytest.raises(ValueError, match="cache key"):
+        cache.key(_MeanForecaster(params=params), pd.Series([1.0]), [1])
+
+
+def test_fit_predict_hits_and_misses(tmp_path):
+    cache = FitCache(str(tmp_path))
+    y = make_panel(n_series=1)["ILITOTAL"]
+    _MeanForecaster.n_fits = 0
+
+    _, y_pred, hit = cache.fit_predict(_MeanForecaster(), y, [1, 2])
+    assert not hit and _MeanForecaster.n_fits == 1
+    forecaster, cached_pred, hit = cache.fit_predict(_MeanForecaster(), y, [1, 2])
+    assert hit and _MeanForecaster.n_fits == 1
+    pd.testing.assert_series_equal(cached_pred, y_pred)
+    assert forecaster.mean_ == y.iloc[-3:].mean()
+
+    _, _, hit = cache.fit_predict(_MeanForecaster(), y.iloc[:-1], [1, 2])
+    assert not hit and _MeanForecaster.n_fits == 2
+
+
+def test_put_writes_whole_entries_only(tmp_path):
+    cache = FitCache(str(tmp_path))
+    y_pred = pd.Series([1.0, 2.0])
+    cache.put("a", _MeanForecaster(), y_pred)
+    assert os.listdir(tmp_path) == ["a.pkl"]
+    pd.testing.assert_series_equal(cache.get("a")[1], y_pred)
+
+    # a failed write leaves the entry in place and no temporary file
+    with pytest.raises((pickle.PicklingError, AttributeError)):
+        cache.put("a", _MeanForecaster(transform=lambda y: y), y_pred * 2)
+    assert os.listdir(tmp_path) == ["a.pkl"]
+    pd.testing.assert_series_equal(cache.get("a")[1], y_pred)
+
+    # a truncated entry is a miss
+    with open(tmp_path / "b.pkl", "wb") as f:
+        f.write(pickle.dumps((None, y_pred))[:10])
+    assert cache.get("b") is None
+
+
+def test_put_evicts_the_least_recently_used_entries(tmp_path):
+    y_pred = pd.Series(np.arange(100.0))
+    entry_size = len(
+        pickle.dumps((_MeanForecaster(), y_pred), protocol=pickle.HIGHEST_PROTOCOL)
+    )
+    cache = FitCache(str(tmp_path), max_size_bytes=int(2.5 * entry_size))
+    cache.put("a", _MeanForecaster(), y_pred)
+    cache.put("b", _MeanForecaster(), y_pred)
+    # a is older than b but read last
+    os.utime(tmp_path / "a.pkl", (1e9, 1e9))
+    os.utime(tmp_path / "b.pkl", (1.5e9, 1.5e9))
+    assert cache.get("a") is not None
+
+    cache.put("c", _MeanForecaster(), y_pred)
+    assert sorted(os.listdir(tmp_path)) == ["a.pkl", "c.pkl"]
+    assert cache.get("b") is None
@@ -0,0 +1,49 @@
+import epiweeks as epi
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+from dsf_utils.models._calendar import CalendarTable, mmwr_weeks
+
+
+def test_mmwr_weeks_match_epiweeks():
+    periods = pd.period_range("1990-01-07", "2050-12-31", freq="W-SUN")
+    saturdays = periods.end_time.normalize() - pd.Timedelta(days=1)
+    expected = [epi.Week.fromdate(date).week for date in saturdays]
+    np.testing.assert_array_equal(mmwr_weeks(periods), expected)
+
+
+def test_calendar_table_matches_period_attributes():
+    calendar_features = {
+        "year": True,
+        "week": True,
+        "t": True,
+        "mmwr_week": True,
+        "fourier": 2,
+        "holidays": USFederalHolidayCalendar(),
+    }
+    periods = pd.period_range("2014-12-07", periods=120, freq="W-SUN")
+    table = CalendarTable(calendar_features, periods.dtype, periods[10].ordinal)
+    # the table is built for the middle periods first and then extended on both
+    # sides by the lookup of all the periods, out of order
+    table.lookup(periods.asi8[50:60])
+    order = np.random.default_rng(0).permutation(len(periods))
+    values = pd.DataFrame(
+        table.lookup(periods.asi8[order]), columns=table.names, index=periods[order]
+    ).sort_index()
+
+    year_fraction = (periods.start_time.dayofyear - 1) / np.where(
+        periods.start_time.is_leap_year, 366, 365
+    )
+    holidays = USFederalHolidayCalendar().holidays().to_period("W-SUN")
+    np.testing.assert_array_equal(values["Year"], periods.year)
+    np.testing.assert_array_equal(values["Week"], periods.week)
+    np.testing.assert_array_equal(values["t"], np.arange(len(periods)) - 10)
+    np.testing.assert_array_equal(values["MMWRWeek"], mmwr_weeks(periods))
+    for k in [1, 2]:
+        np.testing.assert_allclose(
+            values[f"FourierSin{k}"], np.sin(2 * np.pi * k * year_fraction)
+        )
+        np.testing.assert_allclose(
+            values[f"FourierCos{k}"], np.cos(2 * np.pi * k * year_fraction)
+        )
+    np.testing.assert_array_equal(values["Holiday"], periods.isin(holidays))
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sktime.performance_metrics.forecasting import (
+    MeanAbsoluteScaledError,
+    MedianAbsoluteError,
+)
+from dsf_utils.models import PanelBenchmarkForecaster
+from dsf_utils.tests._panels import make_panel
+
+# the evaluation module imports the splitters from sktime.forecasting.model_selection
+evaluation = pytest.importorskip("dsf_utils.evaluation", exc_type=ImportError)
+
+FH = np.arange(1, 5)
+WINDOW_LENGTH = 30
+
+
+def _gappy_panel():
+    """Panel with missing rows, including at the cutoffs and in the test weeks"""
+    panel_df = make_panel(missing=2)
+    rng = np.random.default_rng(0)
+    keep = rng.random(len(panel_df)) > 0.15
+    dates = panel_df.index.unique().sort_values()
+    # the first cutoff trains up to dates[60]: the last training week of region_0
+    # and the first test week of region_1 are missing
+    keep &= ~((panel_df["REGION"] == "region_0") & (panel_df.index == dates[60]))
+    keep &= ~((panel_df["REGION"] == "region_1") & (panel_df.index == dates[61]))
+    return panel_df[keep], [dates[59].start_time, dates[65].start_time]
+
+
+def _date_aligned_scores(panel_df, cutoffs, metric):
+    """Scores of every series with the predictions matched to actuals by date"""
+    scores = []
+    for cutoff in cutoffs:
+        cutoff = pd.Period(cutoff, freq="W-SUN") + 1
+        train_df = panel_df[
+            (panel_df.index <= cutoff) & (panel_df.index > cutoff - WINDOW_LENGTH)
+        ]
+        forecaster = PanelBenchmarkForecaster()
+        forecaster.fit(train_df, FH)
+        pred_df = forecaster.predict(FH)
+        for ts_id in sorted(panel_df["REGION"].unique()):
+            series = panel_df.loc[panel_df["REGION"] == ts_id, "ILITOTAL"]
+            train = train_df.loc[train_df["REGION"] == ts_id, "ILITOTAL"].dropna()
+            test = series[(series.index > cutoff) & (series.index <= cutoff + 4)]
+            pred = pred_df.loc[pred_df["REGION"] == ts_id, "y_pred"]
+            pred.index = pd.PeriodIndex(pred.index, freq="W-SUN")
+            aligned = pd.concat([test, pred], axis=1, join="inner").dropna()
+            if len(aligned) == 0 or len(train) == 0:
+                scores.append(np.nan)
+                continue
+            scores.append(
+                metric(
+                    y_true=aligned.iloc[:, 0],
+                    y_pred=aligned.iloc[:, 1],
+                    y_train=train,
+                )
+            )
+    return np.array(scores)
+
+
+@pytest.mark.parametrize(
+    "metric", [MeanAbsoluteScaledError(), MedianAbsoluteError()], ids=repr
+)
+def test_panel_scores_match_predictions_to_actuals_by_date(metric):
+    panel_df, cutoffs = _gappy_panel()
+    results = evaluation.evaluate_panel_forecaster_on_cutoffs(
+        panel_df,
+        cutoffs,
+        PanelBenchmarkForecaster(),
+        metric,
+        fh=FH,
+        window_length=WINDOW_LENGTH,
+    )
+    np.testing.assert_allclose(
+        results["Score"], _date_aligned_scores(panel_df, cutoffs, metric), rtol=1e-9
+    )
+
+
+def test_panel_results_are_padded_to_the_test_weeks():
+    panel_df, cutoffs = _gappy_panel()
+    results = evaluation.evaluate_panel_forecaster_on_cutoffs(
+        panel_df,
+        cutoffs,
+        PanelBenchmarkForecaster(),
+        MedianAbsoluteError(),
+        fh=FH,
+        window_length=WINDOW_LENGTH,
+    )
+    for cutoff, y_test, y_pred in results[["cutoff", "y_test", "y_pred"]].itertuples(
+        index=False
+    ):
+        test_dates = pd.period_range(cutoff + 1, cutoff + 4, freq="W-SUN")
+        pd.testing.assert_index_equal(y_test.index, test_dates)
+        pd.testing.assert_index_equal(y_pred.index, test_dates)
+    # the missing test week of region_1 is NaN
+    y_test = results.loc[results["REGION"] == "region_1", "y_test"].iloc[0]
+    assert np.isnan(y_test.iloc[0])
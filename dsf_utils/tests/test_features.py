@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder
+from dsf_utils.models._features import PanelFeatureEngine
+from dsf_utils.tests._panels import make_panel
+
+LAG_WINDOW_LENGTH = 6
+
+
+def _feature_engine():
+    return PanelFeatureEngine(
+        ts_id_col="REGION",
+        target_col="ILITOTAL",
+        lag_window_length=LAG_WINDOW_LENGTH,
+        calendar_features={"year": True, "week": True, "t": True},
+        cat_encoder=LabelEncoder(),
+        freq="W-SUN",
+    )
+
+
+def _reference_features(panel_df):
+    """Lag and calendar features built with a groupby shift per lag"""
+    df = panel_df.copy()
+    for lag in range(1, LAG_WINDOW_LENGTH):
+        df[f"ILITOTAL_lag{lag}"] = df.groupby("REGION")["ILITOTAL"].shift(lag)
+    df = df.dropna()
+    df["Year"] = df.index.year
+    df["Week"] = df.index.week
+    df["t"] = df.index.asi8 - df.index.asi8.min()
+    df["REGION_encoded"] = LabelEncoder().fit_transform(df["REGION"])
+    df = df.reset_index().sort_values(["REGION", "ds_wsun"], kind="stable")
+    return df.drop(columns=["REGION", "ds_wsun"]), df
+
+
+@pytest.mark.parametrize("missing", [0, 4])
+def test_features_match_groupby_shift(missing):
+    panel_df = make_panel(missing=missing)
+    engine = _feature_engine()
+    X = engine.fit_transform(panel_df)
+    expected, expected_rows = _reference_features(panel_df)
+
+    assert engine.feature_names == list(expected.columns)
+    np.testing.assert_array_equal(X, expected.to_numpy(dtype=np.float64))
+    np.testing.assert_array_equal(engine.ts_ids, expected_rows["REGION"])
+    np.testing.assert_array_equal(
+        engine.ordinals, pd.PeriodIndex(expected_rows["ds_wsun"]).asi8
+    )
+
+
+def test_shifted_target_stays_within_series():
+    panel_df = make_panel()
+    engine = _feature_engine()
+    engine.fit_transform(panel_df)
+    rows, y_h = engine.shifted_target(3)
+    targets = panel_df.set_index("REGION", append=True)["ILITOTAL"]
+    for row, y in zip(rows, y_h):
+        date = pd.Period(ordinal=engine.ordinals[row], freq="W-SUN") + 3
+        assert targets[(date, engine.ts_ids[row])] == y
+
+
+def test_update_transform_matches_fit_transform():
+    panel_df = make_panel(missing=4)
+    cutoff = panel_df.index.unique().sort_values()[50]
+    engine = _feature_engine()
+    X = engine.fit_transform(panel_df[panel_df.index <= cutoff])
+    X = engine.update_transform(X, panel_df[panel_df.index > cutoff])
+    full_engine = _feature_engine()
+
+    np.testing.assert_array_equal(X, full_engine.fit_transform(panel_df))
+    np.testing.assert_array_equal(engine.ordinals, full_engine.ordinals)
+    np.testing.assert_array_equal(engine.y, full_engine.y)
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder
+from dsf_utils.models import DirectLGBMGlobalForecaster, RecursiveLGBMGlobalForecaster
+from dsf_utils.storage import PanelStore
+from dsf_utils.tests._panels import make_panel
+
+LGBM_KWARGS = {"n_estimators": 20, "verbose": -1}
+
+
+def _recursive_forecaster(**kwargs):
+    forecaster = RecursiveLGBMGlobalForecaster(
+        lgbm_kwargs=LGBM_KWARGS, lag_window_length=6, **kwargs
+    )
+    forecaster.fit(make_panel())
+    return forecaster
+
+
+def _reference_recursive_predictions(forecaster, horizon):
+    """Predictions of a loop shifting the lag columns of a frame every step"""
+    pred_df = forecaster._pred_df.copy()
+    lags = ["ILITOTAL"] + [f"ILITOTAL_lag{lag}" for lag in range(1, 6)]
+    predictions = []
+    for step in range(1, horizon + 1):
+        y_pred = np.exp(forecaster.model.predict(pred_df.to_numpy())) - 1
+        predictions.append(y_pred)
+        date = forecaster._train_max_date + step
+        pred_df[lags[1:]] = pred_df[lags[:-1]].to_numpy()
+        pred_df["ILITOTAL"] = y_pred
+        pred_df["Year"] = date.year
+        pred_df["Week"] = date.week
+        pred_df["t"] += 1
+    return np.concatenate(predictions)
+
+
+@pytest.mark.parametrize("fh", [[1], [1, 2, 3], list(range(1, 27))])
+def test_recursive_predict_matches_reference_loop(fh):
+    forecaster = _recursive_forecaster()
+    pred_df = forecaster.predict(np.array(fh))
+    expected = _reference_recursive_predictions(forecaster, max(fh))
+    n_series = len(forecaster._pred_df)
+    steps = np.repeat(np.arange(1, max(fh) + 1), n_series)
+    np.testing.assert_array_equal(
+        pred_df["y_pred"].to_numpy(), expected[np.isin(steps, fh)]
+    )
+    dates = forecaster._train_max_date + np.repeat(np.array(fh), n_series)
+    assert list(pred_df.index) == list(dates)
+
+
+def test_recursive_predict_only_returns_requested_steps():
+    forecaster = _recursive_forecaster()
+    pred_df = forecaster.predict(np.array([2, 5]))
+    all_steps = forecaster.predict(np.arange(1, 6))
+    np.testing.assert_array_equal(
+        pred_df["y_pred"].to_numpy(),
+        all_steps["y_pred"].to_numpy().reshape(5, -1)[[1, 4]].ravel(),
+    )
+
+
+@pytest.mark.parametrize(
+    "forecaster_class", [DirectLGBMGlobalForecaster, RecursiveLGBMGlobalForecaster]
+)
+def test_update_matches_fit_on_all_rows(forecaster_class):
+    panel_df = make_panel()
+    cutoff = panel_df.index.unique().sort_values()[60]
+    updated = forecaster_class(lgbm_kwargs=LGBM_KWARGS, lag_window_length=6)
+    updated.fit(panel_df[panel_df.index <= cutoff], np.arange(1, 4))
+    updated.update(panel_df[panel_df.index > cutoff])
+    fitted = forecaster_class(lgbm_kwargs=LGBM_KWARGS, lag_window_length=6)
+    fitted.fit(panel_df, np.arange(1, 4))
+
+    np.testing.assert_array_equal(updated._X, fitted._X)
+    pd.testing.assert_frame_equal(updated._pred_df, fitted._pred_df)
+    pd.testing.assert_frame_equal(
+        updated.predict(np.arange(1, 4)), fitted.predict(np.arange(1, 4))
+    )
+
+
+def _fitted(forecaster_class, **kwargs):
+    forecaster = forecaster_class(
+        lgbm_kwargs=LGBM_KWARGS, lag_window_length=6, **kwargs
+    )
+    forecaster.fit(make_panel(missing=2), np.arange(1, 4))
+    return forecaster
+
+
+@pytest.mark.parametrize(
+    "forecaster_class", [DirectLGBMGlobalForecaster, RecursiveLGBMGlobalForecaster]
+)
+def test_loaded_forecaster_predicts_like_the_saved_one(forecaster_class, tmp_path):
+    forecaster = _fitted(forecaster_class)
+    forecaster.save(str(tmp_path))
+    loaded = forecaster_class.load(str(tmp_path))
+    pd.testing.assert_frame_equal(
+        loaded.predict(np.arange(1, 4)), forecaster.predict(np.arange(1, 4))
+    )
+    with pytest.raises(ValueError):
+        loaded.update(make_panel())
+
+
+def test_load_rejects_another_forecaster_class(tmp_path):
+    _fitted(RecursiveLGBMGlobalForecaster).save(str(tmp_path))
+    with pytest.raises(ValueError):
+        DirectLGBMGlobalForecaster.load(str(tmp_path))
+
+
+@pytest.mark.parametrize(
+    "forecaster_class", [DirectLGBMGlobalForecaster, RecursiveLGBMGlobalForecaster]
+)
+@pytest.mark.parametrize("from_store", [False, True])
+def test_chunked_fit_matches_in_memory_fit(forecaster_class, from_store, tmp_path):
+    panel_df = make_panel(missing=2)
+    train_data = panel_df
+    if from_store:
+        train_data = PanelStore(str(tmp_path / "panel"))
+        train_data.write(panel_df)
+    chunked = forecaster_class(
+        lgbm_kwargs=LGBM_KWARGS,
+        lag_window_length=6,
+        chunk_size=3,
+        chunk_dir=str(tmp_path),
+    )
+    chunked.fit(train_data, np.arange(1, 4))
+    forecaster = _fitted(forecaster_class)
+    pd.testing.assert_frame_equal(chunked._pred_df, forecaster._pred_df)
+    pd.testing.assert_frame_equal(
+        chunked.predict(np.arange(1, 4)), forecaster.predict(np.arange(1, 4))
+    )
+
+
+@pytest.mark.parametrize(
+    "forecaster_class", [DirectLGBMGlobalForecaster, RecursiveLGBMGlobalForecaster]
+)
+def test_forecasters_with_default_encoder_are_independent(forecaster_class):
+    panel_df = make_panel()
+    cutoff = panel_df.index.unique().sort_values()[60]
+    train_df = panel_df[panel_df.index <= cutoff]
+    forecaster = _forecaster_with_default_encoder(forecaster_class, train_df)
+    expected = forecaster.predict(np.arange(1, 4))
+    # a panel with other ids, sharing a few with the first one
+    other_df = make_panel(seed=1)
+    other_df["REGION"] = other_df["REGION"].str.replace("region_", "other_")
+    other_df.loc[other_df["REGION"] == "other_7", "REGION"] = "region_7"
+    _forecaster_with_default_encoder(forecaster_class, other_df)
+
+    pd.testing.assert_frame_equal(forecaster.predict(np.arange(1, 4)), expected)
+    forecaster.update(panel_df[panel_df.index > cutoff])
+    updated = _forecaster_with_default_encoder(forecaster_class, train_df)
+    updated.update(panel_df[panel_df.index > cutoff])
+    np.testing.assert_array_equal(forecaster._X, updated._X)
+    np.testing.assert_array_equal(
+        forecaster._X[:, -1],
+        LabelEncoder().fit_transform(forecaster._feature_engine.ts_ids),
+    )
+
+
+def _forecaster_with_default_encoder(forecaster_class, panel_df):
+    forecaster = forecaster_class(lgbm_kwargs=LGBM_KWARGS, lag_window_length=6)
+    forecaster.fit(panel_df, np.arange(1, 4))
+    return forecaster
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from sktime.performance_metrics.forecasting import (
+    MeanAbsoluteError,
+    MeanAbsolutePercentageError,
+    MeanAbsoluteScaledError,
+    MeanSquaredError,
+    MeanSquaredScaledError,
+    MedianAbsoluteError,
+)
+from dsf_utils.metrics import panel_metric
+
+METRICS = [
+    MeanAbsoluteError(),
+    MeanSquaredError(),
+    MeanSquaredError(square_root=True),
+    MeanAbsolutePercentageError(),
+    MeanAbsolutePercentageError(symmetric=True),
+    MeanAbsoluteScaledError(),
+    MeanAbsoluteScaledError(sp=4),
+    MeanSquaredScaledError(),
+    MeanSquaredScaledError(sp=4, square_root=True),
+]
+
+
+def _arrays(n_series=20, n_test=8, n_train=30, seed=0):
+    rng = np.random.default_rng(seed)
+    y_train = rng.gamma(5, 20, size=(n_series, n_train))
+    y_true = rng.gamma(5, 20, size=(n_series, n_test))
+    y_pred = y_true + rng.normal(0, 10, size=(n_series, n_test))
+    for values in [y_train, y_true, y_pred]:
+        values[rng.random(values.shape) < 0.1] = np.nan
+    return y_true, y_pred, y_train
+
+
+def _sktime_scores(metric, y_true, y_pred, y_train):
+    """Score of every row by the sktime metric on its observed values"""
+    scores = []
+    for true, pred, train in zip(y_true, y_pred, y_train):
+        observed = ~(np.isnan(true) | np.isnan(pred))
+        scores.append(
+            metric(true[observed], pred[observed], y_train=train[~np.isnan(train)])
+        )
+    return np.array(scores)
+
+
+@pytest.mark.parametrize("metric", METRICS, ids=repr)
+def test_panel_metric_matches_sktime(metric):
+    y_true, y_pred, y_train = _arrays()
+    scores = panel_metric(metric)(y_true, y_pred, y_train)
+    np.testing.assert_allclose(
+        scores, _sktime_scores(metric, y_true, y_pred, y_train), rtol=1e-12
+    )
+
+
+def test_panel_metric_rows_without_observations_are_nan():
+    y_true, y_pred, y_train = _arrays(n_series=3)
+    y_true[1] = np.nan
+    scores = panel_metric(MeanAbsoluteError())(y_true, y_pred, y_train)
+    assert np.isnan(scores[1])
+    assert not np.isnan(scores[[0, 2]]).any()
+
+
+def test_panel_metric_is_none_without_kernel():
+    assert panel_metric(MedianAbsoluteError()) is None
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dsf_utils.cache import FitCache, _forecaster_params
+from dsf_utils.models import PanelBenchmarkForecaster, SimpleAverageCombination
+from dsf_utils.models._prediction import PredictionAccumulator
+from dsf_utils.tests._panels import make_panel
+
+FH = np.arange(1, 4)
+
+
+def _members():
+    return [
+        PanelBenchmarkForecaster(strategy="last"),
+        PanelBenchmarkForecaster(strategy="mean", window_length=8),
+        PanelBenchmarkForecaster(strategy="last", sp=52),
+    ]
+
+
+def _predictions(ids, dates, y_pred):
+    return pd.DataFrame(
+        {"REGION": ids, "y_pred": y_pred},
+        index=pd.PeriodIndex(dates, freq="W-SUN", name="ds_wsun"),
+    )
+
+
+@pytest.mark.parametrize(
+    "method, weights", [("mean", None), ("mean", [1.0, 2.0, 0.5]), ("median", None)]
+)
+def test_combination_matches_the_member_predictions(method, weights):
+    panel_df = make_panel()
+    members = _members()
+    ensemble = SimpleAverageCombination(
+        _members(), "REGION", method=method, weights=weights
+    )
+    ensemble.fit(panel_df, FH)
+    pred_df = ensemble.predict(FH)
+
+    member_preds = []
+    for member in members:
+        member.fit(panel_df, FH)
+        member_df = member.predict(FH).rename_axis("date").reset_index()
+        member_preds.append(member_df.sort_values(["REGION", "date"]))
+    y_preds = np.vstack([p["y_pred"].to_numpy() for p in member_preds])
+    if method == "median":
+        expected = np.median(y_preds, axis=0)
+    else:
+        expected = np.average(y_preds, axis=0, weights=weights)
+    np.testing.assert_allclose(pred_df["y_pred"].to_numpy(), expected)
+    np.testing.assert_array_equal(
+        pred_df["REGION"].to_numpy(), member_preds[0]["REGION"].to_numpy()
+    )
+
+
+def test_fit_leaves_the_parameters_unfitted(tmp_path):
+    panel_df = make_panel()
+    members = _members()
+    ensemble = SimpleAverageCombination(members, "REGION")
+    cache = FitCache(str(tmp_path))
+    key = cache.key(ensemble, panel_df, FH)
+
+    ensemble.fit(panel_df, FH)
+    assert _forecaster_params(ensemble)["forecaster_list"] is members
+    assert not any(member.is_fitted for member in members)
+    assert all(member.is_fitted for member in ensemble.forecasters_)
+    assert cache.key(ensemble, panel_df, FH) == key
+
+    # refitting on other data starts from the unfitted members
+    other_df = make_panel(seed=1)
+    ensemble.fit(other_df, FH)
+    fitted = SimpleAverageCombination(_members(), "REGION")
+    fitted.fit(other_df, FH)
+    pd.testing.assert_frame_equal(ensemble.predict(FH), fitted.predict(FH))
+
+
+@pytest.mark.parametrize("method", ["mean", "median"])
+def test_accumulator_aligns_predictions_on_id_and_date(method):
+    dates = ["2016-07-17", "2016-07-24"]
+    frames = [
+        _predictions(["a", "a", "b", "b"], dates * 2, [1.0, 2.0, 10.0, 20.0]),
+        # other order, without a and with c
+        _predictions(["c", "b", "b"], [dates[0], dates[1], dates[0]], [5.0, 40, 30]),
+        _predictions(["b", "a"], [dates[0], dates[0]], [50.0, 3.0]),
+    ]
+    weights = [1.0, 2.0, 1.0] if method == "mean" else [1.0] * 3
+    accumulator = PredictionAccumulator("REGION", method=method)
+    for pred_df, weight in zip(frames, weights):
+        accumulator.add(pred_df, weight=weight)
+
+    if method == "mean":
+        y_pred = [(1 + 3) / 2, 2, (10 + 2 * 30 + 50) / 4, (20 + 2 * 40) / 3, 5]
+    else:
+        y_pred = [2, 2, 30, 30, 5]
+    expected = _predictions(
+        ["a", "a", "b", "b", "c"], dates * 2 + dates[:1], np.array(y_pred, float)
+    )
+    pd.testing.assert_frame_equal(accumulator.to_frame(), expected)
@@ -0,0 +1,76 @@
+import os
+import pytest
+from dsf_utils._parallel import catch_errors, chunk_list, run_in_chunks
+
+
+def _power(x, exponent=2):
+    return x**exponent, os.getpid()
+
+
+def _fail_on_odd(x):
+    if x % 2 == 1:
+        raise ValueError(f"odd {x}")
+    return x
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 10])
+def test_chunk_list_keeps_the_order(chunk_size):
+    chunks = chunk_list(list(range(10)), chunk_size)
+    assert [x for chunk in chunks for x in chunk] == list(range(10))
+    assert all(0 < len(chunk) <= chunk_size for chunk in chunks)
+
+
+@pytest.mark.parametrize(
+    "n_jobs, backend, chunk_size",
+    [
+        (None, "loky", None),
+        (1, "loky", 2),
+        (2, "threading", None),
+        (2, "threading", 1),
+        (2, "loky", 3),
+        (-1, "threading", 4),
+    ],
+)
+def test_run_in_chunks_matches_serial_run(n_jobs, backend, chunk_size):
+    args_list = [(x,) for x in range(11)]
+    results = run_in_chunks(
+        _power, args_list, n_jobs=n_jobs, backend=backend, chunk_size=chunk_size
+    )
+    assert [result for result, _ in results] == [x**2 for x in range(11)]
+    results = run_in_chunks(
+        _power,
+        args_list,
+        n_jobs=n_jobs,
+        backend=backend,
+        chunk_size=chunk_size,
+        exponent=3,
+    )
+    assert [result for result, _ in results] == [x**3 for x in range(11)]
+
+
+def test_run_in_chunks_runs_serially_in_the_current_process():
+    results = run_in_chunks(_power, [(x,) for x in range(5)], n_jobs=1)
+    assert {pid for _, pid in results} == {os.getpid()}
+
+
+def test_catch_errors_returns_results_and_errors():
+    results = run_in_chunks(
+        catch_errors,
+        [(_fail_on_odd, x) for x in range(6)],
+        n_jobs=2,
+        backend="threading",
+        chunk_size=2,
+    )
+    assert [result for result, _ in results] == [0, None, 2, None, 4, None]
+    errors = [error for _, error in results]
+    assert errors[::2] == [None] * 3
+    assert [str(error) for error in errors[1::2]] == ["odd 1", "odd 3", "odd 5"]
+    assert all(isinstance(error, ValueError) for error in errors[1::2])
+
+
+def test_catch_errors_does_not_catch_interrupts():
+    def interrupt():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        catch_errors(interrupt)
@@ -0,0 +1,74 @@
+import epiweeks as epi
+import numpy as np
+import pandas as pd
+import pytest
+from dsf_utils.preprocessing import (
+    epiweek_end_dates,
+    load_raw_data,
+    process_raw_data,
+)
+
+
+def _all_weeks(first_year, last_year):
+    weeks = [
+        week
+        for year in range(first_year, last_year + 1)
+        for week in epi.Year(year).iterweeks()
+    ]
+    return (
+        np.array([week.year for week in weeks]),
+        np.array([week.week for week in weeks]),
+        pd.to_datetime([week.enddate() for week in weeks]).to_numpy(),
+    )
+
+
+def test_epiweek_end_dates_match_epiweeks():
+    years, weeks, end_dates = _all_weeks(1900, 2099)
+    np.testing.assert_array_equal(epiweek_end_dates(years, weeks), end_dates)
+
+
+@pytest.mark.parametrize("year, week", [(2020, 0), (2020, 54), (2021, 53)])
+def test_epiweek_end_dates_rejects_weeks_outside_the_year(year, week):
+    with pytest.raises(ValueError):
+        epiweek_end_dates([year], [week])
+
+
+def test_process_raw_data_dates_match_epiweeks():
+    years, weeks, end_dates = _all_weeks(2010, 2021)
+    raw_df = pd.DataFrame(
+        {"REGION": "Alaska", "YEAR": years, "WEEK": weeks, "ILITOTAL": 1.0}
+    )
+    df = process_raw_data(raw_df, start_date="2014-01-01", end_date="2020-01-01")
+    in_range = (end_dates >= np.datetime64("2014-01-01")) & (
+        end_dates <= np.datetime64("2020-01-01")
+    )
+    np.testing.assert_array_equal(df["ds_wsun"].to_numpy(), end_dates[in_range])
+
+
+def _write_ilinet_csv(path):
+    years, weeks, _ = _all_weeks(2014, 2016)
+    raw_df = pd.DataFrame(
+        {
+            "REGION TYPE": "States",
+            "REGION": np.where(np.arange(len(years)) % 2 == 0, "Alaska", "Ohio"),
+            "YEAR": years,
+            "WEEK": weeks,
+            "% WEIGHTED ILI": "X",
+            "ILITOTAL": np.arange(len(years)),
+        }
+    )
+    raw_df.to_csv(path, index=False)
+
+
+def test_load_raw_data_outside_the_date_range_keeps_the_columns(tmp_path):
+    path = tmp_path / "ILINet.csv"
+    _write_ilinet_csv(path)
+    df = load_raw_data(path, start_date="2015-01-01", end_date="2016-01-01")
+    empty_df = load_raw_data(
+        path, start_date="2020-01-01", end_date="2021-01-01", chunksize=50
+    )
+
+    assert len(df) > 0 and len(empty_df) == 0
+    pd.testing.assert_series_equal(empty_df.dtypes.astype(str), df.dtypes.astype(str))
+    assert df["ILITOTAL"].dtype == np.float32
+    assert df["ds_wsun"].dtype == empty_df["ds_wsun"].dtype
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import socket
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from dsf_utils.models import DirectLGBMGlobalForecaster, RecursiveLGBMGlobalForecaster
+from dsf_utils.serving import PredictionServer, request_predictions
+from dsf_utils.tests._panels import make_panel
+
+LGBM_KWARGS = {"n_estimators": 20, "verbose": -1}
+
+
+@pytest.fixture(scope="module")
+def forecasters():
+    recursive = RecursiveLGBMGlobalForecaster(
+        lgbm_kwargs=LGBM_KWARGS, lag_window_length=6
+    )
+    recursive.fit(make_panel())
+    direct = DirectLGBMGlobalForecaster(lgbm_kwargs=LGBM_KWARGS, lag_window_length=6)
+    direct.fit(make_panel(), np.arange(1, 4))
+    return {"recursive": recursive, "direct": direct}
+
+
+@pytest.fixture
+def server(forecasters, tmp_path):
+    """Server listening on a Unix socket, its event loop run in a thread"""
+    server = PredictionServer(forecasters, max_delay=0.05)
+    path = str(tmp_path / "server.sock")
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio_server = asyncio.run_coroutine_threadsafe(
+        server.start(path=path), loop
+    ).result()
+
+    async def stop():
+        asyncio_server.close()
+        await asyncio_server.wait_closed()
+        for task in server._batch_tasks:
+            task.cancel()
+        await asyncio.gather(*server._batch_tasks, return_exceptions=True)
+
+    yield server, path
+    asyncio.run_coroutine_threadsafe(stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def _exchange(path, requests):
+    """Replies by id to requests written at once on one connection"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        with sock.makefile("rwb") as f:
+            f.write(b"".join((json.dumps(r) + "\n").encode() for r in requests))
+            f.flush()
+            replies = [json.loads(f.readline()) for _ in requests]
+    return {reply["id"]: reply for reply in replies}
+
+
+def _expected(forecaster, fh, series=None):
+    if isinstance(forecaster, DirectLGBMGlobalForecaster):
+        # the models of a direct forecaster are the steps of its fitted fh
+        pred_df = forecaster.predict(forecaster._fit_fh)
+        pred_df = pred_df[
+            pred_df.index.isin(forecaster._train_max_date + np.asarray(fh))
+        ]
+    else:
+        pred_df = forecaster.predict(np.asarray(fh))
+    if series is not None:
+        pred_df = pred_df[pred_df[forecaster.ts_id_col].isin(series)]
+    return pd.DataFrame(
+        {
+            forecaster.ts_id_col: pred_df[forecaster.ts_id_col].to_numpy(),
+            "date": pred_df.index.astype(str),
+            "y_pred": pred_df["y_pred"].to_numpy(),
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "model, fh, series",
+    [
+        ("recursive", [1, 2, 3], None),
+        ("recursive", [2, 5], ["region_0", "region_3"]),
+        ("direct", [1, 3], ["region_7"]),
+    ],
+)
+def test_single_request_matches_predict(server, forecasters, model, fh, series):
+    _, path = server
+    pred_df = request_predictions(model, fh, series=series, path=path)
+    pd.testing.assert_frame_equal(pred_df, _expected(forecasters[model], fh, series))
+
+
+def test_batched_requests_match_predict(server, forecasters):
+    prediction_server, path = server
+    requests = [
+        {"id": 0, "model": "recursive", "fh": [1]},
+        {"id": 1, "model": "recursive", "fh": [2, 4], "series": ["region_1"]},
+        {"id": 2, "model": "recursive", "fh": [1, 2, 3, 4, 5, 6]},
+        {"id": 3, "model": "direct", "fh": [2], "series": ["region_0", "region_5"]},
+        {"id": 4, "model": "direct", "fh": [1, 2, 3]},
+    ]
+    replies = _exchange(path, requests)
+
+    for request in requests:
+        forecaster = forecasters[request["model"]]
+        pd.testing.assert_frame_equal(
+            pd.DataFrame(replies[request["id"]]["predictions"]),
+            _expected(forecaster, request["fh"], request.get("series")),
+        )
+    # the requests of a model were predicted together
+    assert prediction_server.stats()["recursive"]["mean_batch_size"] > 1
+
+
+@pytest.mark.parametrize(
+    "request_",
+    [
+        {"model": "recursive", "fh": [0, 1]},
+        {"model": "recursive", "fh": ["a"]},
+        {"model": "direct", "fh": [4]},
+        {"model": "unknown", "fh": [1]},
+        {"model": "recursive"},
+    ],
+)
+def test_bad_request_gets_an_error_and_keeps_the_connection(server, request_):
+    _, path = server
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        with sock.makefile("rwb") as f:
+            f.write((json.dumps({"id": 0, **request_}) + "\n").encode())
+            f.flush()
+            error = json.loads(f.readline())
+            f.write(b'{"id": 1, "model": "recursive", "fh": [1]}\n')
+            f.flush()
+            reply = json.loads(f.readline())
+
+    assert error["id"] == 0 and "error" in error and "predictions" not in error
+    assert reply["id"] == 1 and len(reply["predictions"]) == 8
+
+
+def test_request_predictions_raises_the_error_of_the_server(server):
+    _, path = server
+    with pytest.raises(ValueError, match="fitted on fh"):
+        request_predictions("direct", [4], path=path)
@@ -0,0 +1,150 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from sktime.forecasting.naive import NaiveForecaster
+from sktime.forecasting.trend import PolynomialTrendForecaster
+from dsf_utils.models import SktimePanelForecaster
+from dsf_utils.tests._panels import make_panel
+
+FH = np.arange(1, 4)
+
+
+class _ShortSeriesForecaster(NaiveForecaster):
+    """Naive forecaster failing to fit or predict the short series"""
+
+    def __init__(self, min_fit_length=0, min_predict_length=0):
+        self.min_fit_length = min_fit_length
+        self.min_predict_length = min_predict_length
+        super().__init__(strategy="last")
+
+    def _fit(self, y, X=None, fh=None):
+        if len(y) < self.min_fit_length:
+            raise ValueError(f"{len(y)} points to fit")
+        return super()._fit(y, X=X, fh=fh)
+
+    def _predict(self, fh=None, X=None):
+        if len(self._y) < self.min_predict_length:
+            raise ValueError(f"{len(self._y)} points to predict")
+        return super()._predict(fh=fh, X=X)
+
+
+def _fitted(panel_df, forecaster_kwargs, **kwargs):
+    forecaster = SktimePanelForecaster(
+        _ShortSeriesForecaster, forecaster_kwargs, **kwargs
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        forecaster.fit(panel_df)
+    return forecaster
+
+
+def _predict(forecaster, fh=FH):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return forecaster.predict(fh)
+
+
+@pytest.mark.parametrize(
+    "n_jobs, backend, chunk_size",
+    [(2, "threading", None), (2, "threading", 1), (2, "loky", 3), (-1, "loky", None)],
+)
+def test_parallel_fit_and_predict_match_serial(n_jobs, backend, chunk_size):
+    # regions 4 to 7 are too short to fit, region 3 to predict
+    kwargs = {"min_fit_length": 70, "min_predict_length": 74}
+    serial = _fitted(make_panel(), kwargs)
+    parallel = _fitted(
+        make_panel(), kwargs, n_jobs=n_jobs, backend=backend, chunk_size=chunk_size
+    )
+
+    pd.testing.assert_frame_equal(_predict(parallel), _predict(serial))
+    assert list(parallel.models_dict) == list(serial.models_dict)
+    assert list(parallel.fit_errors_dict) == list(serial.fit_errors_dict)
+    assert list(parallel.predict_errors_dict) == list(serial.predict_errors_dict)
+
+
+def test_errors_are_collected_per_series():
+    forecaster = SktimePanelForecaster(
+        _ShortSeriesForecaster, {"min_fit_length": 70, "min_predict_length": 74}
+    )
+    with pytest.warns(UserWarning, match="fit failed for 4 series"):
+        forecaster.fit(make_panel())
+    assert list(forecaster.fit_errors_dict) == [f"region_{i}" for i in range(4, 8)]
+    assert all(isinstance(e, ValueError) for e in forecaster.fit_errors_dict.values())
+    assert list(forecaster.models_dict) == [f"region_{i}" for i in range(4)]
+
+    with pytest.warns(UserWarning, match="predict failed for 1 series"):
+        pred_df = forecaster.predict(FH)
+    assert list(forecaster.predict_errors_dict) == ["region_3"]
+    assert "71 points" in str(forecaster.predict_errors_dict["region_3"])
+    assert list(pred_df["REGION"].unique()) == ["region_0", "region_1", "region_2"]
+    assert len(pred_df) == 3 * len(FH)
+
+
+def _split(panel_df, cutoff_index=60):
+    cutoff = panel_df.index.unique().sort_values()[cutoff_index]
+    return panel_df[panel_df.index <= cutoff], panel_df[panel_df.index > cutoff]
+
+
+@pytest.mark.parametrize(
+    "n_jobs, backend", [(None, "loky"), (2, "threading"), (2, "loky")]
+)
+def test_update_with_params_matches_fit_on_all_rows(n_jobs, backend):
+    train_df, new_df = _split(make_panel())
+    updated = _fitted(train_df, {}, n_jobs=n_jobs, backend=backend)
+    updated.update(new_df, update_params=True)
+    fitted = _fitted(make_panel(), {})
+
+    pd.testing.assert_frame_equal(_predict(updated), _predict(fitted))
+    assert list(updated.update_times_dict) == list(updated.models_dict)
+    assert all(t >= 0 for t in updated.update_times_dict.values())
+
+
+def _trend_coefs(model):
+    return model.regressor_.steps[-1][1].coef_
+
+
+@pytest.mark.parametrize("update_params", [False, True])
+def test_update_params_re_estimates_the_models(update_params):
+    panel_df = make_panel()
+    train_df, new_df = _split(panel_df)
+    updated = SktimePanelForecaster(PolynomialTrendForecaster, {"degree": 1})
+    updated.fit(train_df)
+    updated.update(new_df, update_params=update_params)
+    expected = SktimePanelForecaster(PolynomialTrendForecaster, {"degree": 1})
+    expected.fit(panel_df if update_params else train_df)
+
+    for ts_name, model in updated.models_dict.items():
+        np.testing.assert_allclose(
+            _trend_coefs(model), _trend_coefs(expected.models_dict[ts_name])
+        )
+        # the models forecast from the new last date either way
+        assert model.cutoff[0] == new_df.index.max()
+    assert updated.predict(FH).index.min() == new_df.index.max() + 1
+
+
+def test_update_fits_new_series_and_collects_errors():
+    train_df, new_df = _split(make_panel())
+    # regions 6 and 7 have 43 and 40 points to fit, and 19 new ones
+    forecaster = _fitted(train_df, {"min_fit_length": 45})
+    assert list(forecaster.fit_errors_dict) == ["region_6", "region_7"]
+    new_series = make_panel(n_series=9).query("REGION == 'region_8'")
+    with pytest.warns(UserWarning, match="update failed for 2 series"):
+        forecaster.update(pd.concat([new_df, new_series]))
+
+    assert list(forecaster.update_errors_dict) == ["region_6", "region_7"]
+    assert "19 points" in str(forecaster.update_errors_dict["region_6"])
+    assert list(forecaster.fit_errors_dict) == ["region_6", "region_7"]
+    assert list(forecaster.update_times_dict) == [
+        f"region_{i}" for i in (0, 1, 2, 3, 4, 5, 8)
+    ]
+    # the new series is fitted on all its points
+    pred_df = _predict(forecaster)
+    y_pred = pred_df.loc[pred_df["REGION"] == "region_8", "y_pred"]
+    np.testing.assert_array_equal(y_pred, new_series["ILITOTAL"].iloc[-1])
+
+
+def test_update_requires_a_fitted_forecaster():
+    forecaster = SktimePanelForecaster(_ShortSeriesForecaster, {})
+    with pytest.raises(ValueError, match="fitted"):
+        forecaster.update(make_panel())
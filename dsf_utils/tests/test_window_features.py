@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dsf_utils.models import DirectLGBMGlobalForecaster, RecursiveLGBMGlobalForecaster
+from dsf_utils.models._window_features import (
+    WindowState,
+    window_feature_names,
+    window_feature_values,
+)
+from dsf_utils.tests._panels import make_panel
+
+WINDOW_FEATURES = {
+    "rolling_mean": [1, 4, 13],
+    "rolling_std": [2, 13],
+    "expanding_mean": True,
+    "ewm": [0.3, 1.0],
+}
+
+
+def _sorted_panel(missing=5):
+    panel_df = make_panel(missing=missing).reset_index()
+    # values far from 0 check the cancellation in the cumulative sums
+    panel_df["ILITOTAL"] += 1e6
+    panel_df = panel_df.sort_values(["REGION", "ds_wsun"], kind="stable")
+    series_codes = pd.factorize(panel_df["REGION"], sort=True)[0]
+    return panel_df, panel_df["ILITOTAL"].to_numpy(), series_codes
+
+
+def _reference_values(panel_df):
+    """Window statistics computed with a pandas groupby per statistic"""
+    groups = panel_df.groupby("REGION", sort=False)["ILITOTAL"]
+    columns = [
+        groups.transform(lambda s, w=w: s.rolling(w).mean())
+        for w in WINDOW_FEATURES["rolling_mean"]
+    ]
+    columns += [
+        groups.transform(lambda s, w=w: s.rolling(w).std())
+        for w in WINDOW_FEATURES["rolling_std"]
+    ]
+    columns.append(groups.transform(lambda s: s.expanding().mean()))
+    columns += [
+        groups.transform(
+            lambda s, alpha=alpha: s.ewm(
+                alpha=alpha, adjust=False, ignore_na=True
+            ).mean()
+        )
+        for alpha in WINDOW_FEATURES["ewm"]
+    ]
+    return np.column_stack(columns)
+
+
+@pytest.mark.parametrize("missing", [0, 5])
+def test_window_feature_values_match_pandas(missing):
+    panel_df, y, series_codes = _sorted_panel(missing)
+    values = window_feature_values(y, series_codes, WINDOW_FEATURES)
+    expected = _reference_values(panel_df)
+    assert values.shape[1] == len(window_feature_names("y", WINDOW_FEATURES))
+    np.testing.assert_array_equal(np.isnan(values), np.isnan(expected))
+    np.testing.assert_allclose(values, expected, rtol=1e-12, atol=1e-6)
+
+
+def test_window_state_push_rows_matches_values():
+    panel_df, y, series_codes = _sorted_panel()
+    values = window_feature_values(y, series_codes, WINDOW_FEATURES)
+    # the state of the first 20 rows of every series, pushed the other rows
+    positions = panel_df.groupby("REGION", sort=False).cumcount().to_numpy()
+    first = positions < 20
+    state = WindowState.from_sorted(
+        y[first], series_codes[first], series_codes.max() + 1, WINDOW_FEATURES
+    )
+    pushed = state.push_rows(y[~first], series_codes[~first])
+    np.testing.assert_array_equal(np.isnan(pushed), np.isnan(values[~first]))
+    np.testing.assert_allclose(pushed, values[~first], rtol=1e-12, atol=1e-6)
+
+
+def test_window_features_rejects_invalid_windows():
+    _, y, series_codes = _sorted_panel()
+    with pytest.raises(ValueError):
+        window_feature_values(y, series_codes, {"rolling_std": [1]})
+    with pytest.raises(ValueError):
+        window_feature_values(y, series_codes, {"ewm": [0]})
+
+
+def _last_window_values(history):
+    """Window statistics of the last value of every series, with pandas"""
+    panel_df = pd.DataFrame(
+        [(region, y) for region, values in history.items() for y in values],
+        columns=["REGION", "ILITOTAL"],
+    )
+    last_rows = panel_df.groupby("REGION", sort=False).cumcount(ascending=False) == 0
+    return _reference_values(panel_df)[last_rows.to_numpy()]
+
+
+def test_recursive_predict_matches_recomputed_window_features():
+    panel_df = make_panel(missing=3)
+    forecaster = RecursiveLGBMGlobalForecaster(
+        lgbm_kwargs={"n_estimators": 20, "verbose": -1},
+        lag_window_length=6,
+        window_features=WINDOW_FEATURES,
+    )
+    forecaster.fit(panel_df)
+    pred_df = forecaster.predict(np.arange(1, 6))
+
+    # reference loop recomputing the window statistics over the whole history
+    # of every series, extended with the predictions, at every step
+    X = forecaster._pred_df.copy()
+    # only the series with a full lag window at the last date are forecasted
+    history = {
+        region: list(panel_df.loc[panel_df["REGION"] == region, "ILITOTAL"])
+        for region in X.index.get_level_values(1)
+    }
+    lags = ["ILITOTAL"] + [f"ILITOTAL_lag{lag}" for lag in range(1, 6)]
+    names = window_feature_names("ILITOTAL", WINDOW_FEATURES)
+    expected = []
+    for step in range(1, 6):
+        y_pred = np.exp(forecaster.model.predict(X.to_numpy())) - 1
+        expected.append(y_pred)
+        for region, y in zip(X.index.get_level_values(1), y_pred):
+            history[region].append(y)
+        date = forecaster._train_max_date + step
+        X[lags[1:]] = X[lags[:-1]].to_numpy()
+        X["ILITOTAL"] = y_pred
+        X["Year"] = date.year
+        X["Week"] = date.week
+        X["t"] += 1
+        X.loc[:, names] = _last_window_values(history)
+    np.testing.assert_allclose(
+        pred_df["y_pred"].to_numpy(), np.concatenate(expected), rtol=1e-9
+    )
+
+
+def _forecaster(forecaster_class, **kwargs):
+    return forecaster_class(
+        lgbm_kwargs={"n_estimators": 20, "verbose": -1},
+        lag_window_length=6,
+        window_features=WINDOW_FEATURES,
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize(
+    "forecaster_class", [DirectLGBMGlobalForecaster, RecursiveLGBMGlobalForecaster]
+)
+def test_window_features_are_kept_by_update_chunks_and_save(forecaster_class, tmp_path):
+    panel_df = make_panel(missing=3)
+    fh = np.arange(1, 5)
+    forecaster = _forecaster(forecaster_class)
+    forecaster.fit(panel_df, fh)
+    expected = forecaster.predict(fh)
+
+    cutoff = panel_df.index.unique().sort_values()[60]
+    updated = _forecaster(forecaster_class)
+    updated.fit(panel_df[panel_df.index <= cutoff], fh)
+    updated.update(panel_df[panel_df.index > cutoff])
+    np.testing.assert_allclose(updated._X, forecaster._X, rtol=1e-12, atol=1e-6)
+
+    chunked = _forecaster(forecaster_class, chunk_size=3, chunk_dir=str(tmp_path))
+    chunked.fit(panel_df, fh)
+    forecaster.save(str(tmp_path / "saved"))
+    loaded = forecaster_class.load(str(tmp_path / "saved"))
+    for other in [updated, chunked, loaded]:
+        np.testing.assert_allclose(
+            other.predict(fh)["y_pred"], expected["y_pred"], rtol=1e-9
+        )
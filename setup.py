@@ -16,4 +16,5 @@ setup(
         "tbats",
         "lightgbm",
     ],
+    extras_require={"parquet": ["pyarrow"]},
 )